@@ -0,0 +1,247 @@
+"""Batched acquisition pipeline for the ESP-01 sensor loop.
+
+The guide's loop posts one {'temperature', 'humidity'} dict per reading, so
+every sample pays for its own connection and JSON body.  Here readings go into
+a fixed-size ring buffer (three `array` columns: timestamp, temperature,
+humidity) and are sent as one payload when any threshold is reached:
+
+    max_count  number of buffered samples
+    max_age    seconds since the oldest buffered sample
+    max_bytes  estimated size of the batch body
+
+An optional reporting policy (see deadband.py) decides which readings are
+buffered at all, and `encoder`/`content_type` select the batch format (JSON
+by default; the byte threshold is always estimated from the JSON size, which
+is an upper bound for the compact formats).  A server that answers a compact
+format with 415 Unsupported Media Type gets JSON from then on.
+
+With a `fault_filter` (faultfilter.FaultFilter) every reading is checked
+before listeners and the policy see it; failed reads count towards its NaN
+bursts, and readings whose flags intersect its `drop` mask are counted as
+rejected and never buffered.
+
+Samples stay in the buffer until a flush succeeds.  If the endpoint is down
+long enough for the ring to fill, the oldest samples are overwritten and
+counted as dropped.  Only `array`, `json` and `time` are used so the module
+also runs on MicroPython.
+"""
+import json
+import time
+from array import array
+
+CONTENT_TYPE = "application/json"
+_NAN = float("nan")
+
+
+class SampleBuffer:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.timestamps = array("d", [0.0] * capacity)
+        self.temperatures = array("f", [0.0] * capacity)
+        self.humidities = array("f", [0.0] * capacity)
+        self.start = 0
+        self.count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, temperature, humidity):
+        if self.count == self.capacity:
+            # Full: overwrite the oldest sample.
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+            self.dropped += 1
+        i = (self.start + self.count) % self.capacity
+        self.timestamps[i] = timestamp
+        self.temperatures[i] = temperature
+        self.humidities[i] = humidity
+        self.count += 1
+
+    def oldest(self):
+        return self.timestamps[self.start] if self.count else None
+
+    def peek(self, n=None):
+        n = self.count if n is None else min(n, self.count)
+        cap = self.capacity
+        out = []
+        for k in range(n):
+            i = (self.start + k) % cap
+            out.append((self.timestamps[i], self.temperatures[i], self.humidities[i]))
+        return out
+
+    def discard(self, n):
+        n = min(n, self.count)
+        self.start = (self.start + n) % self.capacity
+        self.count -= n
+
+
+def _sample_size(dt, temperature, humidity):
+    # Size of one "[dt,t,h]," entry in encode_batch's output.
+    return len("[%d,%s,%s]," % (dt, _num(temperature), _num(humidity)))
+
+
+def _num(value):
+    # Readings are stored as float32; round back to the sensor's 0.1 resolution.
+    value = round(value, 1)
+    return "%d" % value if value == int(value) else "%.1f" % value
+
+
+def encode_batch(node_id, samples):
+    """Encode samples as {"node", "t0", "samples": [[dt, t, h], ...]} JSON."""
+    t0 = int(samples[0][0]) if samples else 0
+    body = ",".join("[%d,%s,%s]" % (int(ts) - t0, _num(t), _num(h)) for ts, t, h in samples)
+    return '{"node":%s,"t0":%d,"samples":[%s]}' % (json.dumps(node_id), t0, body)
+
+
+def decode_batch(payload):
+    """Inverse of encode_batch: returns (node_id, [(timestamp, temperature, humidity), ...])."""
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode()
+    data = json.loads(payload)
+    t0 = data["t0"]
+    return data["node"], [(t0 + dt, t, h) for dt, t, h in data["samples"]]
+
+
+class AcquisitionPipeline:
+    def __init__(self, read, post, url, node_id="esp01", capacity=256, max_count=30,
+                 max_age=300, max_bytes=1400, clock=time.time, policy=None,
+                 encoder=None, content_type=CONTENT_TYPE, fault_filter=None):
+        self.read = read
+        self.post = post
+        self.url = url
+        self.node_id = node_id
+        self.buffer = SampleBuffer(capacity)
+        self.max_count = max_count
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.policy = policy
+        self.encoder = encoder or encode_batch
+        self.content_type = content_type
+        self.fault_filter = fault_filter
+        self.listeners = []
+        self.pending_bytes = 0
+        self.stats = {
+            "samples": 0, "read_errors": 0, "rejected": 0, "suppressed": 0, "flushes": 0,
+            "failed_flushes": 0, "samples_sent": 0, "bytes_sent": 0, "max_depth": 0,
+            "count_flushes": 0, "age_flushes": 0, "bytes_flushes": 0, "manual_flushes": 0,
+            "downgrades": 0,
+        }
+
+    def add_listener(self, listener):
+        """Call listener(node_id, timestamp, temperature, humidity) for every valid reading."""
+        self.listeners.append(listener)
+
+    def sample(self):
+        try:
+            temperature, humidity = self.read()
+        except OSError:
+            return self._read_error()
+        if temperature != temperature or humidity != humidity:
+            # NaN from a failed read (Arduino-style drivers)
+            return self._read_error()
+        return self.add(self.clock(), temperature, humidity)
+
+    def _read_error(self):
+        self.stats["read_errors"] += 1
+        if self.fault_filter is not None:
+            self.fault_filter.check(self.node_id, self.clock(), _NAN, _NAN)
+        return self.check()
+
+    def add(self, timestamp, temperature, humidity):
+        fault_filter = self.fault_filter
+        if (fault_filter is not None
+                and fault_filter.check(self.node_id, timestamp, temperature, humidity) & fault_filter.drop):
+            self.stats["rejected"] += 1
+            return self.check()
+        for listener in self.listeners:
+            listener(self.node_id, timestamp, temperature, humidity)
+        if self.policy is not None and not self.policy.should_report(timestamp, temperature, humidity):
+            self.stats["suppressed"] += 1
+            return self.check()
+        buf = self.buffer
+        dropped = buf.dropped
+        buf.append(timestamp, temperature, humidity)
+        self.stats["samples"] += 1
+        if len(buf) > self.stats["max_depth"]:
+            self.stats["max_depth"] = len(buf)
+        if buf.dropped != dropped:
+            # The oldest sample was overwritten, so every dt moved.
+            self._estimate()
+        else:
+            if len(buf) == 1:
+                self.pending_bytes = 48
+            self.pending_bytes += _sample_size(timestamp - buf.oldest(), temperature, humidity)
+        return self.check()
+
+    def _estimate(self):
+        """Recompute pending_bytes for what is buffered."""
+        self.pending_bytes = 48 if len(self.buffer) else 0
+        if len(self.buffer):
+            rest = self.buffer.peek()
+            t0 = rest[0][0]
+            for ts, t, h in rest:
+                self.pending_bytes += _sample_size(ts - t0, t, h)
+
+    def due(self):
+        n = len(self.buffer)
+        if not n:
+            return None
+        if n >= self.max_count:
+            return "count"
+        if self.pending_bytes >= self.max_bytes:
+            return "bytes"
+        if self.clock() - self.buffer.oldest() >= self.max_age:
+            return "age"
+        return None
+
+    def check(self):
+        # After an outage several batches may be due; send them back to back.
+        flushed = False
+        reason = self.due()
+        while reason is not None and self.flush(reason):
+            flushed = True
+            reason = self.due()
+        return flushed
+
+    def flush(self, reason="manual"):
+        samples = self.buffer.peek(self.max_count)
+        if not samples:
+            return False
+        payload = self.encoder(self.node_id, samples)
+        try:
+            response = self.post(self.url, data=payload, headers={"Content-Type": self.content_type})
+            status = getattr(response, "status_code", 200)
+            response.close()
+        except OSError:
+            status = None
+        if status == 415 and self.content_type != CONTENT_TYPE:
+            self.encoder = encode_batch
+            self.content_type = CONTENT_TYPE
+            self.stats["downgrades"] += 1
+            return self.flush(reason)
+        if status is None or status >= 400:
+            self.stats["failed_flushes"] += 1
+            return False
+        self.buffer.discard(len(samples))
+        self._estimate()
+        stats = self.stats
+        stats["flushes"] += 1
+        stats[reason + "_flushes"] += 1
+        stats["samples_sent"] += len(samples)
+        stats["bytes_sent"] += len(payload)
+        return True
+
+    def backpressure(self):
+        return {"depth": len(self.buffer), "capacity": self.buffer.capacity,
+                "dropped": self.buffer.dropped, "max_depth": self.stats["max_depth"],
+                "failed_flushes": self.stats["failed_flushes"]}
+
+    def run(self, interval=10, iterations=None, sleep=time.sleep):
+        n = 0
+        while iterations is None or n < iterations:
+            self.sample()
+            n += 1
+            sleep(interval)
+        self.flush()
@@ -0,0 +1,277 @@
+"""Battery life and data latency of the deep-sleep node, over a grid of designs.
+
+Each wake the ESP-01 boots, reads the DHT and goes back to deep sleep;
+every `batch` wakes it also brings Wi-Fi up and posts what it has buffered
+(firmware.py), or, for the guide's Step 6 loop, it does that on every wake
+and then idles for time.sleep(10) with the radio on.  Per phase the model
+charges current x time:
+
+    boot      ROM boot + MicroPython start; RF calibration only when the
+              radio is wanted (esp.deepsleep(..., RF_DISABLED) skips it)
+    sensor    DHT measure with the CPU awake and the radio off
+    wifi      association, scan on a cache miss, DHCP unless static IP;
+              a failed connect burns the manager's timeouts
+    post      TCP connect + request + response, payload by batch size
+    linger    radio-on idle after the post (the guide's time.sleep(10))
+    sleep     ESP8266 deep sleep + DHT standby
+
+plus the regulator's quiescent current, the ESP-01 power LED if fitted and
+the cell's self-discharge, all constant.  The regulator's dropout also
+decides how much of an 18650's capacity is usable before the ESP8266 drops
+below its minimum supply voltage; without a regulator only the part of the
+discharge curve under the ESP8266's 3.6 V maximum counts, since a full cell
+at 4.2 V is out of spec.
+
+Association time, cache misses and failed connects are drawn per send
+cycle, so each configuration is simulated over `cycles` send cycles as one
+row of a (configurations x cycles) NumPy array; grids are split in chunks
+over a process pool.  Results per configuration: mean current, battery life
+in days and the latency of readings (mean and p99 of the oldest reading in
+a batch, counting retries).
+
+    python battery.py --intervals 60 300 600 --batches 1 6 12 --top 10
+"""
+import argparse
+import csv
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ESP-01 / ESP8266 currents (mA) and phase durations (s); datasheet typicals
+# where there is one, measured-in-the-wild ballparks otherwise.
+PROFILE = {
+    "boot_ma": 25.0, "boot_s": 0.12,           # CPU at 80 MHz, radio off
+    "rf_cal_ma": 70.0, "rf_cal_s": 0.15,       # RF calibration at boot
+    "cpu_ma": 20.0,                            # awake, modem off
+    "sensor_ma": 1.5, "sensor_s": 0.05,        # DHT22 measuring
+    "wifi_ma": 75.0,                           # association / RX
+    "assoc_s": 0.6, "assoc_sigma": 0.35,       # lognormal
+    "scan_s": 2.2, "dhcp_s": 0.8,
+    "cache_hit": 0.97,                         # cached BSSID still valid
+    "fail_prob": 0.02,                         # connect attempt fails
+    "tx_ma": 120.0,                            # TX bursts averaged over the POST
+    "rtt_s": 0.03, "throughput_bps": 200_000.0,
+    "request_bytes": 220,
+    "sleep_ua": 20.0,                          # ESP8266 deep sleep
+    "sensor_idle_ua": 50.0,                    # DHT22 standby
+    "led_ma": 0.8,                             # ESP-01 red power LED
+}
+
+# Quiescent current (mA), dropout (V) at the ESP8266's peak current and the
+# highest cell voltage the node may run from: a regulator takes the full
+# cell, a direct connection only what the ESP8266 tolerates.
+REGULATORS = {
+    "ams1117": {"iq_ma": 5.0, "dropout_v": 1.1, "vmax_v": 4.2},
+    "mcp1700": {"iq_ma": 0.0016, "dropout_v": 0.18, "vmax_v": 4.2},
+    "ht7333": {"iq_ma": 0.004, "dropout_v": 0.1, "vmax_v": 4.2},
+    "none": {"iq_ma": 0.0, "dropout_v": 0.0, "vmax_v": 3.6},
+}
+
+# Transmit policies.  fail_s is radio-on time of a failed connect: wifi.py
+# bounds it by its timeouts; the guide's busy-wait has none, so it keeps
+# retrying (modelled as one scan timeout per failure).
+POLICIES = {
+    "guide": {"rf_off_idle": False, "cached": False, "static": False, "linger_s": 10.0,
+              "bytes_per_reading": 45, "send_prob": 1.0, "fail_s": 10.0, "batched": False},
+    "batched": {"rf_off_idle": True, "cached": True, "static": False, "linger_s": 0.0,
+                "bytes_per_reading": 16, "send_prob": 1.0, "fail_s": 16.0, "batched": True},
+    "static": {"rf_off_idle": True, "cached": True, "static": True, "linger_s": 0.0,
+               "bytes_per_reading": 16, "send_prob": 1.0, "fail_s": 16.0, "batched": True},
+    "deadband": {"rf_off_idle": True, "cached": True, "static": True, "linger_s": 0.0,
+                 "bytes_per_reading": 16, "send_prob": 0.35, "fail_s": 16.0, "batched": True},
+}
+
+# 18650 open-circuit voltage by state of charge at light load.
+LIION_SOC = np.array([0.0, 0.05, 0.15, 0.3, 0.5, 0.7, 0.9, 1.0])
+LIION_V = np.array([3.0, 3.4, 3.55, 3.65, 3.75, 3.9, 4.05, 4.2])
+ESP_VMIN = 2.5
+SELF_DISCHARGE = 0.03  # of capacity per month
+
+FIELDS = ("interval_s", "batch", "policy", "regulator", "led")
+
+
+def usable_fraction(dropout_v, vmax_v=LIION_V[-1], vmin=ESP_VMIN):
+    """Share of the cell's capacity between vmax_v and the voltage the regulator needs."""
+    cutoff = vmin + np.asarray(dropout_v, dtype=np.float64)
+    low = np.interp(cutoff, LIION_V, LIION_SOC, left=0.0, right=1.0)
+    high = np.interp(vmax_v, LIION_V, LIION_SOC, left=0.0, right=1.0)
+    return np.maximum(high - low, 0.0)
+
+
+def make_grid(intervals, batches, policies, regulators, leds=(False,)):
+    """Configuration table as a dict of equal-length arrays (policy/regulator as indices)."""
+    names = list(POLICIES)
+    regs = list(REGULATORS)
+    rows = []
+    for policy in policies:
+        policy_batches = batches if POLICIES[policy]["batched"] else [1]
+        for interval in intervals:
+            for batch in policy_batches:
+                for regulator in regulators:
+                    for led in leds:
+                        rows.append((interval, batch, names.index(policy), regs.index(regulator), led))
+    table = np.array(rows, dtype=np.float64).reshape(-1, len(FIELDS))
+    return {
+        "interval_s": table[:, 0], "batch": table[:, 1].astype(np.int64),
+        "policy": table[:, 2].astype(np.int64), "regulator": table[:, 3].astype(np.int64),
+        "led": table[:, 4].astype(bool),
+    }
+
+
+def _column(table, key, index):
+    return np.array([entry[key] for entry in table.values()], dtype=np.float64)[index]
+
+
+def simulate(grid, cycles=256, seed=0, capacity_mah=2600.0, profile=PROFILE):
+    """Mean current, life and latency for every configuration in grid."""
+    p = profile
+    rng = np.random.default_rng(seed)
+    n = len(grid["batch"])
+    interval = grid["interval_s"][:, None]
+    batch = grid["batch"][:, None].astype(np.float64)
+    policy = grid["policy"]
+    rf_off_idle = _column(POLICIES, "rf_off_idle", policy)[:, None]
+    cached = _column(POLICIES, "cached", policy)[:, None]
+    static = _column(POLICIES, "static", policy)[:, None]
+    linger = _column(POLICIES, "linger_s", policy)[:, None]
+    per_reading = _column(POLICIES, "bytes_per_reading", policy)[:, None]
+    send_prob = _column(POLICIES, "send_prob", policy)[:, None]
+    fail_s = _column(POLICIES, "fail_s", policy)[:, None]
+    iq = _column(REGULATORS, "iq_ma", grid["regulator"])
+    dropout = _column(REGULATORS, "dropout_v", grid["regulator"])
+    vmax = _column(REGULATORS, "vmax_v", grid["regulator"])
+
+    shape = (n, cycles)
+    hit = (rng.random(shape) < p["cache_hit"]) & (cached > 0)
+    assoc = p["assoc_s"] * rng.lognormal(0.0, p["assoc_sigma"], shape)
+    connect = assoc + np.where(hit, 0.0, p["scan_s"]) + np.where(static > 0, 0.0, p["dhcp_s"])
+    failures = rng.geometric(1.0 - p["fail_prob"], shape) - 1
+    sent = rng.random(shape) < send_prob
+    post = 2 * p["rtt_s"] + (p["request_bytes"] + batch * per_reading) * 8 / p["throughput_bps"]
+
+    # Charge (mA*s) per send cycle: `batch` wakes, one of them with the radio.
+    wake = p["boot_ma"] * p["boot_s"] + (p["cpu_ma"] + p["sensor_ma"]) * p["sensor_s"]
+    rf_cal = p["rf_cal_ma"] * p["rf_cal_s"]
+    idle_wakes = batch - 1
+    charge = batch * wake + np.where(rf_off_idle > 0, 0.0, idle_wakes * rf_cal)
+    radio = (rf_cal + p["wifi_ma"] * connect + p["tx_ma"] * post + p["wifi_ma"] * linger
+             # each failed connect is a wake of its own (firmware.py retries on the next one)
+             + failures * (wake + rf_cal + p["wifi_ma"] * fail_s))
+    charge = charge + np.where(sent, radio, rf_cal * (1 - rf_off_idle))
+    awake = batch * (p["boot_s"] + p["sensor_s"]) + np.where(sent, connect + post + linger, 0.0)
+    period = batch * interval
+    sleep_ma = (p["sleep_ua"] + p["sensor_idle_ua"]) / 1000.0
+    active_ma = charge.mean(axis=1) / period[:, 0]
+    sleep_share = 1.0 - np.minimum(awake.mean(axis=1) / period[:, 0], 1.0)
+    current = active_ma + sleep_ma * sleep_share + iq + np.where(grid["led"], p["led_ma"], 0.0)
+    self_discharge = capacity_mah * SELF_DISCHARGE / (30 * 24)
+    usable = capacity_mah * usable_fraction(dropout, vmax)
+    life_days = usable / (current + self_discharge) / 24.0
+
+    # Latency of delivered readings: the oldest waited the whole batch.
+    delay = failures * interval + connect + post
+    oldest = (batch - 1) * interval + delay
+    mean_latency = (batch - 1) / 2 * interval + delay
+    weights = sent.sum(axis=1)
+    mean_latency = np.where(weights > 0, (mean_latency * sent).sum(axis=1) / np.maximum(weights, 1), np.nan)
+    # Nearest-rank p99 over the sent cycles: unsent ones sort first as -inf.
+    # (np.nanpercentile along an axis loops over rows in Python.)
+    oldest = np.sort(np.where(sent, oldest, -np.inf), axis=1)
+    rank = cycles - weights + np.maximum(np.ceil(0.99 * weights).astype(np.int64) - 1, 0)
+    p99 = np.take_along_axis(oldest, np.minimum(rank, cycles - 1)[:, None], axis=1)[:, 0]
+    p99 = np.where(weights > 0, p99, np.nan)
+    return {"current_ma": current, "life_days": life_days, "usable_mah": usable,
+            "latency_mean_s": mean_latency, "latency_p99_s": p99,
+            "radio_s_per_day": (np.where(sent, connect + post + linger + failures * fail_s, 0.0).mean(axis=1)
+                                / period[:, 0] * 86400)}
+
+
+def _simulate_chunk(job):
+    grid, cycles, seed, capacity_mah = job
+    return simulate(grid, cycles, seed, capacity_mah)
+
+
+def simulate_parallel(grid, workers=None, chunk=2048, cycles=256, seed=0, capacity_mah=2600.0):
+    """simulate() over chunks of the grid in a process pool; same results for any worker count."""
+    n = len(grid["batch"])
+    starts = range(0, n, chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    jobs = [({key: values[start:start + chunk] for key, values in grid.items()}, cycles,
+             seeds[i], capacity_mah) for i, start in enumerate(starts)]
+    if workers == 1 or len(jobs) == 1:
+        parts = [_simulate_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_simulate_chunk, jobs))
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def rows(grid, results):
+    policies = list(POLICIES)
+    regulators = list(REGULATORS)
+    for i in range(len(grid["batch"])):
+        yield {
+            "interval_s": float(grid["interval_s"][i]), "batch": int(grid["batch"][i]),
+            "policy": policies[grid["policy"][i]], "regulator": regulators[grid["regulator"][i]],
+            "led": bool(grid["led"][i]),
+            **{key: float(values[i]) for key, values in results.items()},
+        }
+
+
+def format_table(rows):
+    lines = ["%8s %5s %-9s %-8s %4s %9s %9s %11s %11s %9s" % (
+        "interval", "batch", "policy", "reg", "led", "mean mA", "life d", "latency s", "p99 s",
+        "radio s/d")]
+    for row in rows:
+        lines.append("%8.0f %5d %-9s %-8s %4s %9.3f %9.1f %11.0f %11.0f %9.1f" % (
+            row["interval_s"], row["batch"], row["policy"], row["regulator"], "yes" if row["led"] else "no",
+            row["current_ma"], row["life_days"], row["latency_mean_s"], row["latency_p99_s"],
+            row["radio_s_per_day"]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Battery life and data latency over a grid of node designs.")
+    parser.add_argument("--intervals", type=float, nargs="+", default=[60, 120, 300, 600, 900, 1800, 3600],
+                        help="seconds between wakes")
+    parser.add_argument("--batches", type=int, nargs="+", default=list(range(1, 49)),
+                        help="wakes per upload (firmware.py send_every)")
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES))
+    parser.add_argument("--regulators", nargs="+", default=list(REGULATORS), choices=list(REGULATORS))
+    parser.add_argument("--led", choices=("on", "off", "both"), default="both")
+    parser.add_argument("--capacity", type=float, default=2600.0, help="cell capacity in mAh")
+    parser.add_argument("--cycles", type=int, default=256, help="send cycles drawn per configuration")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-latency", type=float, help="only show designs with p99 latency below (s)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--csv", help="write every configuration here")
+    args = parser.parse_args(argv)
+
+    leds = {"on": (True,), "off": (False,), "both": (False, True)}[args.led]
+    grid = make_grid(args.intervals, args.batches, args.policies, args.regulators, leds)
+    results = simulate_parallel(grid, args.workers, cycles=args.cycles, seed=args.seed,
+                                capacity_mah=args.capacity)
+    table = list(rows(grid, results))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(table[0]))
+            writer.writeheader()
+            writer.writerows(table)
+
+    guide = [row for row in table if row["policy"] == "guide" and row["interval_s"] == 600
+             and row["regulator"] == "ams1117" and row["led"]]
+    if guide:
+        print("The guide as written (10 min deep sleep, time.sleep(10), AMS1117, LED fitted):")
+        print(format_table(guide))
+        print()
+    shown = [row for row in table if args.max_latency is None or row["latency_p99_s"] <= args.max_latency]
+    shown.sort(key=lambda row: -row["life_days"])
+    print("%d configurations; longest life%s:" % (
+        len(table), "" if args.max_latency is None else " with p99 latency <= %gs" % args.max_latency))
+    print(format_table(shown[:args.top]))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Requests and bytes per sample: one POST per reading vs. the batched pipeline.
+
+Both paths read the same simulated DHT11 trace (one sample every 10 s of
+simulated time) and post to a local HTTP stand-in.  The per-reading path opens
+a fresh connection for every sample like urequests does on the ESP-01.
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acquisition import AcquisitionPipeline  # noqa: E402
+from hal import SimulatedDHT  # noqa: E402
+from localsink import LocalHTTPSink  # noqa: E402
+
+
+class Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def close(self):
+        pass
+
+
+def urequests_post(url, json=None, data=None, headers=None):
+    """One connection per request, like urequests on the ESP-01."""
+    parts = urlsplit(url)
+    headers = dict(headers or {})
+    if json is not None:
+        import json as _json
+        data = _json.dumps(json)
+        headers["Content-Type"] = "application/json"
+    conn = http.client.HTTPConnection(parts.hostname, parts.port)
+    try:
+        conn.request("POST", parts.path, body=data, headers=headers)
+        response = conn.getresponse()
+        return Response(response.status, response.read().decode())
+    finally:
+        conn.close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--max-count", type=int, default=30)
+    parser.add_argument("--max-age", type=float, default=300)
+    parser.add_argument("--max-bytes", type=int, default=1400)
+    args = parser.parse_args(argv)
+
+    with LocalHTTPSink() as sink:
+        sensor = SimulatedDHT(seed=1)
+        started = time.perf_counter()
+        for _ in range(args.samples):
+            sensor.measure()
+            urequests_post(sink.url, json={"temperature": sensor.temperature(),
+                                           "humidity": sensor.humidity()}).close()
+        single = sink.stats(), time.perf_counter() - started
+
+        sink.reset()
+        sensor = SimulatedDHT(seed=1)
+        clock = FakeClock()
+
+        def read():
+            sensor.measure()
+            return sensor.temperature(), sensor.humidity()
+
+        pipeline = AcquisitionPipeline(read, urequests_post, sink.url, clock=clock,
+                                       max_count=args.max_count, max_age=args.max_age,
+                                       max_bytes=args.max_bytes)
+        started = time.perf_counter()
+        for _ in range(args.samples):
+            pipeline.sample()
+            clock.now += 10
+        pipeline.flush()
+        batched = sink.stats(), time.perf_counter() - started
+
+    print("%-10s %10s %12s %14s %12s %10s" % ("path", "requests", "connections",
+                                              "req/sample", "bytes/sample", "wall s"))
+    for name, (stats, wall) in (("per-post", single), ("batched", batched)):
+        print("%-10s %10d %12d %14.4f %12.1f %10.3f" % (
+            name, stats["requests"], stats["connections"], stats["requests"] / args.samples,
+            stats["bytes"] / args.samples, wall))
+    print("\npipeline stats:", json.dumps(pipeline.stats))
+
+
+if __name__ == "__main__":
+    main()
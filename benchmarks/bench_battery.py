@@ -0,0 +1,63 @@
+"""Battery simulator: configurations/s, per-configuration loop vs NumPy vs process pool.
+
+Builds grids of --sizes configurations (intervals x batches x policies x
+regulators x LED) and runs battery.simulate over them three ways:
+
+    loop        simulate() called once per configuration (a 1-row grid),
+                timed on a sample and extrapolated
+    vectorized  one simulate() over the whole grid in this process
+    pool        battery.simulate_parallel with --workers processes
+
+The pool only pays off with more than one CPU; its row shows the spawn and
+pickling overhead otherwise.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import battery  # noqa: E402
+
+
+def grid_of(size):
+    batches = list(range(1, 49))
+    regulators = list(battery.REGULATORS)
+    per_interval = (len(battery.POLICIES) - 1) * len(batches) * len(regulators) * 2 + len(regulators) * 2
+    intervals = np.linspace(30, 7200, max(1, size // per_interval))
+    return battery.make_grid(intervals, batches, list(battery.POLICIES), regulators, (False, True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 400_000])
+    parser.add_argument("--cycles", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--loop-sample", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    print("%d CPU(s), %d send cycles per configuration" % (os.cpu_count(), args.cycles))
+    print("%9s  %-10s %9s %12s" % ("configs", "mode", "s", "configs/s"))
+    for size in args.sizes:
+        grid = grid_of(size)
+        n = len(grid["batch"])
+        sample = min(n, args.loop_sample)
+        started = time.perf_counter()
+        for i in range(sample):
+            battery.simulate({key: values[i:i + 1] for key, values in grid.items()}, args.cycles, i)
+        loop = (time.perf_counter() - started) / sample * n
+        started = time.perf_counter()
+        battery.simulate_parallel(grid, workers=1, chunk=n, cycles=args.cycles)
+        vectorized = time.perf_counter() - started
+        started = time.perf_counter()
+        battery.simulate_parallel(grid, workers=args.workers, cycles=args.cycles)
+        pool = time.perf_counter() - started
+        for mode, seconds in (("loop", loop), ("vectorized", vectorized), ("pool", pool)):
+            print("%9d  %-10s %9.2f %12.0f" % (n, mode, seconds, n / seconds))
+
+
+if __name__ == "__main__":
+    main()
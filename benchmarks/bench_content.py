@@ -0,0 +1,63 @@
+"""Startup and first-render cost of the content pack vs. the inline literals.
+
+Every sample runs in a fresh interpreter.  "inline" imports content_source.py
+(the literals the scripts used to rebuild on every call) and "pack" maps
+content.pack and unmarshals only the sections the first screen needs.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import sys, time
+sys.path.insert(0, %(root)r)
+import content
+t0 = time.perf_counter()
+if %(mode)r == "inline":
+    import content_source
+    sections = content_source.SECTIONS
+    get = sections.__getitem__
+else:
+    pack = content.load()
+    get = pack.section
+overview = get("overview")
+t1 = time.perf_counter()
+guide = get("mcu_guide")
+text = content.practice_text(guide["steps"][0], guide["fence"])
+t2 = time.perf_counter()
+print("%%f %%f" %% ((t1 - t0) * 1e3, (t2 - t1) * 1e3))
+"""
+
+
+def sample(mode, runs):
+    startup, first = [], []
+    for _ in range(runs):
+        code = PROBE % {"root": ROOT, "mode": mode}
+        out = subprocess.run([sys.executable, "-c", code], check=True,
+                             capture_output=True, text=True).stdout.split()
+        startup.append(float(out[0]))
+        first.append(float(out[1]))
+    return statistics.median(startup), statistics.median(first)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    import content
+    content.load()  # make sure the pack exists before timing
+
+    print("%-8s %14s %18s" % ("mode", "startup ms", "first render ms"))
+    for mode in ("inline", "pack"):
+        startup, first = sample(mode, args.runs)
+        print("%-8s %14.3f %18.3f" % (mode, startup, first))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compression ratio and messages avoided by the deadband reporting policy.
+
+Runs a simulated DHT11 and DHT22 trace (diurnal cycle plus noise, quantized
+like the sensors, one sample per --interval seconds) through ReportingPolicy
+and the delta+varint encoder, and compares against the guide's one JSON POST
+per reading.  A recorded trace can be given as JSONL with timestamp,
+temperature and humidity fields instead.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acquisition import encode_batch  # noqa: E402
+from deadband import ReportingPolicy, decode, encode, reconstruct  # noqa: E402
+
+
+def simulate(model, days, interval, seed=1):
+    rng = random.Random(seed)
+    step = 1.0 if model == "DHT11" else 0.1
+    trace = []
+    t0 = 1_700_000_000
+    for k in range(int(days * 86400 / interval)):
+        ts = t0 + k * interval
+        phase = 2 * math.pi * (ts % 86400) / 86400
+        temperature = 22 + 4 * math.sin(phase) + rng.gauss(0, 0.15)
+        humidity = 50 - 10 * math.sin(phase) + rng.gauss(0, 0.6)
+        trace.append((ts, round(temperature / step) * step, round(humidity / step) * step))
+    return trace
+
+
+def load(path):
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(int(r["timestamp"]), r["temperature"], r["humidity"]) for r in rows]
+
+
+def evaluate(name, trace, interval, args):
+    policy = ReportingPolicy(args.temperature_deadband, args.humidity_deadband, args.heartbeat)
+    reported = [s for s in trace if policy.should_report(*s)]
+    per_post = sum(len(json.dumps({"temperature": t, "humidity": h})) for _, t, h in trace)
+    batches = [reported[i:i + args.batch] for i in range(0, len(reported), args.batch)]
+    json_bytes = sum(len(encode_batch("node-1", b)) for b in batches)
+    delta_bytes = 0
+    restored = []
+    for batch in batches:
+        payload = encode("node-1", batch, interval)
+        delta_bytes += len(payload)
+        restored.extend(decode(payload)[2])
+    series = reconstruct(restored, interval, end=trace[-1][0])
+    assert len(series) == len(trace)
+    err_t = max(abs(a[1] - b[1]) for a, b in zip(series, trace))
+    err_h = max(abs(a[2] - b[2]) for a, b in zip(series, trace))
+    print("%s: %d samples, %d reported (%.1f%% suppressed)" % (
+        name, len(trace), len(reported), 100.0 * policy.suppressed / len(trace)))
+    print("  messages        %d -> %d (%d avoided)" % (len(trace), len(batches), len(trace) - len(batches)))
+    print("  bytes           per-post JSON %d, batched JSON %d, delta+varint %d" % (
+        per_post, json_bytes, delta_bytes))
+    print("  ratio           %.1fx vs per-post JSON, %.1fx vs batched JSON" % (
+        per_post / delta_bytes, json_bytes / delta_bytes))
+    print("  reconstruction  max error %.2f C / %.2f %%RH" % (err_t, err_h))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="JSONL trace to use instead of the simulation")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--interval", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=30)
+    parser.add_argument("--temperature-deadband", type=float, default=0.5)
+    parser.add_argument("--humidity-deadband", type=float, default=2.0)
+    parser.add_argument("--heartbeat", type=float, default=3600)
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        evaluate(args.trace, load(args.trace), args.interval, args)
+        return
+    for model in ("DHT11", "DHT22"):
+        evaluate(model, simulate(model, args.days, args.interval), args.interval, args)
+
+
+if __name__ == "__main__":
+    main()
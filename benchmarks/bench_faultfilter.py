@@ -0,0 +1,108 @@
+"""Fault filter throughput per sample and over history, and what it catches.
+
+Takes --ticks ticks of a fleet.Fleet(--nodes) (its own NaN failures and
+bursts, no reconnect storms) and injects faults: single-sample spikes of
++-8 to 30 units in --spike-rate of the readings, and --stuck nodes that
+repeat one reading for --stuck-hours.  Then reports readings/s for
+
+    check      FaultFilter.check() per reading, nodes interleaved as the
+               gateway sees them
+    history    FaultFilter.check_history() over all readings at once
+
+checks that both return the same flags, and prints how many of the injected
+spikes and of the stuck readings past the model's stuck limit were flagged,
+and how many untouched readings were flagged anyway (spikes out of the
+sensor's range count as found: they are flagged RANGE).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fleet  # noqa: E402
+from faultfilter import STUCK, FaultFilter  # noqa: E402
+
+
+def inject(readings, nodes, rng, spike_rate, stuck_nodes, stuck_ticks):
+    """Faulty copies of the temperature/humidity columns, with masks of the spikes and stuck readings."""
+    t = readings.temperature.astype(np.float64)
+    h = readings.humidity.astype(np.float64)
+    n = len(t)
+    spikes = (rng.random(n) < spike_rate) & ~np.isnan(t)
+    sign = rng.choice([-1.0, 1.0], n)
+    t[spikes] += sign[spikes] * rng.uniform(8, 30, n)[spikes]
+    h[spikes] -= sign[spikes] * rng.uniform(8, 30, n)[spikes]
+    stuck = np.zeros(n, dtype=bool)
+    grid = np.arange(n).reshape(-1, nodes)  # fleet ticks are node-major without storms
+    for node in rng.choice(nodes, min(stuck_nodes, nodes), replace=False):
+        first = rng.integers(0, max(1, len(grid) - stuck_ticks))
+        rows = grid[first:first + stuck_ticks, node]
+        rows = rows[~np.isnan(t[rows])]
+        t[rows] = t[rows[0]]
+        h[rows] = h[rows[0]]
+        stuck[rows[1:]] = True
+        spikes[rows] = False
+    return t, h, spikes, stuck
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=60.0)
+    parser.add_argument("--models", nargs="+", default=["DHT11", "DHT22"])
+    parser.add_argument("--spike-rate", type=float, default=0.002)
+    parser.add_argument("--stuck", type=int, default=20, help="stuck nodes")
+    parser.add_argument("--stuck-hours", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print("%-6s %-8s %12s %8s %8s %8s" % ("model", "path", "readings/s", "spikes", "stuck", "clean"))
+    for model in args.models:
+        f = fleet.Fleet(args.nodes, args.seed, model, args.interval, storm_fraction=0.0)
+        readings = f.ticks(0, args.ticks)
+        rng = np.random.default_rng(args.seed)
+        t, h, spikes, stuck = inject(readings, args.nodes, rng, args.spike_rate, args.stuck,
+                                     int(args.stuck_hours * 3600 / args.interval))
+        ts = readings.timestamp
+        nodes = readings.node
+
+        streaming = FaultFilter(model)
+        rows = list(zip(nodes.tolist(), ts.tolist(), t.tolist(), h.tolist()))
+        check = streaming.check
+        started = time.perf_counter()
+        flags = [check(*row) for row in rows]
+        per_sample = time.perf_counter() - started
+
+        batch = FaultFilter(model)
+        started = time.perf_counter()
+        history = batch.check_history(ts, t, h, nodes)
+        whole = time.perf_counter() - started
+        if not np.array_equal(np.array(flags, dtype=np.uint8), history):
+            raise AssertionError("check() and check_history() disagree")
+
+        # Only the part of a stuck run past the model's limit should be flagged.
+        since = np.zeros(len(t))
+        grid = np.arange(len(t)).reshape(-1, args.nodes)
+        for column in grid.T:
+            held = stuck[column]
+            starts = np.where(held, 0, ts[column])
+            since[column] = np.maximum.accumulate(starts)
+        overdue = stuck & (ts - since >= batch.stuck)
+        clean = ~spikes & ~stuck & ~np.isnan(t)
+        found = (
+            100.0 * np.count_nonzero(history[spikes]) / max(1, np.count_nonzero(spikes)),
+            100.0 * np.count_nonzero(history[overdue] & STUCK) / max(1, np.count_nonzero(overdue)),
+            100.0 * np.count_nonzero(history[clean]) / max(1, np.count_nonzero(clean)),
+        )
+        detection = "%7.1f%% %7.1f%% %7.3f%%" % found
+        print("%-6s %-8s %12.0f %s" % (model, "check", len(rows) / per_sample, detection))
+        print("%-6s %-8s %12.0f" % ("", "history", len(rows) / whole))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Wake duration, radio-on time and allocations: firmware.py vs the guide's Step 6 loop.
+
+Runs a day of 10-minute wakes (by default) on mpstubs.Board for the guide's
+connect/read/post/deepsleep loop and for firmware.py with several send_every
+values.  Everything runs on the board's virtual clock, so the times are
+modelled (Wi-Fi association --assoc seconds, --rtt ms per round trip), not
+measured on CPython.  "locked" is the bytes firmware.py allocated and held
+in its measure-and-store path, run under micropython.heap_lock(); the
+benchmark fails unless it is zero (see mpstubs for what the stubs can
+catch).  --model DHT22 checks the path against the sensor whose driver
+returns floats.  Per-wake peaks include the firmware's one-off buffer
+preallocation.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mpstubs  # noqa: E402
+
+INTERVAL_MS = 10 * 60 * 1000
+
+
+def guide_wake():
+    # Step 3 + Step 6 of the ESP-01 guide; the guide's time.sleep(10) before
+    # deep sleep is left out so the comparison only counts useful work.
+    import dht
+    import machine
+    import network
+    import urequests
+    import utime as time
+
+    wlan = network.WLAN(network.STA_IF)
+    wlan.active(True)
+    wlan.connect("your-ssid", "your-password")
+    while not wlan.isconnected():
+        time.sleep_ms(100)
+    sensor = dht.DHT11(machine.Pin(2))
+    sensor.measure()
+    data = {"temperature": sensor.temperature(), "humidity": sensor.humidity()}
+    response = urequests.post("http://192.168.4.1/readings", json=data)
+    response.close()
+    machine.deepsleep(INTERVAL_MS)
+
+
+def run(name, entry_factory, args):
+    board = mpstubs.Board(sensor_options={"seed": 1}, wlan_options={"latency": args.assoc},
+                          rtt_ms=args.rtt, model=args.model)
+    with board:
+        entry = entry_factory()
+        for _ in range(args.wakes):
+            board.wake(entry)
+    s = board.summary()
+    locked = s["max_alloc_locked"]
+    print("%-22s %8.0f %10.1f %8d %9d %11.0f %9d %7s" % (
+        name, s["mean_wake_ms"], s["radio_on_s"], s["posts"], s["bytes_sent"],
+        s["mean_alloc_peak"], s["max_alloc_peak"], "-" if locked is None else locked))
+    return s
+
+
+def firmware_entry(send_every, model):
+    def factory():
+        import firmware
+        config = {"send_every": send_every, "interval_ms": INTERVAL_MS, "heap_lock": True,
+                  "model": model}
+        return lambda: firmware.main(config)
+    return factory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wakes", type=int, default=144)
+    parser.add_argument("--assoc", type=float, default=1.5, help="Wi-Fi association seconds")
+    parser.add_argument("--rtt", type=float, default=30.0, help="network round trip in ms")
+    parser.add_argument("--send-every", type=int, nargs="+", default=[1, 6, 12, 48])
+    parser.add_argument("--model", choices=("DHT11", "DHT22"), default="DHT11")
+    args = parser.parse_args(argv)
+
+    print("%d wakes, one every %d min" % (args.wakes, INTERVAL_MS // 60000))
+    print("%-22s %8s %10s %8s %9s %11s %9s %7s" % (
+        "variant", "wake ms", "radio s", "posts", "bytes", "alloc mean", "alloc max", "locked"))
+    run("guide Step 6", lambda: guide_wake, args)
+    for n in args.send_every:
+        s = run("firmware send_every=%d" % n, firmware_entry(n, args.model), args)
+        assert s["max_alloc_locked"] == 0, "firmware.py allocated under heap_lock()"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Synthetic fleet: generation and encoding rates, and the ingestion components fed by it.
+
+Generates --readings readings from fleet.Fleet(--nodes) in blocks of
+--block ticks and reports readings/s for
+
+    generate      Fleet.ticks (diurnal curves, quantization, failures, storms)
+    lines         fleet.encode_lines   MCU serial text
+    jsonl         fleet.encode_jsonl   gateway JSONL capture rows
+    frames        fleet.encode_frames  wire.py frames of 64 records
+
+and then for the existing components consuming those encodings:
+
+    serial_parser StreamParser.feed over the serial text
+    wire          wire.decode_frame over the frames
+    tsstore       TimeSeriesStore.append_many of each block, sorted by time
+                  within the block (storm backlogs still go backwards)
+
+The same seed gives the same stream, so runs compare like for like.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fleet  # noqa: E402
+import wire  # noqa: E402
+from serial_parser import StreamParser  # noqa: E402
+from tsstore import TimeSeriesStore  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--readings", type=int, default=2_000_000)
+    parser.add_argument("--block", type=int, default=65536, help="readings per generated block")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print("%7s  %-13s %12s %10s" % ("nodes", "stage", "readings/s", "MB/s"))
+    for nodes in args.nodes:
+        f = fleet.Fleet(nodes, args.seed, storm_every=3600, storm_length=600)
+        step = max(1, args.block // nodes)
+        times = dict.fromkeys(("generate", "lines", "jsonl", "frames", "serial_parser", "wire", "tsstore"), 0.0)
+        sizes = dict.fromkeys(times, 0)
+        counts = dict.fromkeys(times, 0)
+        order = np.argsort(f.ids)
+        root = tempfile.mkdtemp(prefix="fleet-")
+        store = TimeSeriesStore(root)
+        stream = StreamParser()
+        k = 0
+        try:
+            while counts["generate"] < args.readings:
+                t0 = time.perf_counter()
+                block = f.ticks(k, step)
+                t1 = time.perf_counter()
+                lines = fleet.encode_lines(block)
+                t2 = time.perf_counter()
+                jsonl = fleet.encode_jsonl(block)
+                t3 = time.perf_counter()
+                frames = fleet.encode_frames(block)
+                t4 = time.perf_counter()
+                stream.feed(lines)
+                stream.take()
+                t5 = time.perf_counter()
+                decoded = sum(len(wire.decode_frame(frame)) for frame in frames)
+                t6 = time.perf_counter()
+                good = fleet.valid(block)
+                by_time = np.argsort(good.timestamp, kind="stable")
+                codes = order[np.searchsorted(f.ids[order], good.node[by_time])]
+                store.append_many(good.timestamp[by_time], codes, good.temperature[by_time],
+                                  good.humidity[by_time])
+                t7 = time.perf_counter()
+                k += step
+                n = len(block.node)
+                for stage, seconds, size, count in (
+                        ("generate", t1 - t0, 0, n), ("lines", t2 - t1, len(lines), n),
+                        ("jsonl", t3 - t2, len(jsonl), len(good.node)),
+                        ("frames", t4 - t3, sum(map(len, frames)), decoded),
+                        ("serial_parser", t5 - t4, len(lines), n),
+                        ("wire", t6 - t5, sum(map(len, frames)), decoded),
+                        ("tsstore", t7 - t6, 0, len(good.node))):
+                    times[stage] += seconds
+                    sizes[stage] += size
+                    counts[stage] += count
+            segments = len(store.segments)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        for i, stage in enumerate(times):
+            print("%7s  %-13s %12.0f %10s" % (nodes if i == 0 else "", stage, counts[stage] / times[stage],
+                                             "%.1f" % (sizes[stage] / times[stage] / 1e6) if sizes[stage] else "-"))
+        print("%7s  tsstore segments: %d (only backlogs older than tsstore.MERGE_ROWS start new ones)" % ("", segments))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Load test for gateway.py: hundreds of simulated nodes over ptys and UDP.
+
+Serial nodes are pty pairs: the gateway opens the slave side as it would a
+USB serial adapter and the benchmark writes MCU lines into the master side.
+UDP nodes each send from their own socket.  Reports achieved reading rate,
+per-node throughput spread and the sink queue depths.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gateway import Gateway  # noqa: E402
+
+LINES = (
+    b"Humidity: %.2f %%\tTemperature: %.2f *C \r\n",
+    b"Humidity: %.2f%%  Temperature: %.2f\xc2\xb0C \r\n",
+)
+
+
+def line(rng):
+    if rng.random() < 0.01:
+        return b"Failed to read from DHT sensor!\r\n"
+    return rng.choice(LINES) % (rng.uniform(30, 70), rng.uniform(15, 30))
+
+
+async def run(args):
+    rng = random.Random(1)
+    gateway = Gateway(queue_size=args.queue_size)
+    counted = [0]
+    gateway.add_sink("storage", lambda batch: counted.__setitem__(0, counted[0] + len(batch)))
+
+    async def slow_upload(batch):
+        await asyncio.sleep(args.upload_latency)
+
+    gateway.add_sink("upload", slow_upload, batch=args.upload_batch)
+
+    masters = []
+    for i in range(args.serial_nodes):
+        master, slave = os.openpty()
+        gateway.open_serial(os.ttyname(slave), node="serial-%d" % i)
+        os.close(slave)
+        os.set_blocking(master, False)
+        masters.append(master)
+    port = 40000 + os.getpid() % 20000
+    await gateway.open_udp("127.0.0.1", port)
+    senders = []
+    for _ in range(args.udp_nodes):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        senders.append(sock)
+
+    sent = 0
+    tick = 1.0 / args.ticks
+    per_tick = max(1, int(args.rate / args.ticks))
+    started = time.perf_counter()
+    deadline = started + args.duration
+    next_tick = started
+    while time.perf_counter() < deadline:
+        for master in masters:
+            data = b"".join(line(rng) for _ in range(per_tick))
+            try:
+                os.write(master, data)
+                sent += per_tick
+            except BlockingIOError:
+                pass
+        for i, sock in enumerate(senders):
+            for _ in range(per_tick):
+                sock.sendto(line(rng), ("127.0.0.1", port))
+                sent += 1
+            if i % 50 == 49:
+                # Let the gateway drain its socket between groups of nodes.
+                await asyncio.sleep(0)
+        next_tick += tick
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+    await asyncio.sleep(0.2)
+    await gateway.drain()
+    wall = time.perf_counter() - started
+    metrics = gateway.metrics()
+    await gateway.close()
+    for master in masters:
+        os.close(master)
+    for sock in senders:
+        sock.close()
+
+    nodes = metrics["nodes"]
+    readings = sum(n["readings"] for n in nodes.values())
+    failures = sum(n["failures"] for n in nodes.values())
+    malformed = sum(n["malformed"] for n in nodes.values())
+    per_node = [n["readings"] / wall for n in nodes.values()]
+    print("nodes seen        %d of %d" % (len(nodes), args.serial_nodes + args.udp_nodes))
+    received = sum(n["lines"] for n in nodes.values())
+    print("lines sent        %d, received %d" % (sent, received))
+    print("readings parsed   %d (%.0f/s), failures %d, malformed %d" % (
+        readings, readings / wall, failures, malformed))
+    print("stored            %d" % counted[0])
+    print("per-node rate     min %.1f / median %.1f / max %.1f readings/s" % (
+        min(per_node), statistics.median(per_node), max(per_node)))
+    for name, stats in metrics["sinks"].items():
+        print("sink %-12s %s" % (name, stats))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serial-nodes", type=int, default=100)
+    parser.add_argument("--udp-nodes", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=10.0, help="lines per second per node")
+    parser.add_argument("--ticks", type=int, default=10, help="send bursts per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--upload-batch", type=int, default=500)
+    parser.add_argument("--upload-latency", type=float, default=0.02)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
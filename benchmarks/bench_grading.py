@@ -0,0 +1,116 @@
+"""Batch quiz grading throughput: parse, grade and item statistics.
+
+Generates --sheets synthetic answer sheets for the chosen quiz (learner
+ability and item difficulty from a simple logistic model, wrong answers
+spread over the distractors, a few blanks), writes them as CSV and JSONL,
+and times grader.read_sheets(), grader.grade() and grader.item_statistics()
+separately.  For comparison, the guide's take_quiz() check (one string
+comparison per answer in Python) is timed on the in-memory sheets.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import content  # noqa: E402
+import grader  # noqa: E402
+
+
+def synthesize(key, sheets, seed):
+    rng = np.random.default_rng(seed)
+    m = len(key)
+    ability = rng.normal(0, 1, size=(sheets, 1))
+    difficulty = rng.normal(0, 1, size=m)
+    correct = rng.random((sheets, m)) < 1 / (1 + np.exp(difficulty - ability))
+    wrong = (key.codes + 1 + rng.integers(0, 255, size=(sheets, m)) % (key.n_options - 1)) % key.n_options
+    responses = np.where(correct, key.codes, wrong).astype(np.uint8)
+    responses[rng.random((sheets, m)) < 0.01] = grader.MISSING
+    return responses
+
+
+def letters(responses):
+    table = np.frombuffer(grader.LETTERS.encode(), dtype=np.uint8)
+    return np.where(responses == grader.MISSING, 32, table[np.minimum(responses, 25)]).astype(np.uint8)
+
+
+def write_files(root, responses):
+    chars = letters(responses)
+    n, m = chars.shape
+    csv_path = os.path.join(root, "sheets.csv")
+    jsonl_path = os.path.join(root, "sheets.jsonl")
+    with open(csv_path, "wb") as f:
+        f.write(b"id," + ",".join("Q%d" % (i + 1) for i in range(m)).encode() + b"\n")
+        cells = np.where(chars == 32, b"", chars.view("S1"))
+        for start in range(0, n, 100_000):
+            f.write(b"".join(b"learner-%d,%s\n" % (start + i, b",".join(row))
+                             for i, row in enumerate(cells[start:start + 100_000].tolist())))
+    with open(jsonl_path, "wb") as f:
+        rows = chars.view("S%d" % m).ravel()
+        for start in range(0, n, 100_000):
+            f.write(b"".join(b'{"id": "learner-%d", "answers": "%s"}\n' % (start + i, row)
+                             for i, row in enumerate(rows[start:start + 100_000].tolist())))
+    return csv_path, jsonl_path
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def guide_check(questions, sheets):
+    scores = []
+    for answers in sheets:
+        correct = 0
+        for question, answer in zip(questions, answers):
+            if answer.strip().upper() == question["answer"]:
+                correct += 1
+        scores.append(correct)
+    return scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=1_000_000)
+    parser.add_argument("--quiz", default="mcu_quiz", choices=("mcu_quiz", "esp01_quiz"))
+    parser.add_argument("--guide-sheets", type=int, default=100_000,
+                        help="sheets for the per-answer Python loop")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    key = grader.AnswerKey(content.load()[args.quiz])
+    responses = synthesize(key, args.sheets, args.seed)
+    root = tempfile.mkdtemp(prefix="grading-")
+    try:
+        paths = write_files(root, responses)
+        print("%d sheets x %d questions" % responses.shape)
+        print("%-22s %10s %14s" % ("stage", "seconds", "sheets/s"))
+        for path in paths:
+            (ids, parsed), seconds = timed(grader.read_sheets, path, key)
+            assert (parsed == responses).all() and len(ids) == args.sheets
+            print("%-22s %10.3f %14.0f  (%.1f MB)" % ("read " + os.path.basename(path), seconds,
+                                                      args.sheets / seconds, os.path.getsize(path) / 1e6))
+        (correct, scores), seconds = timed(grader.grade, key, responses)
+        print("%-22s %10.3f %14.0f" % ("grade", seconds, args.sheets / seconds))
+        stats, seconds = timed(grader.item_statistics, key, responses, correct)
+        print("%-22s %10.3f %14.0f" % ("item statistics", seconds, args.sheets / seconds))
+
+        sample = [[chr(c) for c in row] for row in letters(responses[:args.guide_sheets]).tolist()]
+        guide, seconds = timed(guide_check, key.questions, sample)
+        assert guide == scores[:args.guide_sheets].tolist()
+        print("%-22s %10.3f %14.0f  (%d sheets)" % ("guide per-answer loop", seconds,
+                                                     len(sample) / seconds, len(sample)))
+        print()
+        print(grader.format_report(stats))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Guide HTTP server: requests/s for rendered-per-request vs cached pages.
+
+Starts guide_http.GuideServer on a local port and hits every page with
+--clients keep-alive connections (http.client, one thread each) for
+--duration seconds per mode:
+
+    cold        GuideSite(cache=False): render + gzip on every request
+    cached      pre-rendered gzip bodies, full 200 responses
+    revalidate  pre-rendered, clients send If-None-Match and get 304s
+
+Server and clients share the process (and the GIL), so absolute numbers
+are a lower bound; the ratios are what matter.
+"""
+import argparse
+import http.client
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guide_http import GuideServer, GuideSite  # noqa: E402
+from telemetry import percentiles  # noqa: E402
+
+
+def client(address, paths, conditional, deadline, results):
+    connection = http.client.HTTPConnection(*address)
+    etags = {}
+    latencies = []
+    statuses = {}
+    received = 0
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        headers = {"Accept-Encoding": "gzip"}
+        if conditional and path in etags:
+            headers["If-None-Match"] = etags[path]
+        started = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        received += len(body)
+        etags[path] = response.getheader("ETag")
+    connection.close()
+    results.append((latencies, statuses, received))
+
+
+def run(name, site, args):
+    with GuideServer(port=0, site=site) as server:
+        address = server.server.server_address[:2]
+        paths = sorted(site.sources) + sorted(p + ".txt" for p in site.sources if p != "/")
+        deadline = time.perf_counter() + args.duration
+        results = []
+        threads = [threading.Thread(target=client, args=(address, paths, name == "revalidate",
+                                                        deadline, results))
+                   for _ in range(args.clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    latencies = [x for result in results for x in result[0]]
+    statuses = {}
+    for _, counts, _ in results:
+        for status, count in counts.items():
+            statuses[status] = statuses.get(status, 0) + count
+    received = sum(result[2] for result in results)
+    p = percentiles(latencies)
+    print("%-11s %9.0f %8.2f %8.2f %10.0f   %s" % (
+        name, len(latencies) / elapsed, p["p50"] * 1000, p["p99"] * 1000, received / len(latencies),
+        ", ".join("%d: %d" % item for item in sorted(statuses.items()))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    site = GuideSite()
+    print("pre-rendered %d pages in %.1f ms" % (len(site.pages), (time.perf_counter() - started) * 1000))
+    print("%-11s %9s %8s %8s %10s   %s" % ("mode", "req/s", "p50 ms", "p99 ms", "bytes/req", "statuses"))
+    run("cold", GuideSite(cache=False), args)
+    run("cached", site, args)
+    run("revalidate", site, args)
+
+
+if __name__ == "__main__":
+    main()
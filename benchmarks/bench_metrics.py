@@ -0,0 +1,57 @@
+"""Per-sample MetricsEngine update cost and bulk derived-metric throughput.
+
+The streaming case feeds simulated readings round-robin over --nodes nodes
+straight to MetricsEngine.update, with the (node, timestamp, temperature,
+humidity) arguments an AcquisitionPipeline listener gets, so the pipeline's
+own cost is left out; the bulk case recomputes dew point, absolute humidity,
+heat index and a rolling mean over --rows samples.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from metrics import MetricsEngine, derive, rolling_mean  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(1)
+    temperature = (22 + rng.normal(0, 2, args.samples)).tolist()
+    humidity = (50 + rng.normal(0, 5, args.samples)).tolist()
+    names = ["node-%d" % i for i in range(args.nodes)]
+    engine = MetricsEngine(size=args.window)
+    update = engine.update
+    nodes = args.nodes
+    t0 = time.perf_counter()
+    for i in range(args.samples):
+        update(names[i % nodes], i * 10.0, temperature[i], humidity[i])
+    per_sample = (time.perf_counter() - t0) / args.samples
+    t0 = time.perf_counter()
+    engine.snapshot(names[0])
+    snapshot = time.perf_counter() - t0
+    print("streaming   %.2f us/sample (%.0f samples/s), window %d, %d nodes; snapshot %.1f us" % (
+        per_sample * 1e6, 1 / per_sample, args.window, args.nodes, snapshot * 1e6))
+
+    t = (22 + rng.normal(0, 5, args.rows)).astype(np.float32)
+    h = np.clip(50 + rng.normal(0, 15, args.rows), 5, 100).astype(np.float32)
+    t0 = time.perf_counter()
+    derived = derive(t, h)
+    rolling_mean(t, args.window)
+    bulk = time.perf_counter() - t0
+    print("bulk        %.2f M rows/s (%d rows, %s + rolling mean in %.2f s)" % (
+        args.rows / bulk / 1e6, args.rows, "/".join(derived), bulk))
+
+
+if __name__ == "__main__":
+    main()
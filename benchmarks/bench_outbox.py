@@ -0,0 +1,103 @@
+"""Store-and-forward: enqueue rate during an outage and catch-up time after it.
+
+A producer thread appends JSON readings to an Outbox at --rate per second
+(0 = as fast as it can) while a Forwarder drains it to a LocalHTTPSink.
+The sink is up for --warmup seconds, down (503) for --outage seconds and
+then up again; the run ends once the backlog is drained.  Delivered bodies
+are checked for loss, order and duplicates with Deduplicator.  The outage
+is repeated for each --fsync-every value to show what batching fsync buys.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from localsink import LocalHTTPSink  # noqa: E402
+from outbox import Deduplicator, Forwarder, Outbox  # noqa: E402
+from uploader import GatewayUploader  # noqa: E402
+
+
+def producer(outbox, rate, stop, counts):
+    n = 0
+    started = time.perf_counter()
+    while not stop.is_set():
+        payload = json.dumps({"node": "esp%02d" % (n % 50), "timestamp": 1_700_000_000 + n,
+                              "temperature": 23.1, "humidity": 45.0}).encode()
+        outbox.append(payload)
+        n += 1
+        counts[0] = n
+        if rate:
+            delay = started + n / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def run(args, fsync_every):
+    root = tempfile.mkdtemp(prefix="outbox-")
+    try:
+        outbox = Outbox(root, fsync_every=fsync_every, fsync_interval=args.fsync_interval)
+        with LocalHTTPSink(keep=True) as sink, GatewayUploader() as uploader:
+            forwarder = Forwarder(outbox, uploader.post, sink.url, batch=args.batch,
+                                  rate=args.drain_rate or None, backoff=args.backoff,
+                                  backoff_cap=args.backoff_cap, seed=1).start()
+            stop = threading.Event()
+            counts = [0]
+            thread = threading.Thread(target=producer, args=(outbox, args.rate, stop, counts))
+            thread.start()
+            time.sleep(args.warmup)
+            sink.down = True
+            before = counts[0]
+            down_at = time.perf_counter()
+            time.sleep(args.outage)
+            enqueued = counts[0] - before
+            outage = time.perf_counter() - down_at
+            backlog = outbox.pending
+            sink.down = False
+            up_at = time.perf_counter()
+            # Catch-up: until the forwarder is back to a backlog of one batch.
+            while outbox.pending > args.batch:
+                time.sleep(0.005)
+            catch_up = time.perf_counter() - up_at
+            stop.set()
+            thread.join()
+            deadline = time.perf_counter() + 30
+            while outbox.pending and time.perf_counter() < deadline:
+                time.sleep(0.005)
+            forwarder.stop()
+            outbox.close()
+
+            dedup = Deduplicator()
+            seqs = [seq for _, _, body in sink.bodies for seq, _ in dedup.filter("gateway", body)]
+            in_order = seqs == list(range(1, len(seqs) + 1))
+            print("fsync_every=%-5d enqueue during outage %9.0f/s  backlog %7d  catch-up %6.2fs  "
+                  "fsyncs %6d  failed posts %4d  delivered %d/%d in order: %s  duplicates %d" % (
+                      fsync_every, enqueued / outage, backlog, catch_up, outbox.stats["fsyncs"],
+                      forwarder.stats["failures"], len(seqs), counts[0], in_order, dedup.duplicates))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=0, help="readings/s produced (0 = max)")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--outage", type=float, default=3.0)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--drain-rate", type=float, default=0, help="records/s drain limit")
+    parser.add_argument("--backoff", type=float, default=0.1)
+    parser.add_argument("--backoff-cap", type=float, default=1.0)
+    parser.add_argument("--fsync-every", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--fsync-interval", type=float, default=0.05)
+    args = parser.parse_args(argv)
+    for fsync_every in args.fsync_every:
+        run(args, fsync_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the legacy per-character slow_print with the frame renderer.
+
+Each step of TemperatureHumidityMonitoringSystem.detailed_steps_flow is captured
+and replayed into a counting TTY stand-in, reporting bytes, write calls and
+wall time per step.  Run with a small --delay to keep the legacy pass short.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import Fore  # noqa: E402
+
+from renderer import RESET, TypewriterRenderer  # noqa: E402
+from start import TemperatureHumidityMonitoringSystem  # noqa: E402
+
+
+class CountingTTY:
+    def __init__(self):
+        self.bytes = 0
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, data):
+        self.writes += 1
+        self.bytes += len(data.encode("utf-8"))
+
+    def flush(self):
+        self.flushes += 1
+
+    def isatty(self):
+        return True
+
+
+def capture_steps():
+    system = TemperatureHumidityMonitoringSystem()
+    steps = [[]]
+    for request in system.detailed_steps_flow():
+        if request[0] == "say":
+            steps[-1].append((request[1], getattr(Fore, request[2]) if request[2] else ""))
+        else:  # the pause after each step
+            steps.append([])
+    return [step for step in steps if step]
+
+
+def legacy_render(out, text, color, delay):
+    for char in text:
+        out.write(color + char)
+        out.flush()
+        time.sleep(delay)
+    out.write(RESET + "\n")
+    out.flush()
+
+
+def run(steps, delay, render):
+    rows = []
+    for step in steps:
+        out = CountingTTY()
+        started = time.perf_counter()
+        for text, color in step:
+            render(out, text, color, delay)
+        rows.append((step[0][0].strip(), out.bytes, out.writes, time.perf_counter() - started))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.001, help="per-character delay in seconds")
+    args = parser.parse_args(argv)
+
+    steps = capture_steps()
+    before = run(steps, args.delay, legacy_render)
+
+    def framed(out, text, color, delay):
+        TypewriterRenderer(stream=out, instant=False, skip_on_key=False).render(text, color, delay)
+
+    after = run(steps, args.delay, framed)
+    print("%-55s %10s %8s %9s | %10s %8s %9s" % ("step", "bytes", "writes", "wall s",
+                                                  "bytes", "writes", "wall s"))
+    for (name, b0, w0, t0), (_, b1, w1, t1) in zip(before, after):
+        print("%-55s %10d %8d %9.3f | %10d %8d %9.3f" % (name[:55], b0, w0, t0, b1, w1, t1))
+    chars = sum(len(text) for step in steps for text, _ in step)
+    print("\nideal paced time for %d chars: %.3f s" % (chars, chars * args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Report generator throughput by worker count, and its memory at two history sizes.
+
+Records fleet.Fleet(--nodes) captures of each --readings size as gateway
+JSONL and as wire frames, then runs `report.py` on each capture for every
+--workers count in a fresh process and reports readings/s, input MB/s,
+speedup over the first --workers count and the peak RSS of the largest process (map and
+reduce tasks run in the pool's worker processes).  Peak RSS should stay
+about the same as the capture grows; readings/s should grow with workers up
+to the number of cores.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fleet  # noqa: E402
+
+
+def record(path, nodes, readings, seed):
+    output = fleet.FileOutput(path)
+    fleet.run(fleet.Fleet(nodes, seed), [output], limit=readings)
+    output.close()
+
+
+def run_report(path, output, workers, exports, chunk_mb):
+    args = [sys.executable, os.path.join(ROOT, "report.py"), path, "--output", output,
+            "--workers", str(workers), "--chunk-mb", str(chunk_mb)]
+    if not exports:
+        args.append("--no-exports")
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    out = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError("report.py failed with status %d" % process.returncode)
+    return json.loads(out.splitlines()[-1]), usage.ru_maxrss / 1024.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200, help="200 nodes log about 288k readings a day")
+    parser.add_argument("--readings", type=int, nargs="+", default=[1_000_000, 4_000_000])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--formats", nargs="+", default=["jsonl", "bin"])
+    parser.add_argument("--chunk-mb", type=float, default=16.0)
+    parser.add_argument("--no-exports", action="store_true", help="summaries only")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="bench-report-")
+    try:
+        print("%-6s %10s %7s %9s %12s %8s %8s %9s" % (
+            "format", "readings", "workers", "seconds", "readings/s", "MB/s", "speedup", "peak MB"))
+        for size in args.readings:
+            for fmt in args.formats:
+                capture = os.path.join(root, "capture-%d.%s" % (size, fmt))
+                record(capture, args.nodes, size, args.seed)
+                megabytes = os.path.getsize(capture) / 1e6
+                single = None
+                for workers in args.workers:
+                    output = os.path.join(root, "out")
+                    stats, peak = run_report(capture, output, workers, not args.no_exports, args.chunk_mb)
+                    shutil.rmtree(output)
+                    seconds = stats["elapsed_s"]
+                    single = single or seconds
+                    print("%-6s %10d %7d %9.2f %12.0f %8.1f %7.2fx %9.1f" % (
+                        fmt, stats["readings"], workers, seconds, stats["readings"] / seconds,
+                        megabytes / seconds, single / seconds, peak))
+                os.remove(capture)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Guide search: query latency as the content grows to thousands of pages.
+
+Synthetic pages are built from 5-15 of the guide's own sentences and code
+lines plus 50-200 page-specific words drawn from a Zipf vocabulary, and
+indexed with guide_search.build_index.  For each --pages count the
+benchmark reports build time, index size, time to open (mmap) the index,
+and p50 / p99 query latency for single words, prefixes, AND queries and
+phrases, next to a linear scan that lower-cases every page and checks each
+query word with `in` (what searching without an index costs).
+"""
+import argparse
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import content  # noqa: E402
+import guide_search  # noqa: E402
+from telemetry import percentiles  # noqa: E402
+
+QUERIES = {
+    "word": ["sensor", "baud", "resistor", "ground", "voltage", "firmware"],
+    "prefix": ["resist*", "conn*", "temp*", "prog*", "volt*", "calib*"],
+    "and": ["baud rate", "deep sleep", "pull up resistor", "power supply", "data pin", "tx rx"],
+    "phrase": ['"common ground"', "pull-up", '"baud rate"', '"deep sleep"', '"power supply"',
+               '"data pin of the sensor"'],
+}
+
+
+def corpus(pages, seed, vocabulary=50000):
+    lines = []
+    for title, text, _ in guide_search.documents(content.load()):
+        lines.append(title)
+        lines.extend(line for line in text.splitlines() if line.strip())
+    rng = random.Random(seed)
+    # Zipf-distributed page-specific words, so the vocabulary grows with the
+    # content as it would for real pages instead of only repeating the guide.
+    cumulative = list(itertools.accumulate(1.0 / rank for rank in range(1, vocabulary + 1)))
+    for page in range(pages):
+        body = rng.sample(lines, min(len(lines), rng.randint(5, 15)))
+        words = rng.choices(range(vocabulary), cum_weights=cumulative, k=rng.randint(50, 200))
+        body.append(" ".join("term%d" % word for word in words))
+        yield "Page %d: %s" % (page, rng.choice(lines)), "\n".join(body), ("page", page)
+
+
+def time_queries(search, queries, repeat):
+    times = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            times.append(time.perf_counter() - started)
+    return percentiles(times)
+
+
+def scan(docs):
+    texts = [(title + "\n" + text).lower() for title, text, _ in docs]
+
+    def search(query):
+        words = [word.strip('"*').lower() for word in query.split()]
+        return [i for i, text in enumerate(texts) if all(word in text for word in words)]
+
+    return search
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="search-")
+    try:
+        print("%7s %8s %8s %8s  %-7s %9s %9s %9s" % ("pages", "build s", "MB", "open ms", "query",
+                                                      "p50 ms", "p99 ms", "scan p50"))
+        for pages in args.pages:
+            docs = list(corpus(pages, args.seed))
+            path = os.path.join(root, "%d.index" % pages)
+            started = time.perf_counter()
+            guide_search.build_index(docs, path)
+            build = time.perf_counter() - started
+            started = time.perf_counter()
+            index = guide_search.SearchIndex(path)
+            opened = time.perf_counter() - started
+            linear = scan(docs)
+            for n, (kind, queries) in enumerate(QUERIES.items()):
+                p = time_queries(index.search, queries, args.repeat)
+                s = time_queries(linear, queries, max(1, args.repeat // 10))
+                lead = ("%7d %8.2f %8.1f %8.2f" % (pages, build, os.path.getsize(path) / 1e6, opened * 1000)
+                        if n == 0 else " " * 35)
+                print("%s  %-7s %9.3f %9.3f %9.2f" % (lead, kind, p["p50"] * 1000, p["p99"] * 1000,
+                                                      s["p50"] * 1000))
+            index.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Lines per second: StreamParser vs. a naive str.split/regex line parser.
+
+The input is a synthetic MCU capture mixing both reading formats with failed
+reads and noise, fed in serial-sized chunks.  Before timing, a fuzzed capture
+of random numeric runs (including runs too long to be a reading) and lines
+longer than MAX_LINE is parsed in small chunks (the scan path, where long
+lines overflow the carry) and in one piece (the NumPy path), and both must
+give the same counts and values.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serial_parser import MAX_LINE, StreamParser  # noqa: E402
+
+FORMATS = (
+    b"Humidity: %.2f %%\tTemperature: %.2f *C \r\n",
+    b"Humidity: %.2f%%  Temperature: %.2f\xc2\xb0C \r\n",
+)
+NAIVE = re.compile(r"Humidity:\s*([-\d.]+)\s*%\s*Temperature:\s*([-\d.]+)")
+
+
+def capture(lines, seed=1):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        r = rng.random()
+        if r < 0.01:
+            out.append(b"Failed to read from DHT sensor!\r\n")
+        elif r < 0.015:
+            out.append(b"ets Jan  8 2013,rst cause:2, boot mode:(3,6)\r\n")
+        elif r < 0.016:
+            out.append(b"Humidity: 12345678901 Temperature: 1\r\n")
+        else:
+            out.append(rng.choice(FORMATS) % (rng.uniform(20, 80), rng.uniform(-5, 35)))
+    return b"".join(out)
+
+
+def fuzz(lines, seed=2):
+    rng = random.Random(seed)
+
+    def run():
+        return "".join(rng.choice("0123456789.-" if rng.random() < 0.1 else "0123456789.")
+                       for _ in range(rng.randint(1, 14))).encode()
+
+    def line():
+        if rng.random() < 0.01:
+            return b"Humidity: 1.00 %" + b" " * rng.randint(MAX_LINE - 40, MAX_LINE + 400) + b"2.00 *C\r\n"
+        return b"Humidity: %s %%\tTemperature: %s *C\r\n" % (run(), run())
+
+    return b"".join(line() for _ in range(lines))
+
+
+def check_paths(data):
+    parsers = []
+    for chunk in (256, len(data)):
+        parser = StreamParser()
+        for i in range(0, len(data), chunk):
+            parser.feed(data[i:i + chunk])
+        parsers.append(parser)
+    small, whole = parsers
+    assert small.stats() == whole.stats(), (small.stats(), whole.stats())
+    for a, b in ((small.temperatures, whole.temperatures), (small.humidities, whole.humidities)):
+        assert np.allclose(np.frombuffer(a, np.float32), np.frombuffer(b, np.float32), rtol=1e-6)
+
+
+def naive(data, chunk):
+    readings, carry = [], ""
+    for i in range(0, len(data), chunk):
+        text = carry + data[i:i + chunk].decode("utf-8", "replace")
+        lines = text.split("\n")
+        carry = lines.pop()
+        for line in lines:
+            match = NAIVE.search(line)
+            if match:
+                readings.append((float(match.group(2)), float(match.group(1))))
+    return len(readings)
+
+
+def streaming(data, chunk):
+    parser = StreamParser()
+    view = memoryview(data)
+    for i in range(0, len(data), chunk):
+        parser.feed(view[i:i + chunk])
+    return parser.readings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--chunks", default="256,4096,65536,1048576")
+    args = parser.parse_args(argv)
+
+    check_paths(fuzz(20_000))
+    data = capture(args.lines)
+    print("%d lines, %.1f MB" % (args.lines, len(data) / 1e6))
+    print("%-10s %10s %16s %16s %8s" % ("chunk", "readings", "naive lines/s", "stream lines/s", "speedup"))
+    for chunk in (int(c) for c in args.chunks.split(",")):
+        t0 = time.perf_counter()
+        n_naive = naive(data, chunk)
+        t1 = time.perf_counter()
+        n_stream = streaming(data, chunk)
+        t2 = time.perf_counter()
+        assert n_naive == n_stream, (n_naive, n_stream)
+        print("%-10d %10d %16.0f %16.0f %7.1fx" % (
+            chunk, n_stream, args.lines / (t1 - t0), args.lines / (t2 - t1), (t1 - t0) / (t2 - t1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Telemetry overhead: cost per span and share of the instrumented paths.
+
+Per call (ns): a plain function, the same under telemetry.timed() with
+telemetry off and on, a kept Span, span(), record() and count() off and on.
+
+Per path, with the waits a real session has put on a virtual clock, so a
+run takes its CPU time only:
+
+    quiz      start.py take_quiz, --think-ms before each answer, text typed
+              out at the flows' own delays (renderer at 60 fps into
+              /dev/null)
+    guide     start.py guide_user the same way
+    sensor    start2.py read_sensor + send_reading on the simulated backend
+              with --dht-ms / --post-ms of latency
+
+Each path runs --repeat times with telemetry off and on; the overhead is
+the best on-run's extra CPU time as a share of the paced session (best
+off-run + waits).  The benchmark fails when a path is above
+--max-overhead percent.  --think-ms 0 --instant --dht-ms 0 --post-ms 0
+gives the unpaced worst case, which that bound is not meant for.
+"""
+import argparse
+import builtins
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telemetry  # noqa: E402
+
+
+def per_call(number):
+    def plain():
+        return None
+
+    wrapped = telemetry.timed("bench.call")(plain)
+    kept = telemetry.Span("bench.kept")
+
+    def with_kept():
+        with kept:
+            pass
+
+    def with_span():
+        with telemetry.span("bench.span"):
+            pass
+
+    def recorded():
+        telemetry.record("bench.record", 1000)
+
+    def counted():
+        telemetry.count("bench.count")
+
+    rows = [("plain function", plain, None)]
+    for enabled in (False, True):
+        state = "on" if enabled else "off"
+        rows += [("timed(), " + state, wrapped, enabled), ("Span, " + state, with_kept, enabled),
+                 ("span(), " + state, with_span, enabled),
+                 ("record(), " + state, recorded, enabled), ("count(), " + state, counted, enabled)]
+    for name, fn, enabled in rows:
+        if enabled is not None:
+            (telemetry.enable if enabled else telemetry.disable)()
+        seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print("%-22s %8.0f ns" % (name, seconds * 1e9))
+    telemetry.disable()
+
+
+class Pacer:
+    """Virtual clock: sleep() adds to `waited` instead of sleeping."""
+
+    def __init__(self):
+        self.waited = 0.0
+
+    def clock(self):
+        return time.perf_counter() + self.waited
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.waited += seconds
+
+
+def best(fn, pacer, repeat):
+    """Best CPU time of repeat runs, and the virtual time one run waited."""
+    times = []
+    for _ in range(repeat):
+        pacer.waited = 0.0
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times), pacer.waited
+
+
+def guide_path(system, name, answers, pacer, args):
+    """system.<name>() with answers typed after --think-ms, rendered at real pace."""
+    import renderer
+    out = open(os.devnull, "w")
+    paced = renderer.TypewriterRenderer(stream=out, instant=args.instant, skip_on_key=False,
+                                        clock=pacer.clock, sleep=pacer.sleep)
+    think = args.think_ms / 1000.0
+
+    def go():
+        replies = iter(answers)
+
+        def typed(prompt=""):
+            pacer.sleep(think)
+            return next(replies, "")
+
+        saved = builtins.input, renderer.default_renderer
+        builtins.input = typed
+        renderer.default_renderer = paced
+        try:
+            getattr(system, name)()
+        finally:
+            builtins.input, renderer.default_renderer = saved
+    return go
+
+
+def sensor_path(args, pacer):
+    import start2
+    system = start2.TempHumidityMonitoringSystem()
+    system._backend = start2.hal.get_backend(
+        "simulated", sensor_options={"latency": args.dht_ms / 1000.0, "seed": 1, "sleep": pacer.sleep},
+        sink=start2.hal.HTTPSink(latency=args.post_ms / 1000.0, sleep=pacer.sleep))
+
+    def go():
+        for _ in range(args.readings):
+            system.send_reading(*system.read_sensor())
+    return go
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000, help="calls per per-call timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--readings", type=int, default=2000)
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="time to answer a prompt")
+    parser.add_argument("--instant", action="store_true",
+                        help="print text at once instead of at the flows' per-character delays")
+    parser.add_argument("--dht-ms", type=float, default=20.0, help="DHT11 read (18 ms start signal + data)")
+    parser.add_argument("--post-ms", type=float, default=20.0, help="POST round trip on the LAN")
+    parser.add_argument("--max-overhead", type=float, default=1.0, help="percent")
+    args = parser.parse_args(argv)
+
+    per_call(args.number)
+    print()
+
+    from start import TemperatureHumidityMonitoringSystem
+    import grader  # noqa: F401  imported up front so take_quiz times leave it out
+    system = TemperatureHumidityMonitoringSystem()
+    pacer = Pacer()
+    paths = {
+        "quiz": guide_path(system, "take_quiz", ["A", "B", "C", "D"] * 10, pacer, args),
+        "guide": guide_path(system, "guide_user", ["yes"] * 200, pacer, args),
+        "sensor": sensor_path(args, pacer),
+    }
+    print("%-8s %10s %10s %10s %8s %9s" % ("path", "off ms", "on ms", "paced s", "spans", "overhead"))
+    failed = []
+    for name, fn in paths.items():
+        telemetry.disable()
+        off, waited = best(fn, pacer, args.repeat)
+        telemetry.REGISTRY.reset()
+        telemetry.enable()
+        fn()
+        spans = sum(h.count for h in telemetry.REGISTRY.histograms.values())
+        on, _ = best(fn, pacer, args.repeat)
+        telemetry.disable()
+        overhead = 100 * (on - off) / (off + waited)
+        print("%-8s %10.3f %10.3f %10.1f %8d %8.3f%%" % (
+            name, off * 1e3, on * 1e3, off + waited, spans, overhead))
+        if overhead > args.max_overhead:
+            failed.append(name)
+    if failed:
+        sys.exit("telemetry overhead above %g%%: %s" % (args.max_overhead, ", ".join(failed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Ingest rate and query latency of tsstore at fleet scale.
+
+Writes --rows readings (10-second samples spread over --nodes nodes) in
+batches, then times range queries and downsampling over random windows on
+the memory-mapped store.  The default is the 100M-row case; use --rows for a
+quicker run.  Needs about 18 bytes of disk per row.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from tsstore import TimeSeriesStore  # noqa: E402
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e3, max(samples) * 1e3, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--dir", help="store directory (default: a temporary one)")
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args(argv)
+
+    root = args.dir or tempfile.mkdtemp(prefix="tsstore-")
+    rng = np.random.default_rng(1)
+    start = 1_700_000_000.0
+    # nodes report in turn, so the fleet produces nodes/10 rows per second
+    step = 10.0 / args.nodes
+    try:
+        store = TimeSeriesStore(root)
+        for name in range(args.nodes):
+            store.node_code("node-%d" % name)
+        t0 = time.perf_counter()
+        for first in range(0, args.rows, args.batch):
+            n = min(args.batch, args.rows - first)
+            rows = np.arange(first, first + n)
+            ts = start + rows * step
+            nodes = (rows % args.nodes).astype(np.uint16)
+            temperature = 22 + 5 * np.sin(ts / 86400 * 2 * np.pi) + rng.normal(0, 0.3, n)
+            humidity = 50 + 10 * np.cos(ts / 86400 * 2 * np.pi) + rng.normal(0, 1, n)
+            store.append_many(ts, nodes, temperature, humidity)
+        ingest = time.perf_counter() - t0
+        end = start + args.rows * step
+        print("ingest      %d rows in %.1f s: %.2f M rows/s (%d segments, %.2f GB)" % (
+            args.rows, ingest, args.rows / ingest / 1e6, len(store.segments),
+            sum(os.path.getsize(os.path.join(root, f)) for f in os.listdir(root)) / 1e9))
+
+        store = TimeSeriesStore(root)  # reopen: cold manifest, no open maps
+        span = end - start
+
+        def window(length):
+            lo = start + rng.uniform(0, max(0.0, span - length))
+            return lo, lo + length
+
+        cases = [
+            ("query 1 h", lambda: store.query(*window(3600))),
+            ("query 1 h, one node", lambda: store.query(*window(3600), node="node-7")),
+            ("downsample 1 d / 5 min", lambda: store.downsample(*window(86400), bucket=300)),
+            ("downsample 1 d / 5 min, node", lambda: store.downsample(*window(86400), bucket=300,
+                                                                       node="node-7")),
+            ("downsample all / 1 d", lambda: store.downsample(start, end, bucket=86400)),
+        ]
+        print("%-32s %10s %10s %12s" % ("query", "median ms", "max ms", "rows/buckets"))
+        for name, fn in cases:
+            repeat = 3 if "all" in name else args.repeat
+            median, worst, result = timed(fn, repeat)
+            size = len(result["ts"]) if "ts" in result else len(result["count"])
+            print("%-32s %10.2f %10.2f %12d" % (name, median, worst, size))
+    finally:
+        if not args.keep and not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Tutoring server connection scaling: concurrent quiz sessions on one loop.
+
+Starts tutor_server.TutorServer on a local port and, for each --sessions
+count, connects that many scripted learners at once.  Each one opens the
+quiz from the menu, answers every question as soon as the prompt appears
+and exits.  Reported per count:
+
+    wall       time for all sessions to finish
+    stretch    mean session time / the time of a session running alone
+               (1.00 = pacing is unaffected by the other sessions)
+    answer     client-side ms from sending an answer to the first byte of
+               the reply, p50 / p99
+    lag        server-side ms paced frames were written late, p99 / max
+    cpu        process CPU ms per session (server and clients share it)
+
+--delay-scale shortens the guide's per-character delay so a run takes
+seconds, not minutes; pacing work per session stays the same per frame.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import percentiles  # noqa: E402
+from tutor_server import TutorServer  # noqa: E402
+
+MENU = b"(1-5): "
+ANSWER = b"Your answer: "
+DONE = b"Goodbye!"
+
+
+async def learner(port, answers, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    started = time.perf_counter()
+    try:
+        await reader.readuntil(MENU)
+        writer.write(b"2\r\n")
+        for answer in answers:
+            await reader.readuntil(ANSWER)
+            sent = time.perf_counter()
+            writer.write(answer + b"\r\n")
+            await reader.read(1)
+            latencies.append(time.perf_counter() - sent)
+        await reader.readuntil(MENU)
+        writer.write(b"4\r\n")
+        await reader.readuntil(DONE)
+    finally:
+        writer.close()
+    return time.perf_counter() - started
+
+
+async def run(server, port, sessions, answers):
+    server.frame_lag.clear()
+    latencies = []
+    cpu = time.process_time()
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(learner(port, answers, latencies) for _ in range(sessions)))
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    return durations, latencies, wall, cpu
+
+
+async def bench(args):
+    server = TutorServer(args.track, delay_scale=args.delay_scale, frame_rate=args.frame_rate,
+                         max_sessions=max(args.sessions) + 1)
+    port = await server.start("127.0.0.1", 0)
+    answers = [question["answer"].encode() for question in server.content[
+        "mcu_quiz" if args.track == "mcu" else "esp01_quiz"]]
+    answers[::2] = [b"A"] * len(answers[::2])  # get some wrong too
+    try:
+        (alone,), _, _, _ = await run(server, port, 1, answers)
+        print("one session alone: %.2fs" % alone)
+        print("%8s %8s %8s %9s %9s %9s %9s %8s" % ("sessions", "wall s", "stretch", "answer50",
+                                                  "answer99", "lag99", "lag max", "cpu ms"))
+        for sessions in args.sessions:
+            durations, latencies, wall, cpu = await run(server, port, sessions, answers)
+            answer = percentiles(latencies)
+            lag = percentiles(server.frame_lag)
+            print("%8d %8.2f %8.2f %9.1f %9.1f %9.1f %9.1f %8.1f" % (
+                sessions, wall, sum(durations) / len(durations) / alone, answer["p50"] * 1000,
+                answer["p99"] * 1000, lag["p99"] * 1000, lag["max"] * 1000, cpu * 1000 / sessions))
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 300, 600])
+    parser.add_argument("--track", default="mcu", choices=("mcu", "esp01"))
+    parser.add_argument("--delay-scale", type=float, default=0.05)
+    parser.add_argument("--frame-rate", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
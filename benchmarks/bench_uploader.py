@@ -0,0 +1,66 @@
+"""Upload throughput: a connection per POST vs. the pooled GatewayUploader.
+
+All three modes send the same JSON readings to a local HTTP stand-in:
+    per-connection  requests.post + close, as the guide's example does
+    pooled          GatewayUploader.post from one thread (keep-alive reuse)
+    concurrent      GatewayUploader.post_many over the worker pool
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from localsink import LocalHTTPSink  # noqa: E402
+from telemetry import percentiles  # noqa: E402
+from uploader import GatewayUploader  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="server-side delay per request")
+    args = parser.parse_args(argv)
+
+    payloads = [json.dumps({"node": i % 50, "temperature": 23.0, "humidity": 45.0})
+                for i in range(args.requests)]
+    headers = {"Content-Type": "application/json"}
+    rows = []
+    with LocalHTTPSink(latency=args.latency) as sink:
+        timings = []
+        started = time.perf_counter()
+        for payload in payloads:
+            t0 = time.perf_counter()
+            response = requests.post(sink.url, data=payload, headers=headers)
+            response.close()
+            timings.append(time.perf_counter() - t0)
+        rows.append(("per-connection", sink.stats(), time.perf_counter() - started, percentiles(timings)))
+
+        for mode in ("pooled", "concurrent"):
+            sink.reset()
+            with GatewayUploader(pool_size=args.pool_size, workers=args.workers) as uploader:
+                started = time.perf_counter()
+                if mode == "pooled":
+                    for payload in payloads:
+                        uploader.post(sink.url, data=payload, headers=headers)
+                else:
+                    uploader.post_many(sink.url, payloads)
+                wall = time.perf_counter() - started
+                rows.append((mode, sink.stats(), wall, uploader.latency(sink.url)))
+
+    print("%-15s %9s %12s %10s %9s %9s %9s" % ("mode", "requests", "connections", "req/s",
+                                                "p50 ms", "p90 ms", "p99 ms"))
+    for mode, stats, wall, lat in rows:
+        print("%-15s %9d %12d %10.0f %9.2f %9.2f %9.2f" % (
+            mode, stats["requests"], stats["connections"], stats["requests"] / wall,
+            lat["p50"] * 1e3, lat["p90"] * 1e3, lat["p99"] * 1e3))
+
+
+if __name__ == "__main__":
+    main()
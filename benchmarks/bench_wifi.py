@@ -0,0 +1,124 @@
+"""Per-wake connect time: the guide's busy-wait loop vs wifi.WifiManager.
+
+Each wake starts from deep sleep (radio off) and connects to a
+hal.SimulatedWLAN on a virtual clock, with the association, scan and DHCP
+latencies and the failure rate given on the command line.  Every
+--ap-change wakes the AP is replaced by one with a new BSSID, so cached
+BSSIDs go stale; with --outage the AP disappears for that many wakes in the
+middle of the run.  The busy-wait loop is cut off after --hang seconds and
+counted as hung; on the board it would spin until the watchdog or the
+battery ran out.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hal import SimulatedWLAN  # noqa: E402
+from telemetry import percentiles  # noqa: E402
+from wifi import WifiCache, WifiManager  # noqa: E402
+
+SSID = "your-ssid"
+STATIC_IP = ("192.168.4.9", "255.255.255.0", "192.168.4.1", "8.8.8.8")
+
+
+class Clock:
+    def __init__(self):
+        self.ms = 0.0
+        self.started = 0.0
+        self.polls = 0
+
+    def seconds(self):
+        return self.ms / 1000.0
+
+    def ticks_ms(self):
+        return int(self.ms)
+
+    def sleep_ms(self, ms):
+        self.polls += 1
+        self.ms += ms
+
+    def sleep(self, seconds):
+        self.ms += seconds * 1000.0
+
+
+def access_points(wake, args):
+    if args.outage and args.wakes // 2 <= wake < args.wakes // 2 + args.outage:
+        return []
+    generation = wake // args.ap_change if args.ap_change else 0
+    return [(SSID, bytes([2, 0, 0, 0, generation >> 8 & 0xFF, generation & 0xFF]), 6, -60)]
+
+
+def busy_wait(wlan, clock, args):
+    wlan.active(True)
+    wlan.connect(SSID, "password")
+    while not wlan.isconnected():
+        clock.polls += 1
+        clock.ms += args.poll_cost
+        if clock.ms - clock.started > args.hang * 1000:
+            return False
+    return True
+
+
+class NoCache(WifiCache):
+    def store(self, bssid, channel):
+        pass
+
+
+def run(name, args, manager_options=None, cache=None):
+    clock = Clock()
+    wlan = SimulatedWLAN(latency=args.assoc, scan_latency=args.scan, dhcp_latency=args.dhcp,
+                         failure_rate=args.failure_rate, seed=args.seed, clock=clock.seconds,
+                         sleep=clock.sleep)
+    cache = cache or WifiCache()
+    manager = None
+    if manager_options is not None:
+        manager = WifiManager(wlan, SSID, "password", cache=cache, ticks_ms=clock.ticks_ms,
+                              ticks_diff=lambda a, b: a - b, sleep_ms=clock.sleep_ms,
+                              **manager_options)
+    times, results = [], {}
+    for wake in range(args.wakes):
+        wlan.aps = access_points(wake, args)
+        wlan.active(False)
+        clock.started = clock.ms
+        if manager is None:
+            ok = busy_wait(wlan, clock, args)
+            result = "connected" if ok else "hung"
+        else:
+            manager.connect()
+            result = manager.stats["result"]
+        results[result] = results.get(result, 0) + 1
+        times.append(clock.ms - clock.started)
+        clock.ms += 600_000  # deep sleep until the next wake
+    p = percentiles(times)
+    print("%-20s %8.0f %8.0f %8.0f %7d %10d   %s" % (
+        name, sum(times) / len(times), p["p50"], p["p99"], wlan.scans, clock.polls,
+        ", ".join("%s %d" % item for item in sorted(results.items()))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wakes", type=int, default=1000)
+    parser.add_argument("--assoc", type=float, default=0.4, help="association seconds")
+    parser.add_argument("--scan", type=float, default=2.0, help="full scan seconds")
+    parser.add_argument("--dhcp", type=float, default=0.8, help="DHCP seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--ap-change", type=int, default=200, help="wakes between BSSID changes")
+    parser.add_argument("--outage", type=int, default=20, help="wakes without any AP")
+    parser.add_argument("--hang", type=float, default=60.0, help="busy-wait cut-off in seconds")
+    parser.add_argument("--poll-cost", type=float, default=0.05, help="ms per busy-wait iteration")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print("%d wakes; connect time in ms" % args.wakes)
+    print("%-20s %8s %8s %8s %7s %10s   %s" % ("variant", "mean", "p50", "p99", "scans",
+                                               "polls", "results"))
+    run("guide busy-wait", args)
+    run("manager, no cache", args, {}, NoCache())
+    run("manager", args, {})
+    run("manager + static IP", args, {"static_ip": STATIC_IP})
+
+
+if __name__ == "__main__":
+    main()
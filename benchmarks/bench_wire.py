@@ -0,0 +1,79 @@
+"""Payload size and encode/decode throughput: binary wire format vs the JSON dict.
+
+Compares the guide's json={'temperature', 'humidity'} body (one per reading,
+and the same dicts with node/seq/timestamp added so both carry the same
+information), a single binary record and binary frames of --batch records.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wire  # noqa: E402
+
+
+def make_records(n, seed=1):
+    rng = random.Random(seed)
+    t0 = 1_700_000_000
+    return [(0x00C0FFEE, k, t0 + 10 * k, round(rng.uniform(15, 30), 1), round(rng.uniform(30, 70), 1))
+            for k in range(n)]
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    records = make_records(args.records)
+    n = len(records)
+    batches = [records[i:i + args.batch] for i in range(0, n, args.batch)]
+    keys = ("node", "seq", "timestamp", "temperature", "humidity")
+
+    guide = [json.dumps({"temperature": t, "humidity": h}).encode() for _, _, _, t, h in records]
+    full = [json.dumps(dict(zip(keys, r))).encode() for r in records]
+    single = [wire.encode_record(*r) for r in records]
+    frames = [wire.encode_payload(b, wire.FRAME_TYPE) for b in batches]
+    json_batches = [wire.encode_payload(b, wire.JSON_TYPE) for b in batches]
+
+    print("%d records, frames of %d" % (n, args.batch))
+    print("%-28s %10s %14s %14s" % ("format", "bytes/rec", "encode rec/s", "decode rec/s"))
+    rows = [
+        ("guide JSON dict (t, h)", guide,
+         lambda: [json.dumps({"temperature": r[3], "humidity": r[4]}) for r in records],
+         lambda: [json.loads(p) for p in guide]),
+        ("JSON dict (all fields)", full,
+         lambda: [json.dumps(dict(zip(keys, r))) for r in records],
+         lambda: [json.loads(p) for p in full]),
+        ("JSON list batch", json_batches,
+         lambda: [wire.encode_payload(b, wire.JSON_TYPE) for b in batches],
+         lambda: [wire.decode_payload(p, wire.JSON_TYPE) for p in json_batches]),
+        ("binary record", single,
+         lambda: [wire.encode_record(*r) for r in records],
+         lambda: [wire.decode_record(p) for p in single]),
+        ("binary frame", frames,
+         lambda: [wire.encode_payload(b, wire.FRAME_TYPE) for b in batches],
+         lambda: [wire.decode_frame(p) for p in frames]),
+    ]
+    for name, payloads, encode, decode in rows:
+        size = sum(len(p) for p in payloads) / n
+        print("%-28s %10.1f %14.0f %14.0f" % (name, size, timed(encode, n), timed(decode, n)))
+
+    restored = [r for p in frames for r in wire.decode_frame(p)]
+    assert [r[:3] for r in restored] == [r[:3] for r in records]
+    assert all(abs(a[3] - b[3]) < 0.006 and abs(a[4] - b[4]) < 0.006 for a, b in zip(restored, records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Benchmark runner: a fixed set of cases, JSON history and regression flags.
+
+The bench_*.py scripts each explore one component with their own knobs and
+tables.  This runner times a small fixed set of cases the same way every
+time, so results can be compared across commits:
+
+    startup   fresh interpreters: bare `python -c pass`, `import start`, and
+              start.py from launch to the menu and out again
+    render    every guide section through the paced renderer into a
+              captured TTY stand-in on a virtual clock (characters/s of
+              renderer work, no real sleeping)
+    quiz      grader.read_csv, grade and item_statistics on synthetic sheets
+    sensor    start2.py with a simulated DHT posting over HTTP to
+              localsink.LocalHTTPSink: the guide's read-and-POST loop and
+              AcquisitionPipeline batches (readings/s)
+
+Every metric is the median of --repeat runs.  A run is appended to
+--history (a JSON file) with the commit, Python version and host.  It is
+compared with the median of the last --window runs from the same host and
+Python.  A metric that is worse by more than --threshold percent is flagged,
+and the exit status is then 1.
+
+    python benchmarks/run.py                   all cases
+    python benchmarks/run.py quiz render       some of them
+    python benchmarks/run.py --threshold 5 --no-save
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+Metric = namedtuple("Metric", "value unit better")  # better: "lower" or "higher"
+HISTORY = os.path.join(ROOT, "benchmarks", "history.json")
+
+
+def _run_python(args, stdin=None):
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, input=stdin, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def case_startup(args):
+    return {
+        "startup.interpreter": Metric(_run_python(["-c", "pass"]), "ms", "lower"),
+        "startup.import_start": Metric(_run_python(["-c", "import start"]), "ms", "lower"),
+        "startup.menu_exit": Metric(_run_python(["start.py"], stdin=b"4\n"), "ms", "lower"),
+    }
+
+
+class _CapturedTTY:
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, data):
+        self.chars += len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return True
+
+
+class _VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, 0.0)
+
+
+def _sections(data):
+    yield "overview", [(item, "") for key in ("steps", "protocols", "principles") for item in data["overview"][key]]
+    for name in ("mcu_guide", "esp01_guide"):
+        guide = data[name]
+        for number, step in enumerate(guide["steps"], 1):
+            texts = [(step["title"], "")]
+            for block in step["blocks"]:
+                if block[0] == "items":
+                    texts += [(item, "") for item in block[1]]
+                elif block[0] in ("text", "code"):
+                    texts.append((block[1], ""))
+            yield "%s.%d" % (name, number), texts
+
+
+def case_render(args):
+    import content
+    from renderer import TypewriterRenderer
+    out = {}
+    total_chars = total_seconds = 0
+    for name, texts in _sections(content.load()):
+        tty = _CapturedTTY()
+        clock = _VirtualClock()
+        renderer = TypewriterRenderer(tty, skip_on_key=False, clock=clock.clock, sleep=clock.sleep)
+        started = time.perf_counter()
+        for text, color in texts:
+            renderer.render(text, color, 0.05)
+        seconds = time.perf_counter() - started
+        chars = sum(len(text) for text, _ in texts)
+        total_chars += chars
+        total_seconds += seconds
+        out["render.%s" % name] = Metric(chars / seconds, "chars/s", "higher")
+    out["render.all"] = Metric(total_chars / total_seconds, "chars/s", "higher")
+    return out
+
+
+def case_quiz(args):
+    import content
+    import grader
+    from bench_grading import synthesize, write_files
+    key = grader.AnswerKey(content.load()["mcu_quiz"])
+    responses = synthesize(key, args.sheets, seed=1)
+    root = tempfile.mkdtemp(prefix="run-quiz-")
+    try:
+        csv_path, _ = write_files(root, responses)
+        started = time.perf_counter()
+        _, parsed = grader.read_csv(csv_path, key)
+        read = time.perf_counter() - started
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    started = time.perf_counter()
+    correct, _ = grader.grade(key, parsed)
+    graded = time.perf_counter() - started
+    started = time.perf_counter()
+    grader.item_statistics(key, parsed, correct)
+    stats = time.perf_counter() - started
+    n = len(parsed)
+    return {
+        "quiz.read_csv": Metric(n / read, "sheets/s", "higher"),
+        "quiz.grade": Metric(n / graded, "sheets/s", "higher"),
+        "quiz.item_statistics": Metric(n / stats, "sheets/s", "higher"),
+    }
+
+
+def case_sensor(args):
+    import hal
+    import start2
+    from localsink import LocalHTTPSink
+    from uploader import GatewayUploader
+    with LocalHTTPSink() as sink, GatewayUploader(pool_size=1, workers=1) as uploader:
+        system = start2.TempHumidityMonitoringSystem()
+        system.api_endpoint = sink.url
+        system._backend = hal.SimulatedBackend(sensor_options={"seed": 1})
+        system._backend.post = uploader.post
+        started = time.perf_counter()
+        for _ in range(args.readings):
+            system.send_reading(*system.read_sensor())
+        loop = time.perf_counter() - started
+
+        pipeline = system.acquisition_pipeline(max_count=30, max_age=1e9)
+        started = time.perf_counter()
+        for _ in range(args.readings * 10):
+            pipeline.sample()
+        pipeline.flush()
+        batched = time.perf_counter() - started
+        if pipeline.stats["failed_flushes"]:
+            raise RuntimeError("pipeline flushes failed: %r" % pipeline.stats)
+    return {
+        "sensor.guide_loop": Metric(args.readings / loop, "readings/s", "higher"),
+        "sensor.pipeline": Metric(args.readings * 10 / batched, "readings/s", "higher"),
+    }
+
+
+CASES = {"startup": case_startup, "render": case_render, "quiz": case_quiz, "sensor": case_sensor}
+
+
+def host_key():
+    return "%s / %s %s / %d cpu" % (platform.node(), platform.python_implementation(),
+                                   platform.python_version(), os.cpu_count() or 1)
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {"runs": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def baseline(history, host, window):
+    runs = [run for run in history["runs"] if run["host"] == host][-window:]
+    values = {}
+    for run in runs:
+        for name, result in run["results"].items():
+            values.setdefault(name, []).append(result["value"])
+    return {name: statistics.median(samples) for name, samples in values.items()}, len(runs)
+
+
+def compare(results, base, threshold):
+    """(name, metric, baseline, change %, flag) rows; flag is "REGRESSION", "improved", "new" or ""."""
+    rows = []
+    for name, metric in results.items():
+        reference = base.get(name)
+        if not reference:
+            rows.append((name, metric, None, None, "new"))
+            continue
+        change = 100.0 * (metric.value - reference) / reference
+        worse = change if metric.better == "lower" else -change
+        flag = "REGRESSION" if worse > threshold else "improved" if worse < -threshold else ""
+        rows.append((name, metric, reference, change, flag))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="some of: %s (default: all)" % ", ".join(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent worse than baseline")
+    parser.add_argument("--window", type=int, default=5, help="past runs in the baseline")
+    parser.add_argument("--history", default=HISTORY)
+    parser.add_argument("--no-save", action="store_true", help="compare only, don't record this run")
+    parser.add_argument("--sheets", type=int, default=200_000, help="quiz case size")
+    parser.add_argument("--readings", type=int, default=300, help="sensor case size (guide loop)")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error("unknown case(s): %s" % ", ".join(unknown))
+
+    samples = {}
+    for name in args.cases or list(CASES):
+        for _ in range(args.repeat):
+            for metric_name, metric in CASES[name](args).items():
+                samples.setdefault(metric_name, []).append(metric)
+    results = {name: Metric(statistics.median(m.value for m in metrics), metrics[0].unit, metrics[0].better)
+               for name, metrics in samples.items()}
+
+    history = load_history(args.history)
+    host = host_key()
+    base, runs = baseline(history, host, args.window)
+    rows = compare(results, base, args.threshold)
+    print("%s, commit %s; baseline: median of %d earlier run(s)" % (host, commit() or "?", runs))
+    print("%-26s %14s %-10s %14s %8s  %s" % ("metric", "value", "unit", "baseline", "change", ""))
+    for name, metric, reference, change, flag in rows:
+        print("%-26s %14.4g %-10s %14s %8s  %s" % (
+            name, metric.value, metric.unit, "-" if reference is None else "%.4g" % reference,
+            "-" if change is None else "%+.1f%%" % change, flag))
+
+    if not args.no_save:
+        history["runs"].append({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit(), "host": host,
+            "repeat": args.repeat,
+            "results": {name: metric._asdict() for name, metric in results.items()},
+        })
+        save_history(args.history, history)
+    regressions = [row[0] for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print("%d regression(s) beyond %g%%: %s" % (len(regressions), args.threshold, ", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
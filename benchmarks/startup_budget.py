@@ -0,0 +1,83 @@
+"""Fail if start.py's cold import goes over its time budget or imports too much.
+
+Runs `python -X importtime -c "import start"` --runs times in fresh
+interpreters with stdout piped, the way scripted sessions and kiosk launchers
+start it, and reads the cumulative import time of `start` from the
+`import time:` lines on stderr (interpreter and site startup are not
+counted).  The check fails, with exit status 1, when
+
+    the median is over --budget-ms
+    any module imported under `start` is one that should only load on
+    demand (--deferred): colorama without a terminal, json without a trace,
+    NumPy before a quiz, http.server before a metrics server, ...
+
+The slowest modules under `start` are printed either way, so a failure
+shows where the time went.
+
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --budget-ms 15 --runs 11
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED = ["colorama", "json", "argparse", "socket", "http.server", "numpy", "requests",
+            "grader", "guide_search", "content_source"]
+
+
+def import_times(module="start"):
+    """{name: (self_us, cumulative_us)} of `module` and everything it imported."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    # Children are reported before their parent, so the subtree of a
+    # top-level import is every line since the previous top-level one.
+    subtree = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        subtree[name.strip()] = (int(self_us), int(cumulative_us))
+        if name.startswith(" ") and not name.startswith("  "):
+            if name.strip() == module:
+                return subtree
+            subtree = {}
+    raise RuntimeError("no import time reported for %s" % module)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=25.0,
+                        help="median cumulative import time of start")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--deferred", nargs="*", default=DEFERRED,
+                        help="modules that must not be imported by `import start`")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    runs = [import_times() for _ in range(args.runs)]
+    median_ms = statistics.median(run["start"][1] for run in runs) / 1000.0
+    slowest = sorted(runs[-1].items(), key=lambda item: -item[1][0])[:args.top]
+    print("%-28s %10s %10s" % ("module (last run)", "self ms", "cumul ms"))
+    for name, (self_us, cumulative_us) in slowest:
+        print("%-28s %10.2f %10.2f" % (name, self_us / 1000.0, cumulative_us / 1000.0))
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append("import start took %.1f ms (median of %d), budget %.1f ms"
+                        % (median_ms, args.runs, args.budget_ms))
+    imported = sorted(name for name in args.deferred if any(name in run for run in runs))
+    if imported:
+        failures.append("imported at startup: %s" % ", ".join(imported))
+    print("import start: %.1f ms median of %d runs, budget %.1f ms" % (median_ms, args.runs, args.budget_ms))
+    for failure in failures:
+        print("FAIL " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
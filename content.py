@@ -0,0 +1,147 @@
+"""Compiled content pack for the guide, practice and quiz flows.
+
+content_source.py is compiled once into content.pack: a small header, a
+marshalled index of section name -> (offset, length) and one marshalled blob
+per section.  The pack is memory-mapped and each section is unmarshalled the
+first time it is asked for, so starting the program never builds the text of
+sections it does not show.  The pack is rebuilt automatically when
+content_source.py is newer, the same way Python refreshes a stale .pyc.
+"""
+import marshal
+import mmap
+import os
+import struct
+
+MAGIC = b"THMP"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(HERE, "content_source.py")
+PACK_PATH = os.path.join(HERE, "content.pack")
+
+
+def compile_pack(path=PACK_PATH, sections=None):
+    if sections is None:
+        from content_source import SECTIONS
+        sections = SECTIONS
+    blobs = []
+    index = {}
+    offset = 0
+    for name, value in sections.items():
+        blob = marshal.dumps(value)
+        index[name] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+    index_blob = marshal.dumps(index)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index_blob)))
+        f.write(index_blob)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+def is_stale(path=PACK_PATH, source_path=SOURCE_PATH):
+    try:
+        pack_mtime = os.stat(path).st_mtime
+    except OSError:
+        return True
+    try:
+        return os.stat(source_path).st_mtime > pack_mtime
+    except OSError:
+        # Installed without the source module: trust the shipped pack.
+        return False
+
+
+class ContentPack:
+    def __init__(self, path=PACK_PATH):
+        self.path = path
+        self._cache = {}
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError("%s is not a version %d content pack" % (path, VERSION))
+        start = HEADER.size
+        self._index = marshal.loads(self._map[start:start + index_len])
+        self._base = start + index_len
+
+    def sections(self):
+        return list(self._index)
+
+    def section(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        offset, length = self._index[name]
+        start = self._base + offset
+        value = marshal.loads(self._map[start:start + length])
+        self._cache[name] = value
+        return value
+
+    __getitem__ = section
+
+    def close(self):
+        self._map.close()
+
+
+class _MemoryPack(ContentPack):
+    # Used when the pack cannot be written next to the sources (read-only
+    # install); same interface, backed by the source literals.
+    def __init__(self, sections):
+        self.path = None
+        self._cache = dict(sections)
+        self._index = dict.fromkeys(sections)
+
+    def close(self):
+        pass
+
+
+_pack = None
+
+
+def load(path=PACK_PATH):
+    global _pack
+    if _pack is not None and path == PACK_PATH:
+        return _pack
+    if is_stale(path):
+        try:
+            compile_pack(path)
+        except OSError:
+            from content_source import SECTIONS
+            pack = _MemoryPack(SECTIONS)
+            if path == PACK_PATH:
+                _pack = pack
+            return pack
+    pack = ContentPack(path)
+    if path == PACK_PATH:
+        _pack = pack
+    return pack
+
+
+def practice_text(step, fence=""):
+    """Join a guide step's blocks into the single block used by the practice flow.
+
+    Instructions come first and code examples last, each after a "Code Example:"
+    label, whatever order the walk-through shows them in.
+    """
+    lines = []
+    code = []
+    for block in step["blocks"]:
+        kind = block[0]
+        if kind == "text":
+            lines.append(block[1])
+        elif kind == "items":
+            lines.extend(block[1])
+        elif kind == "code":
+            code.append("Code Example:")
+            if fence:
+                code.append("```" + fence + "\n" + block[1] + "\n```")
+            else:
+                code.append(block[1])
+    return "\n".join(lines + code)
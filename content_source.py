@@ -0,0 +1,364 @@
+"""Source text for the guide, practice and quiz flows of start.py and start2.py.
+
+This is the only place the course text is written down.  content.py compiles
+it into content.pack and the scripts read their sections from there, so this
+module is only imported when the pack is missing or out of date.
+
+A guide step is a title plus an ordered list of blocks:
+    ("text", line, color)   a single line in the given colorama Fore color
+    ("items", [lines])      instructions/components printed in white
+    ("code", source)        a code example; the practice flow always puts a
+                            "Code Example:" label before it, the walk-through
+                            only when the guide's code_label is set
+"""
+
+OVERVIEW = {
+    "steps": [
+        "Step 1: Gather Components",
+        "Step 2: Set Up ESP-01 Module",
+        "Step 3: Interface with 8-bit MCU",
+        "Step 4: Connect Temperature and Humidity Sensor",
+        "Step 5: Program the MCU",
+        "Step 6: Establish Communication Between ESP-01 and MCU",
+        "Step 7: Test the System"
+    ],
+    "protocols": [
+        "Protocol 1: Ensure proper power supply connections.",
+        "Protocol 2: Use appropriate pull-up resistors where necessary.",
+        "Protocol 3: Avoid electrostatic discharge when handling components.",
+        "Protocol 4: Follow the pin configurations and datasheets strictly."
+    ],
+    "principles": [
+        "Principle 1: Understand the functionality of each component.",
+        "Principle 2: Maintain a clean and organized workspace.",
+        "Principle 3: Double-check connections before powering the circuit.",
+        "Principle 4: Test individual components before integrating them."
+    ],
+}
+
+MCU_GUIDE = {
+    "title": "Temperature and Humidity Monitoring System using ESP-01 and an 8-bit MCU",
+    "fence": "",
+    "code_color": "CYAN",
+    "code_label": False,
+    "steps": [
+        {
+            "title": "Step 1: Gather Components",
+            "blocks": [
+                ("text", "You will need the following components:", "WHITE"),
+                ("items", [
+                    "- ESP-01 module (ESP8266)",
+                    "- 8-bit MCU (e.g., AVR like ATmega328P, PIC like PIC16F877A, ARM like STM32F103, RISC-V like GD32VF103)",
+                    "- Temperature and Humidity Sensor (e.g., DHT11, DHT22)",
+                    "- Breadboard and Jumper wires",
+                    "- Power supply (3.3V for ESP-01 and appropriate supply for MCU)",
+                    "- USB-to-Serial adapter for programming ESP-01",
+                    "- Resistors (10kΩ for pull-up, others as needed)",
+                    "- Capacitors (decoupling capacitors, if necessary)"
+                ]),
+            ],
+        },
+        {
+            "title": "Step 2: Set Up ESP-01 Module",
+            "blocks": [
+                ("items", [
+                    "1. Connect the ESP-01 module to the USB-to-Serial adapter.",
+                    "   - GPIO0 to GND (for programming mode)",
+                    "   - TX of ESP-01 to RX of adapter",
+                    "   - RX of ESP-01 to TX of adapter",
+                    "   - VCC to 3.3V",
+                    "   - GND to GND",
+                    "2. Open your Arduino IDE or any other suitable software for programming.",
+                    "3. Load the appropriate firmware or program for your ESP-01 module.",
+                    "   - Example: ESP8266 basic example sketches for testing connectivity",
+                    "4. Verify and upload the code to the ESP-01 module.",
+                    "5. Disconnect GPIO0 from GND after programming to run the code."
+                ]),
+            ],
+        },
+        {
+            "title": "Step 3: Interface with 8-bit MCU",
+            "blocks": [
+                ("items", [
+                    "1. Connect the TX pin of the ESP-01 to the RX pin of the MCU.",
+                    "2. Connect the RX pin of the ESP-01 to the TX pin of the MCU.",
+                    "3. Ensure common ground between ESP-01 and MCU.",
+                    "4. Connect VCC and GND of ESP-01 to 3.3V and GND of power supply.",
+                    "5. Add level shifters if your MCU operates at 5V logic."
+                ]),
+            ],
+        },
+        {
+            "title": "Step 4: Connect Temperature and Humidity Sensor",
+            "blocks": [
+                ("items", [
+                    "1. Connect the VCC and GND of the sensor to the power supply.",
+                    "2. Connect the data pin of the sensor to one of the MCU's GPIO pins.",
+                    "3. Add a pull-up resistor (10kΩ) between the data pin and VCC if required by the sensor.",
+                    "4. Verify the sensor's datasheet for proper connections and requirements."
+                ]),
+            ],
+        },
+        {
+            "title": "Step 5: Program the MCU",
+            "blocks": [
+                ("items", [
+                    "1. Open your preferred IDE for the MCU (e.g., MPLAB for PIC, Atmel Studio for AVR).",
+                    "2. Write or load a program to read data from the sensor and send it to the ESP-01 module.",
+                    "   - Example: Read temperature and humidity, send via UART to ESP-01",
+                    "3. Compile and upload the program to the MCU.",
+                    "4. Debug and test the program with a serial monitor to ensure proper data acquisition."
+                ]),
+                ("code", """// Example code for AVR (ATmega328P) using Arduino IDE
+#include <DHT.h>
+#define DHTPIN 2
+#define DHTTYPE DHT11
+DHT dht(DHTPIN, DHTTYPE);
+
+void setup() {
+    Serial.begin(9600);
+    dht.begin();
+}
+
+void loop() {
+    float h = dht.readHumidity();
+    float t = dht.readTemperature();
+    if (isnan(h) || isnan(t)) {
+        Serial.println("Failed to read from DHT sensor!");
+        return;
+    }
+    Serial.print("Humidity: ");
+    Serial.print(h);
+    Serial.print(" %\\t");
+    Serial.print("Temperature: ");
+    Serial.print(t);
+    Serial.println(" *C ");
+    delay(2000);
+}"""),
+            ],
+        },
+        {
+            "title": "Step 6: Establish Communication Between ESP-01 and MCU",
+            "blocks": [
+                ("code", """// Example code for ESP-01 (ESP8266) using Arduino IDE
+void setup() {
+    Serial.begin(9600);
+}
+
+void loop() {
+    if (Serial.available()) {
+        String data = Serial.readString();
+        Serial.print("Received: ");
+        Serial.println(data);
+    }
+}"""),
+                ("items", [
+                    "1. Ensure that both the ESP-01 and MCU are correctly programmed.",
+                    "2. Verify the baud rate settings for serial communication.",
+                    "3. Test sending data from MCU to ESP-01 and vice versa.",
+                    "   - Example: Use AT commands to test ESP-01 responses",
+                    "4. Implement error-checking mechanisms to ensure reliable data transmission."
+                ]),
+            ],
+        },
+        {
+            "title": "Step 7: Test the System",
+            "blocks": [
+                ("items", [
+                    "1. Power up the entire system and monitor the initial responses.",
+                    "2. Use a serial monitor to observe the data sent by the MCU and received by the ESP-01.",
+                    "3. Check the readings from the temperature and humidity sensor for accuracy.",
+                    "4. Verify that the data is correctly being transmitted to your desired endpoint (e.g., cloud service, local server).",
+                    "5. Troubleshoot any issues by checking connections, code, and configurations."
+                ]),
+            ],
+        },
+    ],
+}
+
+ESP01_GUIDE = {
+    "title": "Temperature and Humidity Monitoring System using ESP-01",
+    "fence": "python",
+    "code_color": "WHITE",
+    "code_label": True,
+    "steps": [
+        {
+            "title": "Step 1: Gather Components",
+            "blocks": [
+                ("items", [
+                    "You will need the following components:",
+                    "- ESP-01 module (ESP8266)",
+                    "- DHT11 or DHT22 temperature and humidity sensor",
+                    "- Battery (e.g., 18650 Li-ion)",
+                    "- Battery holder",
+                    "- Voltage regulator (e.g., AMS1117) for 3.3V output",
+                    "- Additional sensors or devices as required"
+                ]),
+            ],
+        },
+        {
+            "title": "Step 2: Set Up ESP-01",
+            "blocks": [
+                ("items", [
+                    "1. Connect the ESP-01 to your computer using a USB-to-serial adapter.",
+                    "2. Flash the MicroPython firmware onto the ESP-01.",
+                    "3. Connect the DHT sensor to the ESP-01:",
+                    "   - VCC to 3.3V",
+                    "   - GND to GND",
+                    "   - Data to GPIO2",
+                    "4. Connect additional devices or sensors using I2C or UART as needed."
+                ]),
+            ],
+        },
+        {
+            "title": "Step 3: Configure Wi-Fi",
+            "blocks": [
+                ("text", "Ensure the ESP-01 module connects to your Wi-Fi network.", "GREEN"),
+                ("code", """import network
+import time
+
+ssid = 'your-ssid'
+password = 'your-password'
+
+wlan = network.WLAN(network.STA_IF)
+wlan.active(True)
+wlan.connect(ssid, password)
+
+# Poll with a short sleep and give up after 10 s instead of spinning forever
+deadline = time.ticks_add(time.ticks_ms(), 10000)
+while not wlan.isconnected():
+    if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+        raise OSError('Wi-Fi connection timed out')
+    time.sleep_ms(100)
+
+print('Connection successful')
+print(wlan.ifconfig())"""),
+            ],
+        },
+        {
+            "title": "Step 4: Reading from DHT Sensor",
+            "blocks": [
+                ("text", "Write a Python script to read data from the DHT sensor.", "GREEN"),
+                ("code", """import dht
+import machine
+import time
+
+sensor = dht.DHT11(machine.Pin(2))
+
+while True:
+    sensor.measure()
+    temp = sensor.temperature()
+    hum = sensor.humidity()
+    print('Temperature: {} C'.format(temp))
+    print('Humidity: {} %'.format(hum))
+    time.sleep(2)"""),
+            ],
+        },
+        {
+            "title": "Step 5: Sending Data to Server",
+            "blocks": [
+                ("text", "Write a Python script to send sensor data to a server.", "GREEN"),
+                ("code", """import urequests
+
+while True:
+    sensor.measure()
+    temp = sensor.temperature()
+    hum = sensor.humidity()
+    data = {'temperature': temp, 'humidity': hum}
+    response = urequests.post('http://your-api-endpoint', json=data)
+    print(response.text)
+    response.close()
+    time.sleep(10)"""),
+            ],
+        },
+        {
+            "title": "Step 6: Implementing Low Power Mode",
+            "blocks": [
+                ("text", "Utilize ESP-01's deep sleep mode to save power.", "GREEN"),
+                ("code", """import machine
+
+# Deep sleep for 10 minutes
+deep_sleep_time = 10 * 60 * 1000
+
+def deep_sleep():
+    print('Going to sleep...')
+    machine.deepsleep(deep_sleep_time)
+
+while True:
+    sensor.measure()
+    temp = sensor.temperature()
+    hum = sensor.humidity()
+    data = {'temperature': temp, 'humidity': hum}
+    response = urequests.post('http://your-api-endpoint', json=data)
+    print(response.text)
+    response.close()
+    time.sleep(10)
+    deep_sleep()"""),
+            ],
+        },
+    ],
+}
+
+MCU_QUIZ = [
+    {
+        "question": "What is the purpose of the pull-up resistors in the circuit?",
+        "options": ["A) To reduce noise", "B) To prevent floating pins", "C) To save power", "D) To increase signal strength"],
+        "answer": "B"
+    },
+    {
+        "question": "Which protocol should be followed to prevent damage from electrostatic discharge?",
+        "options": ["A) Use gloves", "B) Work on a metal surface", "C) Avoid touching components directly", "D) Work in a humid environment"],
+        "answer": "C"
+    },
+    {
+        "question": "What should you double-check before powering the circuit?",
+        "options": ["A) Connections", "B) Code", "C) Power supply", "D) All of the above"],
+        "answer": "D"
+    },
+    {
+        "question": "How can you verify communication between ESP-01 and MCU?",
+        "options": ["A) By checking the voltage", "B) By using a serial monitor", "C) By using a multimeter", "D) By observing LED indicators"],
+        "answer": "B"
+    },
+    {
+        "question": "What is the voltage required for the ESP-01 module?",
+        "options": ["A) 5V", "B) 3.3V", "C) 1.8V", "D) 12V"],
+        "answer": "B"
+    },
+    {
+        "question": "What should you do if the ESP-01 module is not responding?",
+        "options": ["A) Check the power connections", "B) Verify the baud rate", "C) Check the TX/RX connections", "D) All of the above"],
+        "answer": "D"
+    },
+    {
+        "question": "Which sensor is commonly used for temperature and humidity measurements?",
+        "options": ["A) BMP180", "B) DHT11", "C) MPU6050", "D) MQ-135"],
+        "answer": "B"
+    },
+    {
+        "question": "Why is it important to use a common ground between ESP-01 and MCU?",
+        "options": ["A) For consistent voltage levels", "B) For reliable communication", "C) To prevent noise", "D) All of the above"],
+        "answer": "D"
+    }
+]
+
+ESP01_QUIZ = [
+    {
+        "question": "1. What is the default baud rate for ESP-01 module?",
+        "options": ["A. 9600", "B. 115200", "C. 57600", "D. 4800"],
+        "answer": "B"
+    },
+    {
+        "question": "2. Which GPIO pins are available on the ESP-01 module?",
+        "options": ["A. GPIO0 and GPIO2", "B. GPIO1 and GPIO3", "C. GPIO4 and GPIO5", "D. GPIO6 and GPIO7"],
+        "answer": "A"
+    }
+]
+
+SECTIONS = {
+    "overview": OVERVIEW,
+    "mcu_guide": MCU_GUIDE,
+    "esp01_guide": ESP01_GUIDE,
+    "mcu_quiz": MCU_QUIZ,
+    "esp01_quiz": ESP01_QUIZ,
+}
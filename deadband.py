@@ -0,0 +1,157 @@
+"""Deadband reporting policy and delta+varint batch encoding.
+
+A DHT11 can report the same whole degree for hours, and every transmitted
+reading costs radio time on a battery node.  ReportingPolicy only lets a
+reading through when it moved by at least a deadband since the last
+reported one, or when `heartbeat` seconds passed without a report.
+
+Reported samples are batched with encode(): the first timestamp, then
+zigzag deltas of timestamps and of values in tenths, each as a varint,
+usually three bytes per sample.  Timestamp deltas are signed so a batch
+spanning a clock correction (an NTP step back) still encodes.  Version 1
+batches, whose timestamp deltas were unsigned, still decode.
+
+decode() restores the reported points in the order given and reconstruct()
+rebuilds the full sampled series on the server by holding each value until
+the next report, which is within the deadband of what the node measured.
+
+Only bytearray arithmetic is used, so this runs on MicroPython too.
+"""
+
+CONTENT_TYPE = "application/x-thm-delta"
+VERSION = 2
+
+
+class ReportingPolicy:
+    def __init__(self, temperature_deadband=0.5, humidity_deadband=2.0, heartbeat=3600):
+        self.temperature_deadband = temperature_deadband
+        self.humidity_deadband = humidity_deadband
+        self.heartbeat = heartbeat
+        self.last = None
+        self.seen = 0
+        self.reported = 0
+
+    def should_report(self, timestamp, temperature, humidity):
+        self.seen += 1
+        last = self.last
+        if (last is None
+                or timestamp - last[0] >= self.heartbeat
+                or abs(temperature - last[1]) >= self.temperature_deadband
+                or abs(humidity - last[2]) >= self.humidity_deadband):
+            self.last = (timestamp, temperature, humidity)
+            self.reported += 1
+            return True
+        return False
+
+    @property
+    def suppressed(self):
+        return self.seen - self.reported
+
+    def stats(self):
+        return {"seen": self.seen, "reported": self.reported, "suppressed": self.suppressed}
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encode(node_id, samples, interval=0):
+    """Encode [(timestamp, temperature, humidity), ...] from one node into bytes.
+
+    Timestamps are whole non-negative seconds, in any order; values are
+    stored in tenths.  `interval` is the node's sampling period, kept in the
+    header for reconstruct().
+    """
+    out = bytearray()
+    out.append(VERSION)
+    name = str(node_id).encode()
+    _put_varint(out, len(name))
+    out.extend(name)
+    _put_varint(out, interval)
+    _put_varint(out, len(samples))
+    prev_ts = prev_t = prev_h = 0
+    first = True
+    for ts, t, h in samples:
+        ts = int(ts)
+        t = int(round(t * 10))
+        h = int(round(h * 10))
+        if first:
+            if ts < 0:
+                raise ValueError("negative timestamp %d in delta batch" % ts)
+            _put_varint(out, ts)
+            first = False
+        else:
+            _put_varint(out, _zigzag(ts - prev_ts))
+        _put_varint(out, _zigzag(t - prev_t))
+        _put_varint(out, _zigzag(h - prev_h))
+        prev_ts, prev_t, prev_h = ts, t, h
+    return bytes(out)
+
+
+def decode(data):
+    """Inverse of encode(): returns (node_id, interval, [(timestamp, temperature, humidity), ...])."""
+    version = data[0]
+    if version not in (1, VERSION):
+        raise ValueError("unsupported delta batch version %d" % version)
+    length, pos = _get_varint(data, 1)
+    node_id = bytes(data[pos:pos + length]).decode()
+    interval, pos = _get_varint(data, pos + length)
+    count, pos = _get_varint(data, pos)
+    samples = []
+    ts = t = h = 0
+    for i in range(count):
+        delta, pos = _get_varint(data, pos)
+        if i == 0:
+            ts = delta
+        else:
+            ts += delta if version == 1 else _unzigzag(delta)
+        dt, pos = _get_varint(data, pos)
+        dh, pos = _get_varint(data, pos)
+        t += _unzigzag(dt)
+        h += _unzigzag(dh)
+        samples.append((ts, t / 10.0, h / 10.0))
+    return node_id, interval, samples
+
+
+def batch_encoder(interval=0):
+    """encode() bound to a sampling interval, for AcquisitionPipeline(encoder=...)."""
+    return lambda node_id, samples: encode(node_id, samples, interval)
+
+
+def reconstruct(samples, interval, end=None):
+    """Sample-and-hold the reported points back onto the node's sampling grid."""
+    if not samples or not interval:
+        return list(samples)
+    end = samples[-1][0] if end is None else end
+    out = []
+    k = 0
+    ts = samples[0][0]
+    while ts <= end:
+        while k + 1 < len(samples) and samples[k + 1][0] <= ts:
+            k += 1
+        out.append((ts, samples[k][1], samples[k][2]))
+        ts += interval
+    return out
@@ -0,0 +1,322 @@
+"""Sensor-fault and outlier filter for DHT readings.
+
+DHT11/DHT22 reads fail in a few recognisable ways: single-sample spikes from
+a corrupted frame that still passed its checksum, values outside the sensor's
+range, NaN from a failed read (many in a row when a wire came loose), and a
+sensor that locks up and keeps returning the same pair.  FaultFilter tags
+every sample with a bitmask of what it looks like:
+
+    SPIKE      Hampel test: further than max(`sigmas` * 1.4826 * MAD,
+               `deviation`) from the median of the node's last `window`
+               valid samples
+    RATE       moved faster than `rate` per second (plus `deviation`) since
+               the node's last valid sample that was not a spike
+    STUCK      temperature and humidity both unchanged for `stuck` seconds
+    RANGE      outside the model's measuring range
+    NAN        failed read
+    NAN_BURST  the `nan_burst`-th or later failed read in a row
+
+A sample whose flags intersect `drop` (by default: any flag) should be
+dropped; otherwise its flags can be kept with it as tags.  A genuine step
+change is tagged SPIKE until it fills half the window and RATE for one more
+sample, then it is the new normal.
+
+There are two paths with identical results.  check() takes one sample and
+keeps per-node state in small lists, cheap enough for the gateway's hot loop
+and free of NumPy.  check_history() flags whole arrays (any number of nodes,
+each in time order) with NumPy, for reprocessing stored history:
+
+    f = FaultFilter("DHT11")
+    if not f.check(node, timestamp, temperature, humidity) & f.drop:
+        store(...)
+    flags = f.check_history(timestamps, temperatures, humidities, nodes)
+
+    python faultfilter.py capture.jsonl --model DHT11 --output clean.jsonl
+    python faultfilter.py readings/ --tag --output tagged.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+
+from hal import DHT_MODELS
+
+SPIKE = 1
+RATE = 2
+STUCK = 4
+RANGE = 8
+NAN = 16
+NAN_BURST = 32
+FAULTS = SPIKE | RATE | STUCK | RANGE | NAN | NAN_BURST
+FLAG_NAMES = ((SPIKE, "spike"), (RATE, "rate"), (STUCK, "stuck"), (RANGE, "range"),
+              (NAN, "nan"), (NAN_BURST, "nan_burst"))
+
+# Per channel (temperature, humidity): the smallest deviation that counts as a
+# spike (and the slack of the rate limit), and the largest plausible change
+# per second.  The deviation also has to cover how far the daily curve moves
+# while the trailing window lags behind it, so the window should span well
+# under an hour.  Whole-unit DHT11 readings repeat for much longer.
+LIMITS = {
+    "DHT11": {"deviation": (2.0, 5.0), "rate": (0.05, 0.5), "stuck": 4 * 3600.0},
+    "DHT22": {"deviation": (2.0, 5.0), "rate": (0.05, 0.5), "stuck": 3600.0},
+}
+
+
+def describe(flags):
+    return ",".join(name for flag, name in FLAG_NAMES if flags & flag)
+
+
+def _outlier(window, value, floor, scale):
+    s = sorted(window)
+    n = len(s)
+    median = (s[n // 2] + s[(n - 1) // 2]) / 2
+    deviation = abs(value - median)
+    if deviation <= floor:
+        return False
+    s = sorted([abs(v - median) for v in window])
+    return deviation > scale * ((s[n // 2] + s[(n - 1) // 2]) / 2)
+
+
+class NodeFilter:
+    def __init__(self):
+        self.temperatures = []  # last `window` valid samples, oldest first
+        self.humidities = []
+        self.reference = None  # (timestamp, temperature, humidity) of the last valid non-spike sample
+        self.last = None  # (temperature, humidity) of the last valid sample
+        self.since = 0.0  # when `last` first appeared
+        self.nans = 0
+
+
+class FaultFilter:
+    def __init__(self, model="DHT11", window=7, sigmas=3.0, nan_burst=5, stuck=None, drop=FAULTS,
+                 limits=None):
+        if window < 3:
+            raise ValueError("window must be at least 3 samples")
+        spec = dict(LIMITS[model], **(limits or {}))
+        self.model = model
+        self.window = window
+        self.scale = sigmas * 1.4826
+        self.nan_burst = nan_burst
+        self.stuck = spec["stuck"] if stuck is None else stuck
+        self.drop = drop
+        self.t_range = DHT_MODELS[model]["t_range"]
+        self.h_range = DHT_MODELS[model]["h_range"]
+        self.t_deviation, self.h_deviation = spec["deviation"]
+        self.t_rate, self.h_rate = spec["rate"]
+        self.nodes = {}
+        self.samples = 0
+        self.dropped = 0
+        self.counts = dict.fromkeys([name for _, name in FLAG_NAMES], 0)
+
+    def check(self, node, timestamp, temperature, humidity):
+        """Flags of one sample; samples of a node must come in time order."""
+        self.samples += 1
+        state = self.nodes.get(node)
+        if state is None:
+            state = self.nodes[node] = NodeFilter()
+        if temperature != temperature or humidity != humidity:
+            state.nans += 1
+            return self._flagged(NAN | NAN_BURST if state.nans >= self.nan_burst else NAN)
+        state.nans = 0
+        if not (self.t_range[0] <= temperature <= self.t_range[1]
+                and self.h_range[0] <= humidity <= self.h_range[1]):
+            return self._flagged(RANGE)
+
+        flags = 0
+        temperatures = state.temperatures
+        humidities = state.humidities
+        if len(temperatures) == self.window:
+            if (_outlier(temperatures, temperature, self.t_deviation, self.scale)
+                    or _outlier(humidities, humidity, self.h_deviation, self.scale)):
+                flags = SPIKE
+            del temperatures[0]
+            del humidities[0]
+        temperatures.append(temperature)
+        humidities.append(humidity)
+        if not flags:
+            reference = state.reference
+            if reference is not None:
+                dt = timestamp - reference[0]
+                if dt < 0:
+                    dt = 0
+                if (abs(temperature - reference[1]) > self.t_rate * dt + self.t_deviation
+                        or abs(humidity - reference[2]) > self.h_rate * dt + self.h_deviation):
+                    flags = RATE
+            state.reference = (timestamp, temperature, humidity)
+        pair = (temperature, humidity)
+        if pair == state.last:
+            if timestamp - state.since >= self.stuck:
+                flags |= STUCK
+        else:
+            state.last = pair
+            state.since = timestamp
+        return self._flagged(flags) if flags else 0
+
+    def _flagged(self, flags):
+        for flag, name in FLAG_NAMES:
+            if flags & flag:
+                self.counts[name] += 1
+        if flags & self.drop:
+            self.dropped += 1
+        return flags
+
+    def check_history(self, timestamps, temperatures, humidities, nodes=None):
+        """check() over whole arrays at once; returns a uint8 array of flags.
+
+        Starts from a clean state (the streaming per-node state is neither
+        used nor changed).  `nodes` holds a node key per sample (names or
+        codes); the samples of each node must be in time order, but nodes may
+        be interleaved.
+        """
+        import numpy as np
+        ts = np.asarray(timestamps, dtype=np.float64)
+        t = np.asarray(temperatures, dtype=np.float64)
+        h = np.asarray(humidities, dtype=np.float64)
+        n = len(ts)
+        order = None
+        if nodes is None:
+            key = np.zeros(n, dtype=np.intp)
+        else:
+            key = np.unique(np.asarray(nodes), return_inverse=True)[1].reshape(-1)
+            order = np.argsort(key, kind="stable")
+            ts, t, h, key = ts[order], t[order], h[order], key[order]
+        flags = np.zeros(n, dtype=np.uint8)
+        if not n:
+            return flags
+
+        nan = np.isnan(t) | np.isnan(h)
+        follows = np.zeros(n, dtype=bool)
+        follows[1:] = key[1:] == key[:-1]
+        nan_run = _run_position(nan & np.concatenate(([False], nan[:-1])) & follows)
+        flags[nan] = NAN
+        flags[nan & (nan_run >= self.nan_burst)] |= NAN_BURST
+        in_range = ((t >= self.t_range[0]) & (t <= self.t_range[1])
+                    & (h >= self.h_range[0]) & (h <= self.h_range[1]))
+        flags[~nan & ~in_range] = RANGE
+
+        # Everything else only looks at the valid samples of each node.
+        valid = np.flatnonzero(~nan & in_range)
+        vts, vt, vh, vkey = ts[valid], t[valid], h[valid], key[valid]
+        m = len(valid)
+        vflags = np.zeros(m, dtype=np.uint8)
+        w = self.window
+        if m > w:
+            full = vkey[:-w] == vkey[w:]
+            spike = (_outliers(vt, w, self.t_deviation, self.scale)
+                     | _outliers(vh, w, self.h_deviation, self.scale)) & full
+            vflags[w:] = spike * SPIKE
+        spike = vflags != 0
+
+        index = np.arange(m)
+        reference = np.where(spike, -1, index)
+        np.maximum.accumulate(reference, out=reference)
+        reference = np.concatenate(([-1], reference[:-1]))
+        has = (reference >= 0) & ~spike
+        has[has] = vkey[reference[has]] == vkey[has]
+        r = reference[has]
+        dt = np.maximum(vts[has] - vts[r], 0)
+        rate = ((np.abs(vt[has] - vt[r]) > self.t_rate * dt + self.t_deviation)
+                | (np.abs(vh[has] - vh[r]) > self.h_rate * dt + self.h_deviation))
+        vflags[np.flatnonzero(has)[rate]] |= RATE
+
+        same = np.zeros(m, dtype=bool)
+        same[1:] = (vt[1:] == vt[:-1]) & (vh[1:] == vh[:-1]) & (vkey[1:] == vkey[:-1])
+        run_start = index - _run_position(same) + 1
+        vflags[same & (vts - vts[run_start] >= self.stuck)] |= STUCK
+        flags[valid] |= vflags
+
+        for flag, name in FLAG_NAMES:
+            self.counts[name] += int(np.count_nonzero(flags & flag))
+        self.samples += n
+        self.dropped += int(np.count_nonzero(flags & self.drop))
+        if order is not None:
+            out = np.empty_like(flags)
+            out[order] = flags
+            flags = out
+        return flags
+
+    def stats(self):
+        return dict(self.counts, samples=self.samples, dropped=self.dropped, nodes=len(self.nodes))
+
+
+def _run_position(continues):
+    """1-based position of every element in its run; continues[i] extends the run of i - 1."""
+    import numpy as np
+    index = np.arange(len(continues))
+    starts = np.where(continues, 0, index)
+    np.maximum.accumulate(starts, out=starts)
+    return index - starts + 1
+
+
+def _outliers(values, w, floor, scale, chunk=1 << 20):
+    """_outlier() of values[k] against values[k - w:k] for every k >= w."""
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    windows = sliding_window_view(values, w)[:-1]
+    out = np.empty(len(windows), dtype=bool)
+    lo, hi = w // 2, (w - 1) // 2
+    for start in range(0, len(windows), chunk):
+        s = np.sort(windows[start:start + chunk], axis=1)
+        median = (s[:, lo] + s[:, hi]) / 2
+        deviation = np.abs(values[w + start:w + start + len(s)] - median)
+        s = np.sort(np.abs(s - median[:, None]), axis=1)
+        out[start:start + len(s)] = (deviation > floor) & (deviation > scale * ((s[:, lo] + s[:, hi]) / 2))
+    return out
+
+
+def load(path):
+    """(timestamps, nodes, temperatures, humidities) from a gateway JSONL capture or a tsstore directory."""
+    import numpy as np
+    if os.path.isdir(path):
+        from tsstore import TimeSeriesStore
+        store = TimeSeriesStore(path)
+        rows = store.query(0, 1e12)
+        return (rows["ts"] / 1000.0, np.asarray(store.nodes, dtype=object)[rows["node"]],
+                rows["temp"], rows["hum"])
+    timestamps, nodes, temperatures, humidities = [], [], [], []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                timestamps.append(row["timestamp"])
+                nodes.append(row["node"])
+                temperatures.append(float("nan") if row["temperature"] is None else row["temperature"])
+                humidities.append(float("nan") if row["humidity"] is None else row["humidity"])
+    return (np.array(timestamps, dtype=np.float64), np.array(nodes, dtype=object),
+            np.array(temperatures, dtype=np.float64), np.array(humidities, dtype=np.float64))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag sensor faults and outliers in recorded readings.")
+    parser.add_argument("source", help="gateway JSONL capture or tsstore directory")
+    parser.add_argument("--model", choices=sorted(LIMITS), default="DHT11")
+    parser.add_argument("--window", type=int, default=7)
+    parser.add_argument("--sigmas", type=float, default=3.0)
+    parser.add_argument("--stuck", type=float, help="seconds (default: per model)")
+    parser.add_argument("--nan-burst", type=int, default=5)
+    parser.add_argument("--output", help="write the readings as JSONL here")
+    parser.add_argument("--tag", action="store_true", help="keep flagged readings with a 'flags' field")
+    args = parser.parse_args(argv)
+
+    timestamps, nodes, temperatures, humidities = load(args.source)
+    f = FaultFilter(args.model, args.window, args.sigmas, args.nan_burst, args.stuck)
+    flags = f.check_history(timestamps, temperatures, humidities, nodes)
+    stats = f.stats()
+    stats["nodes"] = len(set(nodes.tolist()))
+    print(json.dumps(stats))
+    if args.output:
+        with open(args.output, "w") as out:
+            for ts, node, t, h, flag in zip(timestamps.tolist(), nodes.tolist(), temperatures.tolist(),
+                                            humidities.tolist(), flags.tolist()):
+                if flag and not args.tag:
+                    continue
+                row = {"node": node, "timestamp": ts, "temperature": None if t != t else t,
+                       "humidity": None if h != h else h}
+                if args.tag:
+                    row["flags"] = describe(flag)
+                out.write(json.dumps(row) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
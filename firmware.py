@@ -0,0 +1,395 @@
+"""ESP-01 node firmware: batch readings in RTC memory across deep sleep.
+
+Step 6 of the guide associates with the access point, builds a dict and posts
+it with urequests on every wake.  Here every wake only measures and appends
+one 8-byte record to RTC user memory (which survives deep sleep); Wi-Fi is
+brought up every `send_every` wakes, or when the RTC ring is full, to post
+all stored records as one binary frame (see wire.py), connecting through
+wifi.WifiManager with its BSSID cache kept in RTC memory too.  Wakes that will not
+send are started with the radio disabled via esp.deepsleep()'s RF option.
+
+The RTC starts at 2000-01-01 on power-up and keeps counting through deep
+sleep.  Every time Wi-Fi is up, ntptime.settime() sets it to UTC; the first
+time, the records stamped before it are moved by the same jump.  Until the
+clock has been set once, nothing is posted, so the gateway never sees
+readings from 2000.
+
+The RTC image is allocated once per boot in Node.__init__; the frame, HTTP
+request head, response and Wi-Fi manager only on wakes that send
+(Node.allocate()).  The
+measure-and-store path of wake() only does small-int arithmetic on them:
+readings are taken from the DHT driver's raw bytes (sensor.buf) rather than
+temperature()/humidity(), which return floats on a DHT22
+(config["heap_lock"] has the board enforce that).  Timestamps are stored on
+MicroPython's 2000 epoch so they stay small ints (no heap allocation) until
+2034.
+
+RTC memory layout (little-endian, at most 492 bytes on the ESP8266):
+
+    0   magic b"THMR"     8   wakes    uint16
+    4   version uint8     10  start    uint16 (ring start)
+    5   failed  uint8     12  seq      uint32 (seq of the record at start)
+    6   count   uint16    16  wifi.WifiCache (BSSID, channel, last connect)
+                          32  records: timestamp uint32, temperature int16
+                              (centi-degC), humidity uint16 (centi-%RH)
+    488 post_ms uint16 (the last POST: connect to status line, or to
+        the error; Node.post_ms)
+    490 clock   uint8  (1 once ntptime has set the RTC)
+
+On the board (GPIO16 wired to RST for the deep-sleep timer), main.py is:
+
+    import firmware
+    firmware.main({"ssid": "...", "password": "...", "host": "192.168.1.10"})
+
+On CPython, mpstubs.Board provides machine/network/dht/esp/utime/usocket
+stand-ins that count allocations, radio-on time and wake duration.
+"""
+import struct
+
+import dht
+import machine
+import network
+
+import wire
+from wifi import CACHE_SIZE, WifiCache, WifiManager
+
+try:
+    import utime as time
+except ImportError:
+    import time
+
+try:
+    import esp
+except ImportError:
+    esp = None
+
+try:
+    import usocket as socket
+except ImportError:
+    import socket
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+try:
+    import ntptime
+except ImportError:
+    ntptime = None
+
+MAGIC = b"THMR"
+VERSION = 3
+RTC_SIZE = 492
+WIFI_CACHE = 16
+HEADER_SIZE = WIFI_CACHE + CACHE_SIZE
+RECORD_SIZE = 8
+POST_MS = RTC_SIZE - 4
+CLOCK = RTC_SIZE - 2
+CAPACITY = (POST_MS - HEADER_SIZE) // RECORD_SIZE
+
+# Seconds between MicroPython's epoch (2000-01-01) and the Unix epoch.
+EPOCH_OFFSET = 946684800 if time.gmtime(0)[0] == 2000 else 0
+
+# esp.deepsleep() options for the next boot
+RF_DEFAULT = 0
+RF_DISABLED = 4
+
+CONFIG = {
+    "ssid": "your-ssid",
+    "password": "your-password",
+    "host": "192.168.4.1",
+    "port": 80,
+    "path": "/readings",
+    "static_ip": None,  # (ip, netmask, gateway, dns) skips DHCP
+    "pin": 2,
+    "model": "DHT11",
+    "interval_ms": 10 * 60 * 1000,
+    "send_every": 6,
+    "cached_timeout_ms": 4000,  # connect to the cached BSSID
+    "connect_timeout_ms": 10000,  # connect after a full scan
+    # After a failed send, retry on this many following wakes before going
+    # back to the send_every schedule.
+    "retries": 2,
+    # Run measure-and-store under micropython.heap_lock(), so any allocation
+    # there raises MemoryError.  For development; leave off on deployed nodes.
+    "heap_lock": False,
+}
+
+
+def _get16(buf, pos):
+    return buf[pos] | buf[pos + 1] << 8
+
+
+def _put16(buf, pos, value):
+    buf[pos] = value & 0xFF
+    buf[pos + 1] = (value >> 8) & 0xFF
+
+
+def _get32(buf, pos):
+    return buf[pos] | buf[pos + 1] << 8 | buf[pos + 2] << 16 | buf[pos + 3] << 24
+
+
+def _put32(buf, pos, value):
+    buf[pos] = value & 0xFF
+    buf[pos + 1] = (value >> 8) & 0xFF
+    buf[pos + 2] = (value >> 16) & 0xFF
+    buf[pos + 3] = (value >> 24) & 0xFF
+
+
+# Centi-units from the bytes the dht driver keeps in sensor.buf: the DHT11
+# sends whole units and a tenths byte, the DHT22 tenths as 16-bit values
+# with the temperature's sign in bit 15.
+
+def _humidity(buf, wide):
+    if wide:
+        return (buf[0] << 8 | buf[1]) * 10
+    return buf[0] * 100 + buf[1] * 10
+
+
+def _temperature(buf, wide):
+    if wide:
+        value = ((buf[2] & 0x7F) << 8 | buf[3]) * 10
+        negative = buf[2] & 0x80
+    else:
+        value = buf[2] * 100 + (buf[3] & 0x7F) * 10
+        negative = buf[3] & 0x80
+    return -value if negative else value
+
+
+class Node:
+    def __init__(self, config=None):
+        cfg = dict(CONFIG)
+        if config:
+            cfg.update(config)
+        self.config = cfg
+        self.capacity = CAPACITY
+        self.rtc = machine.RTC()
+        self.sensor = getattr(dht, cfg["model"])(machine.Pin(cfg["pin"]))
+        self.wide = cfg["model"] != "DHT11"
+        self.image = bytearray(RTC_SIZE)
+        self.frame = None
+        self.sent = 0
+        self.read_errors = 0
+
+    # RTC image
+
+    def load(self):
+        image = self.image
+        memory = self.rtc.memory()
+        if (machine.reset_cause() == machine.DEEPSLEEP_RESET and len(memory) >= HEADER_SIZE
+                and memory[:4] == MAGIC and memory[4] == VERSION):
+            image[:len(memory)] = memory
+        else:
+            # Power-on or corrupted memory: start an empty ring.
+            for i in range(HEADER_SIZE):
+                image[i] = 0
+            _put16(image, POST_MS, 0)
+            image[CLOCK] = 0
+            image[:4] = MAGIC
+            image[4] = VERSION
+
+    def save(self):
+        self.rtc.memory(self.image)
+
+    @property
+    def count(self):
+        return _get16(self.image, 6)
+
+    @property
+    def wakes(self):
+        return _get16(self.image, 8)
+
+    @property
+    def post_ms(self):
+        """Duration of the last POST, kept across deep sleep (0 before the first)."""
+        return _get16(self.image, POST_MS)
+
+    def store(self, timestamp, temperature, humidity):
+        image = self.image
+        count = _get16(image, 6)
+        start = _get16(image, 10)
+        if count == CAPACITY:
+            # Ring full: drop the oldest record.
+            start = (start + 1) % CAPACITY
+            _put16(image, 10, start)
+            _put32(image, 12, _get32(image, 12) + 1)
+            count -= 1
+        pos = HEADER_SIZE + ((start + count) % CAPACITY) * RECORD_SIZE
+        _put32(image, pos, timestamp)
+        _put16(image, pos + 4, temperature)
+        _put16(image, pos + 6, humidity)
+        _put16(image, 6, count + 1)
+
+    # Upload
+
+    def allocate(self):
+        """Buffers, node id and Wi-Fi manager used only by wakes that send."""
+        cfg = self.config
+        self.node_id = 0
+        for byte in machine.unique_id()[:4]:
+            self.node_id = self.node_id << 8 | byte
+        self.wifi = WifiManager(network.WLAN(network.STA_IF), cfg["ssid"], cfg["password"],
+                                static_ip=cfg["static_ip"], cache=WifiCache(self.image, WIFI_CACHE),
+                                cached_timeout_ms=cfg["cached_timeout_ms"],
+                                scan_timeout_ms=cfg["connect_timeout_ms"])
+        self.frame = bytearray(wire.FRAME_HEADER_SIZE + wire.RECORD_SIZE * CAPACITY)
+        self.response = bytearray(16)
+        head = "POST %s HTTP/1.0\r\nHost: %s\r\nContent-Type: %s\r\nContent-Length:" % (
+            cfg["path"], cfg["host"], wire.FRAME_TYPE)
+        self.head = bytearray(head.encode() + b"      \r\n\r\n")
+        self.length_end = len(head) + 6  # Content-Length digits end here
+
+    def build_frame(self):
+        """Write the stored records as a wire frame; returns its length."""
+        if self.frame is None:
+            self.allocate()
+        image, frame = self.image, self.frame
+        count = _get16(image, 6)
+        start = _get16(image, 10)
+        seq = _get32(image, 12)
+        struct.pack_into(wire.FRAME_HEADER, frame, 0, wire.FRAME_MAGIC, wire.VERSION, count)
+        out = wire.FRAME_HEADER_SIZE
+        for k in range(count):
+            pos = HEADER_SIZE + ((start + k) % CAPACITY) * RECORD_SIZE
+            temperature = _get16(image, pos + 4)
+            if temperature & 0x8000:
+                temperature -= 0x10000
+            struct.pack_into(wire.RECORD, frame, out, self.node_id, seq + k,
+                             _get32(image, pos) + EPOCH_OFFSET, temperature, _get16(image, pos + 6))
+            out += wire.RECORD_SIZE
+        return out
+
+    def post(self, length):
+        head = self.head
+        # Right-align the body length in the Content-Length slot.
+        pos = self.length_end
+        for i in range(pos - 6, pos):
+            head[i] = 32
+        value = length
+        while True:
+            pos -= 1
+            head[pos] = 48 + value % 10
+            value //= 10
+            if not value:
+                break
+        cfg = self.config
+        sock = socket.socket()
+        try:
+            sock.connect(socket.getaddrinfo(cfg["host"], cfg["port"])[0][-1])
+            sock.write(head)
+            sock.write(memoryview(self.frame)[:length])
+            n = sock.readinto(self.response)
+        finally:
+            sock.close()
+        response = self.response
+        # "HTTP/1.x NNN"
+        if n < 12:
+            return False
+        status = (response[9] - 48) * 100 + (response[10] - 48) * 10 + (response[11] - 48)
+        return 200 <= status < 300
+
+    def set_clock(self):
+        """Set the RTC from NTP; returns whether it has ever been set."""
+        image = self.image
+        if ntptime is None:
+            # No NTP client (CPython): the clock is the host's.
+            return True
+        before = time.time()
+        try:
+            ntptime.settime()
+        except (OSError, OverflowError):
+            # Timeouts are OSError; some ports overflow on a bad reply.
+            return bool(image[CLOCK])
+        if not image[CLOCK]:
+            # The records so far were stamped on the power-up clock.
+            shift = time.time() - before
+            count = _get16(image, 6)
+            start = _get16(image, 10)
+            for k in range(count):
+                pos = HEADER_SIZE + ((start + k) % CAPACITY) * RECORD_SIZE
+                _put32(image, pos, _get32(image, pos) + shift)
+            image[CLOCK] = 1
+        return True
+
+    def send(self):
+        if self.frame is None:
+            self.allocate()
+        if not self.wifi.connect() or not self.set_clock():
+            return False
+        length = self.build_frame()
+        started = time.ticks_ms()
+        try:
+            ok = self.post(length)
+        except OSError:
+            ok = False
+        _put16(self.image, POST_MS, min(time.ticks_diff(time.ticks_ms(), started), 0xFFFF))
+        if ok:
+            image = self.image
+            count = _get16(image, 6)
+            _put32(image, 12, _get32(image, 12) + count)
+            _put16(image, 6, 0)
+            _put16(image, 10, 0)
+            self.sent += count
+        return ok
+
+    # One wake
+
+    def due(self, wakes):
+        """Whether wake number `wakes` brings Wi-Fi up and sends."""
+        image = self.image
+        failed = image[5]
+        return (wakes % self.config["send_every"] == 0
+                or 0 < failed <= self.config["retries"]
+                or _get16(image, 6) + 1 >= CAPACITY)
+
+    def wake(self):
+        started = time.ticks_ms()
+        cfg = self.config
+        self.load()
+        image = self.image
+        wakes = _get16(image, 8) + 1
+        _put16(image, 8, wakes)
+        due = self.due(wakes)
+        wlan = network.WLAN(network.STA_IF)
+        if not due:
+            wlan.active(False)
+
+        locked = cfg["heap_lock"] and micropython is not None
+        if locked:
+            micropython.heap_lock()
+        try:
+            try:
+                sensor = self.sensor
+                sensor.measure()
+                buf = sensor.buf
+                self.store(time.time(), _temperature(buf, self.wide), _humidity(buf, self.wide))
+            finally:
+                if locked:
+                    micropython.heap_unlock()
+        except (OSError, MemoryError):
+            # MemoryError: something allocated under the heap lock.  Losing
+            # the reading beats never reaching deep sleep again.
+            self.read_errors += 1
+
+        if due:
+            if self.send():
+                image[5] = 0
+            else:
+                image[5] = min(image[5] + 1, 255)
+            wlan.active(False)
+        self.save()
+
+        remaining = cfg["interval_ms"] - time.ticks_diff(time.ticks_ms(), started)
+        self.deepsleep(max(remaining, 1), self.due(wakes + 1))
+
+    def deepsleep(self, ms, radio):
+        if getattr(esp, "deepsleep", None) is not None:
+            # ESP8266: sleeps right away, with the RF mode of the next boot.
+            esp.deepsleep(ms * 1000, RF_DEFAULT if radio else RF_DISABLED)
+        else:
+            machine.deepsleep(ms)
+
+
+def main(config=None):
+    Node(config).wake()
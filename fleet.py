@@ -0,0 +1,575 @@
+"""Deterministic synthetic fleet: thousands of virtual nodes feeding the data path.
+
+Fleet(nodes, seed) models each node with its own diurnal temperature curve
+(humidity moves the other way), sample-time jitter, DHT11/DHT22
+quantization and range clipping, random NaN read failures plus NaN bursts,
+and a skewed clock (fixed offset + ppm drift).  Reconnect storms take a
+fraction of the nodes offline for a while; when they come back they flush
+everything they buffered at once, with the original (old) timestamps.
+
+Tick k is every online node's reading at start + k * interval.  A tick
+depends only on (seed, k), so any range of ticks can be regenerated in any
+order or chunking and the stream is identical from run to run.  Readings
+are returned as columns (Readings of NumPy arrays), never per-row objects.
+
+Outputs encode whole blocks of readings at once:
+
+    PtyOutput     MCU serial lines on pty pairs, for gateway.py --serial
+    UDPOutput     wire.py frames in datagrams, for gateway.py --udp
+    HTTPOutput    wire.py frames (or JSON) POSTed on a keep-alive connection,
+                  e.g. to localsink.LocalHTTPSink or an api_endpoint stand-in
+    FileOutput    recorded captures: gateway JSONL, wire frames or serial text
+
+Serial and JSONL rows are fixed width (numbers are space-padded, which both
+serial_parser and JSON accept), so a block is encoded by gathering from
+preformatted byte tables into one uint8 matrix.
+
+run() paces generation to a target rate (or as fast as the outputs go) and
+reports achieved readings/s and bytes/s per output:
+
+    python fleet.py --nodes 5000 --rate 1e6 --duration 10 \\
+        --udp 127.0.0.1:9999 --sink --file capture.jsonl
+"""
+import argparse
+import http.client
+import json
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+import wire
+from hal import DHT_MODELS
+
+Readings = namedtuple("Readings", "node seq timestamp temperature humidity")
+
+RECORD_DTYPE = np.dtype([("node", "<u4"), ("seq", "<u4"), ("timestamp", "<u4"),
+                         ("temperature", "<i2"), ("humidity", "<u2")])
+assert RECORD_DTYPE.itemsize == wire.RECORD_SIZE
+DAY = 86400.0
+
+# Streams of the per-tick generators (see Fleet._rng).
+_NODES, _SAMPLE, _BURST, _STORM = range(4)
+
+
+def concat(blocks):
+    blocks = [block for block in blocks if len(block.node)]
+    if not blocks:
+        return Readings(*(np.empty(0, dtype) for dtype in (np.uint32, np.uint32, np.float64,
+                                                             np.float32, np.float32)))
+    if len(blocks) == 1:
+        return blocks[0]
+    return Readings(*(np.concatenate(columns) for columns in zip(*blocks)))
+
+
+class Fleet:
+    def __init__(self, nodes=1000, seed=0, model="DHT22", interval=60.0, start=1_700_000_000.0,
+                 failure_rate=0.005, burst_rate=0.001, burst_ticks=10, skew_ppm=40.0,
+                 clock_offset=20.0, storm_every=6 * 3600.0, storm_length=900.0, storm_fraction=0.2):
+        self.nodes = nodes
+        self.seed = seed
+        self.spec = DHT_MODELS[model]
+        self.model = model
+        self.interval = interval
+        self.start = start
+        self.failure_rate = failure_rate
+        self.burst_rate = burst_rate
+        self.burst_ticks = max(1, burst_ticks)
+        self.storm_period = int(round(storm_every / interval)) if storm_every else 0
+        self.storm_ticks = max(1, int(round(storm_length / interval)))
+        if self.storm_period and self.storm_ticks >= self.storm_period:
+            raise ValueError("storm_length must be shorter than storm_every")
+        self.storm_fraction = storm_fraction
+
+        rng = self._rng(_NODES, 0)
+        # An odd multiplier is a bijection mod 2**32: unique, scattered ids.
+        self.ids = ((np.arange(nodes, dtype=np.uint64) * 2654435761 + seed * 40503 + 1)
+                    & 0xFFFFFFFF).astype(np.uint32)
+        self.jitter = rng.uniform(0.0, interval, nodes)
+        self.base_t = rng.normal(22.0, 3.0, nodes)
+        self.amp_t = rng.uniform(1.0, 6.0, nodes)
+        self.peak = rng.normal(15.0, 1.5, nodes)  # hour of the daily maximum
+        self.base_h = rng.uniform(35.0, 65.0, nodes)
+        self.amp_h = rng.uniform(3.0, 12.0, nodes)
+        self.noise = rng.uniform(0.05, 0.3, nodes)
+        self.offset = rng.normal(0.0, clock_offset, nodes)
+        self.drift = rng.normal(0.0, skew_ppm * 1e-6, nodes)
+        self._burst_cache = (None, None)
+
+    def _rng(self, stream, k):
+        return np.random.default_rng((self.seed, stream, k))
+
+    def _sample(self, k):
+        """All nodes' readings for tick k, before storms."""
+        n = self.nodes
+        rng = self._rng(_SAMPLE, k)
+        t = self.start + k * self.interval + self.jitter
+        wave = np.cos((t % DAY / 3600.0 - self.peak) * (2 * np.pi / 24))
+        noise = rng.standard_normal((2, n))
+        temperature = self.base_t + self.amp_t * wave + self.noise * noise[0]
+        humidity = self.base_h - self.amp_h * wave + 3 * self.noise * noise[1]
+        step = self.spec["resolution"]
+        temperature = np.clip(np.round(temperature / step) * step, *self.spec["t_range"])
+        humidity = np.clip(np.round(humidity / step) * step, *self.spec["h_range"])
+        failed = rng.random(n) < self.failure_rate
+        if self.burst_rate:
+            failed |= self._bursting(k // self.burst_ticks)
+        temperature[failed] = np.nan
+        humidity[failed] = np.nan
+        timestamp = t + self.offset + self.drift * (t - self.start)
+        return Readings(self.ids, np.full(n, k, np.uint32), timestamp,
+                        temperature.astype(np.float32), humidity.astype(np.float32))
+
+    def _bursting(self, window):
+        if self._burst_cache[0] != window:
+            self._burst_cache = (window, self._rng(_BURST, window).random(self.nodes) < self.burst_rate)
+        return self._burst_cache[1]
+
+    def storm(self, k):
+        """(storm number, ticks into it) when tick k falls in a storm or just after it, else None."""
+        if not self.storm_period or k < self.storm_period // 2:
+            return None
+        s, into = divmod(k - self.storm_period // 2, self.storm_period)
+        return (s, into) if into <= self.storm_ticks else None
+
+    def storm_nodes(self, s):
+        return self._rng(_STORM, s).random(self.nodes) < self.storm_fraction
+
+    def tick(self, k):
+        readings = self._sample(k)
+        storm = self.storm(k)
+        if storm is None:
+            return readings
+        s, into = storm
+        offline = self.storm_nodes(s)
+        if into < self.storm_ticks:
+            return Readings(*(column[~offline] for column in readings))
+        # Back online: the backlog goes out together with this tick.
+        backlog = [self._sample(j) for j in range(k - self.storm_ticks, k)]
+        return concat([Readings(*(column[offline] for column in block)) for block in backlog]
+                      + [readings])
+
+    def ticks(self, first, count):
+        return concat([self.tick(k) for k in range(first, first + count)])
+
+
+_TABLE = {}
+_HEX = np.frombuffer(b"0123456789abcdef", np.uint8)
+_POW10 = 10 ** np.arange(9, -1, -1, dtype=np.int64)
+FIXED_MIN, FIXED_MAX = -4000, 10000  # hundredths covered by the tables
+
+
+def _fixed_table():
+    """'%6.2f' of every hundredth from FIXED_MIN to FIXED_MAX, as a (values, 6) uint8 matrix."""
+    table = _TABLE.get("fixed")
+    if table is None:
+        text = "".join("%6.2f" % (i / 100.0) for i in range(FIXED_MIN, FIXED_MAX + 1))
+        table = _TABLE["fixed"] = np.frombuffer(text.encode(), np.uint8).reshape(-1, 6)
+    return table
+
+
+def _fixed(values):
+    index = np.rint(values.astype(np.float64) * 100).astype(np.int64)
+    return _fixed_table()[np.clip(index, FIXED_MIN, FIXED_MAX) - FIXED_MIN]
+
+
+def _template(text, fields):
+    """Row template and the column slice of each {field} in it."""
+    row = bytearray()
+    slots = {}
+    for i, part in enumerate(text.split("|")):
+        if i % 2:
+            slots[part] = slice(len(row), len(row) + fields[part])
+            row += b" " * fields[part]
+        else:
+            row += part.encode()
+    return np.frombuffer(bytes(row), np.uint8), slots
+
+
+_LINE, _LINE_SLOTS = _template("Humidity: |h| %\tTemperature: |t| *C\r\n", {"h": 6, "t": 6})
+_FAILED_LINE = np.frombuffer(b"Failed to read from DHT sensor!".ljust(len(_LINE) - 2) + b"\r\n", np.uint8)
+_JSONL, _JSONL_SLOTS = _template('{"node": "|n|", "timestamp": |s|, "temperature": |t|, "humidity": |h|}\n',
+                                 {"n": 8, "s": 10, "t": 6, "h": 6})
+
+
+def valid(readings):
+    """The readings a node would actually send (failed reads are not uploaded)."""
+    ok = ~np.isnan(readings.temperature)
+    return readings if ok.all() else Readings(*(column[ok] for column in readings))
+
+
+def encode_lines(readings):
+    """MCU serial output (Step 5 sketch format), failed reads included, as one bytes object."""
+    m = len(readings.node)
+    rows = np.empty((m, len(_LINE)), np.uint8)
+    rows[:] = _LINE
+    failed = np.isnan(readings.temperature)
+    rows[:, _LINE_SLOTS["h"]] = _fixed(np.where(failed, 0, readings.humidity))
+    rows[:, _LINE_SLOTS["t"]] = _fixed(np.where(failed, 0, readings.temperature))
+    rows[failed] = _FAILED_LINE
+    return rows.tobytes()
+
+
+def _json_rows(readings):
+    readings = valid(readings)
+    m = len(readings.node)
+    rows = np.empty((m, len(_JSONL)), np.uint8)
+    rows[:] = _JSONL
+    rows[:, _JSONL_SLOTS["n"]] = _HEX[(readings.node[:, None] >> np.arange(28, -1, -4, dtype=np.uint32)) & 15]
+    seconds = readings.timestamp.astype(np.int64)
+    rows[:, _JSONL_SLOTS["s"]] = (seconds[:, None] // _POW10 % 10 + 48).astype(np.uint8)
+    rows[:, _JSONL_SLOTS["t"]] = _fixed(readings.temperature)
+    rows[:, _JSONL_SLOTS["h"]] = _fixed(readings.humidity)
+    return rows
+
+
+def encode_jsonl(readings):
+    """gateway.JsonlSink rows (node named by hex id, like gateway.feed_frame)."""
+    return _json_rows(readings).tobytes()
+
+
+def encode_json(readings):
+    """wire.JSON_TYPE body: a list of record objects."""
+    rows = _json_rows(readings)
+    if not len(rows):
+        return b"[]"
+    rows[:, -1] = ord(",")
+    return b"[" + rows.tobytes()[:-1] + b"]"
+
+
+def records(readings):
+    """wire.py records of the valid readings as a structured array."""
+    readings = valid(readings)
+    out = np.empty(len(readings.node), RECORD_DTYPE)
+    out["node"] = readings.node
+    out["seq"] = readings.seq
+    out["timestamp"] = readings.timestamp
+    out["temperature"] = np.rint(readings.temperature * 100)
+    out["humidity"] = np.rint(readings.humidity * 100)
+    return out
+
+
+def encode_frames(readings, per_frame=64):
+    """wire.FRAME_TYPE frames of up to per_frame records each."""
+    data = records(readings)
+    raw = data.view(np.uint8)
+    frames = []
+    for i in range(0, len(data), per_frame):
+        count = min(per_frame, len(data) - i)
+        frames.append(struct.pack(wire.FRAME_HEADER, wire.FRAME_MAGIC, wire.VERSION, count)
+                      + raw[i * wire.RECORD_SIZE:(i + count) * wire.RECORD_SIZE].tobytes())
+    return frames
+
+
+class Output:
+    name = "output"
+
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def stats(self):
+        return {"records": self.records, "bytes": self.bytes, "errors": self.errors, "dropped": self.dropped}
+
+    def close(self):
+        pass
+
+
+class PtyOutput(Output):
+    """Serial lines on `ports` pty pairs; nodes are spread over ports by id.
+
+    Open self.paths with gateway.open_serial() (or gateway.py --serial).
+    Each port keeps up to `backlog` unread bytes; beyond that new lines are
+    dropped, like a UART overrun.
+    """
+    name = "pty"
+
+    def __init__(self, ports=4, backlog=1 << 20):
+        super().__init__()
+        self.masters = []
+        self.slaves = []
+        self.paths = []
+        for _ in range(ports):
+            master, slave = os.openpty()
+            os.set_blocking(master, False)
+            self.masters.append(master)
+            self.slaves.append(slave)  # kept open so writes don't fail with EIO
+            self.paths.append(os.ttyname(slave))
+        self.pending = [bytearray() for _ in range(ports)]
+        self.backlog = backlog
+
+    def write(self, readings):
+        ports = len(self.masters)
+        port = readings.node % ports
+        order = np.argsort(port, kind="stable")
+        lines = np.frombuffer(encode_lines(Readings(*(column[order] for column in readings))), np.uint8)
+        width = len(_LINE)
+        bounds = np.searchsorted(port[order], np.arange(ports + 1))
+        for p in range(ports):
+            chunk = lines[bounds[p] * width:bounds[p + 1] * width]
+            pending = self.pending[p]
+            if len(pending) + len(chunk) > self.backlog:
+                self.dropped += len(chunk) // width
+            else:
+                pending += chunk.tobytes()
+                self.records += len(chunk) // width
+            self._flush(p)
+
+    def _flush(self, p):
+        pending = self.pending[p]
+        while pending:
+            try:
+                sent = os.write(self.masters[p], pending)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.errors += 1
+                return
+            self.bytes += sent
+            del pending[:sent]
+
+    def close(self):
+        for fd in self.masters + self.slaves:
+            os.close(fd)
+
+
+class UDPOutput(Output):
+    name = "udp"
+
+    def __init__(self, host, port, per_frame=64):
+        super().__init__()
+        import socket
+        self.address = (host, port)
+        self.per_frame = per_frame
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+
+    def write(self, readings):
+        sendto = self.sock.sendto
+        for frame in encode_frames(readings, self.per_frame):
+            try:
+                self.bytes += sendto(frame, self.address)
+                self.records += (len(frame) - wire.FRAME_HEADER_SIZE) // wire.RECORD_SIZE
+            except OSError:
+                self.errors += 1
+
+    def close(self):
+        self.sock.close()
+
+
+class HTTPOutput(Output):
+    """POSTs of up to per_request readings on one keep-alive connection."""
+    name = "http"
+
+    def __init__(self, url, content_type=wire.FRAME_TYPE, per_request=1000, timeout=10.0):
+        super().__init__()
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = parts.path or "/"
+        self.content_type = content_type
+        self.per_request = min(per_request, 0xFFFF)
+        self.timeout = timeout
+        self.connection = None
+        self.latencies = []
+
+    def _post(self, body):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        started = time.perf_counter()
+        self.connection.request("POST", self.path, body, {"Content-Type": self.content_type})
+        response = self.connection.getresponse()
+        response.read()
+        self.latencies.append(time.perf_counter() - started)
+        return response.status
+
+    def write(self, readings):
+        readings = valid(readings)
+        for i in range(0, len(readings.node), self.per_request):
+            block = Readings(*(column[i:i + self.per_request] for column in readings))
+            if self.content_type == wire.FRAME_TYPE:
+                body = encode_frames(block, self.per_request)[0]
+            else:
+                body = encode_json(block)
+            try:
+                status = self._post(body)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                self.dropped += len(block.node)
+                if self.connection is not None:
+                    self.connection.close()
+                    self.connection = None
+                continue
+            if status >= 300:
+                self.errors += 1
+                self.dropped += len(block.node)
+            else:
+                self.records += len(block.node)
+                self.bytes += len(body)
+
+    def stats(self):
+        from telemetry import percentiles
+        out = super().stats()
+        out["latency"] = percentiles(self.latencies)
+        return out
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class FileOutput(Output):
+    """Recorded capture: "jsonl" (gateway JSONL), "frames" (wire frames back to back) or "serial"."""
+    name = "file"
+    FORMATS = {".jsonl": "jsonl", ".bin": "frames", ".frames": "frames", ".log": "serial", ".txt": "serial"}
+
+    def __init__(self, path, format=None):
+        super().__init__()
+        self.format = format or self.FORMATS.get(os.path.splitext(path)[1], "jsonl")
+        self.file = open(path, "wb")
+
+    def write(self, readings):
+        if self.format == "frames":
+            frames = encode_frames(readings, 1024)
+            data = b"".join(frames)
+            self.records += (len(data) - len(frames) * wire.FRAME_HEADER_SIZE) // wire.RECORD_SIZE
+        elif self.format == "serial":
+            data = encode_lines(readings)
+            self.records += len(readings.node)
+        else:
+            data = encode_jsonl(readings)
+            self.records += len(data) // len(_JSONL)
+        self.file.write(data)
+        self.bytes += len(data)
+
+    def close(self):
+        self.file.close()
+
+
+def run(fleet, outputs, rate=None, duration=None, limit=None, report=None, clock=time.perf_counter,
+        sleep=time.sleep):
+    """Generate ticks into every output until duration seconds or exactly limit readings; returns stats.
+
+    With `rate` (readings/s) generation is paced in ~10 ms steps; without
+    it, it runs as fast as generation and the outputs allow.  `report`
+    is called with the running stats about once a second.
+    """
+    if duration is None and limit is None:
+        raise ValueError("give a duration or a limit")
+    step = max(1, int(round((rate * 0.01 if rate else 65536) / fleet.nodes)))
+    started = last_report = clock()
+    k = emitted = failed = 0
+    generate = write = 0.0
+    while True:
+        now = clock()
+        if duration is not None and now - started >= duration:
+            break
+        if limit is not None and emitted >= limit:
+            break
+        t0 = clock()
+        readings = fleet.ticks(k, step)
+        if limit is not None and emitted + len(readings.node) > limit:
+            # The last block stops at the limit, part way through a tick.
+            readings = Readings(*(column[:limit - emitted] for column in readings))
+        t1 = clock()
+        for output in outputs:
+            output.write(readings)
+        generate += t1 - t0
+        write += clock() - t1
+        k += step
+        emitted += len(readings.node)
+        failed += int(np.isnan(readings.temperature).sum())
+        if rate:
+            ahead = started + emitted / rate - clock()
+            if ahead > 0:
+                sleep(ahead)
+        if report is not None and clock() - last_report >= 1.0:
+            last_report = clock()
+            report(_stats(fleet, outputs, started, last_report, k, emitted, failed, rate, generate, write))
+    return _stats(fleet, outputs, started, clock(), k, emitted, failed, rate, generate, write)
+
+
+def _stats(fleet, outputs, started, now, ticks, emitted, failed, rate, generate, write):
+    elapsed = max(now - started, 1e-9)
+    out = {
+        "nodes": fleet.nodes, "ticks": ticks, "virtual_s": ticks * fleet.interval,
+        "readings": emitted, "failed": failed, "elapsed_s": round(elapsed, 3),
+        "target_rate": rate, "rate": round(emitted / elapsed),
+        "generate_s": round(generate, 3), "write_s": round(write, 3), "outputs": {},
+    }
+    for output in outputs:
+        stats = output.stats()
+        stats["rate"] = round(stats["records"] / elapsed)
+        stats["bytes_per_s"] = round(stats["bytes"] / elapsed)
+        out["outputs"][output.name] = stats
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive the data path with a deterministic synthetic fleet.")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", choices=sorted(DHT_MODELS), default="DHT22")
+    parser.add_argument("--interval", type=float, default=60.0, help="virtual seconds between readings")
+    parser.add_argument("--rate", type=float, help="readings per second (default: as fast as possible)")
+    parser.add_argument("--duration", type=float, help="seconds to run")
+    parser.add_argument("--readings", type=int, help="stop after this many readings")
+    parser.add_argument("--failure-rate", type=float, default=0.005)
+    parser.add_argument("--storm-every", type=float, default=6 * 3600.0, help="virtual seconds; 0 disables")
+    parser.add_argument("--storm-length", type=float, default=900.0)
+    parser.add_argument("--storm-fraction", type=float, default=0.2)
+    parser.add_argument("--pty", type=int, default=0, help="serial lines on this many ptys")
+    parser.add_argument("--udp", action="append", default=[], help="host:port to send frames to")
+    parser.add_argument("--http", action="append", default=[], help="URL to POST frames to")
+    parser.add_argument("--json", action="store_true", help="POST JSON instead of frames")
+    parser.add_argument("--sink", action="store_true", help="POST to an in-process localsink.LocalHTTPSink")
+    parser.add_argument("--file", action="append", default=[], help="record to .jsonl, .bin or .log")
+    parser.add_argument("--report", action="store_true", help="print stats every second")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.readings is None:
+        parser.error("give --duration or --readings")
+
+    fleet = Fleet(args.nodes, args.seed, args.model, args.interval, failure_rate=args.failure_rate,
+                  storm_every=args.storm_every, storm_length=args.storm_length,
+                  storm_fraction=args.storm_fraction)
+    outputs = []
+    sink = None
+    if args.pty:
+        pty = PtyOutput(args.pty)
+        print("ptys: %s" % " ".join(pty.paths), file=sys.stderr, flush=True)
+        outputs.append(pty)
+    for spec in args.udp:
+        host, _, port = spec.rpartition(":")
+        outputs.append(UDPOutput(host or "127.0.0.1", int(port)))
+    urls = list(args.http)
+    if args.sink:
+        from localsink import LocalHTTPSink
+        sink = LocalHTTPSink().start()
+        urls.append(sink.url)
+    for url in urls:
+        output = HTTPOutput(url, wire.JSON_TYPE if args.json else wire.FRAME_TYPE)
+        output.name = "http %s" % url
+        outputs.append(output)
+    for path in args.file:
+        output = FileOutput(path)
+        output.name = "file %s" % path
+        outputs.append(output)
+
+    report = (lambda stats: print(json.dumps(stats), flush=True)) if args.report else None
+    try:
+        stats = run(fleet, outputs, args.rate, args.duration, args.readings, report)
+    finally:
+        for output in outputs:
+            output.close()
+        if sink is not None:
+            sink.stop()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Asyncio ingestion gateway for many MCU/ESP-01 nodes.
+
+Step 6's ESP-01 sketch echoes whatever the MCU prints on Serial.  The gateway
+reads those lines from any number of serial ports (or ptys in tests) and UDP
+datagrams at the same time, parses them with serial_parser.StreamParser (one
+per node, so lines split across reads are reassembled) and fans the Readings
+out to sinks (storage, upload, ...).  Every sink has its own bounded queue
+and consumer task, so a slow sink drops its own overflow instead of stalling
+reads from the nodes.
+
+UDP datagrams starting with wire.FRAME_MAGIC are binary reading frames (see
+wire.py) and are decoded directly instead of going through the line parser.
+
+    python gateway.py --serial /dev/ttyUSB0 --udp 0.0.0.0:9999 \\
+        --store readings/ --upload http://your-api-endpoint --outbox outbox/
+
+With --outbox, uploads go through a durable outbox.Outbox on disk, so an
+endpoint outage costs neither readings nor acquisition throughput.
+
+With --filter DHT11 (or DHT22) every reading first goes through a
+faultfilter.FaultFilter: spikes, out-of-range values and stuck sensors are
+dropped before any sink sees them, or with --tag-faults published as
+FlaggedReadings whose `flags` field names the faults.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+from collections import namedtuple
+
+import wire
+from faultfilter import FAULTS, LIMITS, FaultFilter, describe
+from serial_parser import StreamParser
+
+Reading = namedtuple("Reading", "node timestamp temperature humidity")
+FlaggedReading = namedtuple("FlaggedReading", Reading._fields + ("flags",))
+_NAN = float("nan")
+
+
+class NodeStats:
+    __slots__ = ("parser", "records", "first_seen", "last_seen")
+
+    def __init__(self, now):
+        self.parser = StreamParser()
+        self.records = 0
+        self.first_seen = self.last_seen = now
+
+    def as_dict(self):
+        stats = self.parser.stats()
+        stats["records"] = self.records
+        elapsed = self.last_seen - self.first_seen
+        total = stats["readings"] + self.records
+        stats["readings_per_s"] = total / elapsed if elapsed > 0 else 0.0
+        return stats
+
+
+class SinkQueue:
+    """Bounded queue + consumer task in front of one sink.
+
+    `write` receives a list of Readings and may be a plain function or a
+    coroutine function.  Plain functions (file, store and outbox writes) run
+    in the loop's default executor, so their disk I/O never blocks the
+    readers; one batch per sink is in flight at a time.  When the queue is
+    full new readings are dropped and counted rather than blocking the
+    readers.  A write that raises counts its batch in `errors`.
+    """
+
+    def __init__(self, name, write, maxsize=10000, batch=256):
+        self.name = name
+        self.write = write
+        self.batch = batch
+        self.queue = asyncio.Queue(maxsize)
+        self.is_async = asyncio.iscoroutinefunction(write)
+        self.max_depth = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.task = None
+
+    def put(self, reading):
+        try:
+            self.queue.put_nowait(reading)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    async def run(self):
+        queue = self.queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                if self.is_async:
+                    await self.write(batch)
+                else:
+                    await loop.run_in_executor(None, self.write, batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception:
+                self.errors += 1
+            for _ in batch:
+                queue.task_done()
+
+    def stats(self):
+        return {"depth": self.queue.qsize(), "max_depth": self.max_depth, "dropped": self.dropped,
+                "written": self.written, "batches": self.batches, "errors": self.errors}
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, gateway):
+        self.gateway = gateway
+
+    def datagram_received(self, data, addr):
+        if data[:2] == wire.FRAME_MAGIC:
+            try:
+                self.gateway.feed_frame(data)
+            except (ValueError, struct.error):
+                pass
+            return
+        node = self.gateway.udp_names.get(addr[0]) or "%s:%d" % addr[:2]
+        # A datagram always ends a line, even without a trailing newline.
+        self.gateway.feed(node, data, final=True)
+
+
+class Gateway:
+    def __init__(self, queue_size=10000, batch=256, clock=time.time, fault_filter=None):
+        self.queue_size = queue_size
+        self.batch = batch
+        self.clock = clock
+        self.fault_filter = fault_filter
+        self.sinks = []
+        self.nodes = {}
+        self.udp_names = {}
+        self.serial_fds = {}
+        self.transports = []
+        self.started = clock()
+
+    def add_sink(self, name, write, maxsize=None, batch=None):
+        sink = SinkQueue(name, write, maxsize or self.queue_size, batch or self.batch)
+        sink.task = asyncio.get_running_loop().create_task(sink.run())
+        self.sinks.append(sink)
+        return sink
+
+    def feed(self, node, data, final=False):
+        now = self.clock()
+        stats = self.nodes.get(node)
+        if stats is None:
+            stats = self.nodes[node] = NodeStats(now)
+        stats.last_seen = now
+        parser = stats.parser
+        failures = parser.failures
+        parser.feed(data)
+        if final:
+            parser.flush()
+        if self.fault_filter is not None:
+            # Failed reads are not published, but the filter counts NaN bursts.
+            for _ in range(parser.failures - failures):
+                self.fault_filter.check(node, now, _NAN, _NAN)
+        if parser.temperatures:
+            temperatures, humidities = parser.take()
+            for temperature, humidity in zip(temperatures, humidities):
+                # The columns are float32; the MCU prints two decimals.
+                self.publish(Reading(node, now, round(temperature, 2), round(humidity, 2)))
+
+    def feed_frame(self, data):
+        """Publish the records of one binary frame; nodes are named by their hex id."""
+        now = self.clock()
+        records = wire.decode_frame(data)
+        for node_id, seq, timestamp, temperature, humidity in records:
+            node = "%08x" % node_id
+            stats = self.nodes.get(node)
+            if stats is None:
+                stats = self.nodes[node] = NodeStats(now)
+            stats.last_seen = now
+            stats.records += 1
+            self.publish(Reading(node, timestamp, temperature, humidity))
+        return len(records)
+
+    def publish(self, reading):
+        if self.fault_filter is not None:
+            flags = self.fault_filter.check(*reading)
+            if flags:
+                if flags & self.fault_filter.drop:
+                    return
+                reading = FlaggedReading(*reading, describe(flags))
+        for sink in self.sinks:
+            sink.put(reading)
+
+    def open_serial(self, path, node=None, baudrate=9600):
+        fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        if os.isatty(fd):
+            _configure_tty(fd, baudrate)
+        node = node or path
+        self.serial_fds[fd] = node
+        asyncio.get_running_loop().add_reader(fd, self._on_serial, fd, node)
+        return fd
+
+    def _on_serial(self, fd, node):
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # Port unplugged or pty closed.
+            self.close_serial(fd)
+            return
+        self.feed(node, data)
+
+    def close_serial(self, fd):
+        if self.serial_fds.pop(fd, None) is not None:
+            asyncio.get_running_loop().remove_reader(fd)
+            os.close(fd)
+
+    async def open_udp(self, host="0.0.0.0", port=9999, rcvbuf=4 << 20):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPProtocol(self), local_addr=(host, port))
+        # Nodes waking together burst datagrams; the default receive buffer
+        # holds only a few hundred.  The kernel caps this at net.core.rmem_max.
+        sock = transport.get_extra_info("socket")
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+        self.transports.append(transport)
+        return transport
+
+    def metrics(self):
+        return {
+            "uptime_s": self.clock() - self.started,
+            "nodes": {node: stats.as_dict() for node, stats in self.nodes.items()},
+            "sinks": {sink.name: sink.stats() for sink in self.sinks},
+            "faults": None if self.fault_filter is None else self.fault_filter.stats(),
+        }
+
+    async def drain(self):
+        for sink in self.sinks:
+            await sink.queue.join()
+
+    async def close(self):
+        for fd in list(self.serial_fds):
+            self.close_serial(fd)
+        for transport in self.transports:
+            transport.close()
+        await self.drain()
+        for sink in self.sinks:
+            sink.task.cancel()
+
+
+def _configure_tty(fd, baudrate):
+    import termios
+    import tty
+    tty.setraw(fd)
+    attrs = termios.tcgetattr(fd)
+    speed = getattr(termios, "B%d" % baudrate)
+    attrs[4] = attrs[5] = speed
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+
+class JsonlSink:
+    """Storage sink appending one JSON object per reading."""
+
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def __call__(self, batch):
+        self.file.write("".join(json.dumps(reading._asdict()) + "\n" for reading in batch))
+        self.file.flush()
+
+
+def upload_sink(uploader, url):
+    """Upload sink posting each batch through a GatewayUploader without blocking the loop.
+
+    A batch the endpoint does not accept (any non-2xx status) raises OSError,
+    so the sink counts it in `errors` instead of `written`.
+    """
+
+    async def write(batch):
+        body = json.dumps([reading._asdict() for reading in batch])
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(uploader.executor, lambda: uploader.post(
+            url, data=body, headers={"Content-Type": "application/json"}))
+        if not 200 <= response.status_code < 300:
+            raise OSError("upload of %d readings failed: HTTP %d" % (len(batch), response.status_code))
+
+    return write
+
+
+async def _serve(args):
+    fault_filter = None
+    if args.filter:
+        fault_filter = FaultFilter(args.filter, drop=0 if args.tag_faults else FAULTS)
+    gateway = Gateway(queue_size=args.queue_size, fault_filter=fault_filter)
+    if args.jsonl:
+        gateway.add_sink("storage", JsonlSink(args.jsonl))
+    if args.store:
+        from tsstore import TimeSeriesStore, store_sink
+        gateway.add_sink("store", store_sink(TimeSeriesStore(args.store)), batch=4096)
+    uploader = forwarder = outbox = None
+    if args.upload:
+        from uploader import GatewayUploader
+        uploader = GatewayUploader()
+        if args.outbox:
+            from outbox import Forwarder, Outbox, outbox_sink
+            outbox = Outbox(args.outbox)
+            forwarder = Forwarder(outbox, uploader.post, args.upload).start()
+            gateway.add_sink("outbox", outbox_sink(outbox), batch=4096)
+        else:
+            gateway.add_sink("upload", upload_sink(uploader, args.upload))
+    for path in args.serial:
+        gateway.open_serial(path, baudrate=args.baudrate)
+    for spec in args.udp:
+        host, _, port = spec.rpartition(":")
+        await gateway.open_udp(host or "0.0.0.0", int(port))
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            print(json.dumps(gateway.metrics()), flush=True)
+    finally:
+        await gateway.close()
+        if forwarder is not None:
+            forwarder.stop()
+            outbox.close()
+        if uploader is not None:
+            uploader.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Receive readings from serial ports and UDP.")
+    parser.add_argument("--serial", action="append", default=[], help="serial device or pty path")
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--udp", action="append", default=[], help="host:port to listen on")
+    parser.add_argument("--jsonl", help="append readings to this file")
+    parser.add_argument("--store", help="append readings to this tsstore directory")
+    parser.add_argument("--upload", help="forward readings to this endpoint")
+    parser.add_argument("--outbox", help="queue uploads in this directory (store-and-forward)")
+    parser.add_argument("--filter", choices=sorted(LIMITS), help="filter sensor faults for this model")
+    parser.add_argument("--tag-faults", action="store_true", help="tag faulty readings instead of dropping them")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--report", type=float, default=10.0, help="seconds between metric dumps")
+    args = parser.parse_args(argv)
+    if args.outbox and not args.upload:
+        parser.error("--outbox needs --upload")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Batch grading of quiz answer sheets with item statistics.
+
+Answer sheets are read from CSV
+
+    id,Q1,Q2,...            header line (optional)
+    learner-17,B,C,D,,B     one letter per question, empty = not answered
+
+or JSONL, one {"id": ..., "answers": "BCD B"} (string) or
+{"id": ..., "answers": ["B", "C", ...]} (list) object per line.  Responses
+become a (sheets x questions) uint8 matrix of option codes (A=0, B=1, ...,
+MISSING for blank or invalid answers) and are graded against the key with
+NumPy in one pass.  An answer is valid when, after stripping whitespace, it
+is a single option letter in either case, optionally followed by ")" or "."
+("b", " B ", "B)", "c.").  Anything else ("Banana", "dunno") is invalid, in
+every reader and in the interactive quiz.  For files where every line has
+the expected shape the parsers run on the raw bytes without a Python loop
+per sheet; JSONL with escapes (a backslash anywhere) goes through json.loads.
+
+item_statistics() computes per question:
+
+    difficulty       proportion of correct answers (p)
+    discrimination   item-rest point-biserial correlation
+    upper_lower      p in the top 27% minus p in the bottom 27% by score
+    options          how often each option (and "missing") was chosen, overall
+                     and in the top / bottom groups
+
+plus KR-20 reliability for the whole quiz.  The interactive take_quiz() in
+start.py and start2.py checks answers through the same AnswerKey.
+
+    python grader.py sheets.csv --quiz mcu_quiz --report report.json
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+
+import numpy as np
+
+MISSING = 255
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ID_WIDTH = 32
+_JSONL_STRING = re.compile(rb'"id"\s*:\s*"([^"]*)"\s*,\s*"answers"\s*:\s*"([^"]*)"')
+
+
+class AnswerKey:
+    def __init__(self, questions):
+        self.questions = questions
+        self.n_options = np.array([len(q["options"]) for q in questions], dtype=np.uint8)
+        self.codes = np.array([LETTERS.index(q["answer"]) for q in questions], dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, item, answer):
+        """Option code of one typed answer ("b", " B ", "B)" ...), MISSING if invalid."""
+        answer = answer.strip().upper()
+        if len(answer) == 2 and answer[1] in ").":
+            answer = answer[:1]
+        if len(answer) == 1 and answer in LETTERS and LETTERS.index(answer) < self.n_options[item]:
+            return LETTERS.index(answer)
+        return MISSING
+
+    def is_correct(self, item, answer):
+        return self.encode(item, answer) == self.codes[item]
+
+    def encode_bytes(self, chars):
+        """Vectorized encode of a (sheets x items) uint8 array of ASCII letters."""
+        codes = (chars & 0xDF) - np.uint8(65)  # fold lower case, A -> 0
+        return np.where(codes < self.n_options, codes, MISSING).astype(np.uint8)
+
+    def encode_sheets(self, sheets):
+        """Encode lists of answer strings, e.g. the interactive quiz's answers."""
+        out = np.full((len(sheets), len(self)), MISSING, dtype=np.uint8)
+        for row, answers in enumerate(sheets):
+            for item, answer in enumerate(answers[:len(self)]):
+                out[row, item] = self.encode(item, answer or "")
+        return out
+
+
+def grade(key, responses):
+    """Boolean correctness matrix and per-sheet scores."""
+    correct = responses == key.codes
+    return correct, correct.sum(axis=1, dtype=np.int32)
+
+
+def item_statistics(key, responses, correct=None, group=0.27):
+    if correct is None:
+        correct, scores = grade(key, responses)
+    else:
+        scores = correct.sum(axis=1, dtype=np.int32)
+    n, m = responses.shape
+    if not n:
+        return {"sheets": 0, "items": [],
+                "score": {"mean": 0.0, "std": 0.0, "min": 0, "max": 0, "histogram": [0] * (m + 1)},
+                "kr20": None}
+    x = correct.astype(np.float32)
+    difficulty = x.mean(axis=0, dtype=np.float64)
+
+    # Item-rest correlation: correlate each item with the score on the others.
+    rest = scores[:, None].astype(np.float32) - x
+    xc = x - x.mean(axis=0)
+    rc = rest - rest.mean(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        discrimination = (xc * rc).sum(axis=0, dtype=np.float64) / np.sqrt(
+            (xc * xc).sum(axis=0, dtype=np.float64) * (rc * rc).sum(axis=0, dtype=np.float64))
+
+    k = max(1, int(round(n * group)))
+    order = np.argsort(scores, kind="stable")
+    lower, upper = order[:k], order[-k:]
+    upper_lower = correct[upper].mean(axis=0) - correct[lower].mean(axis=0)
+
+    width = int(key.n_options.max()) + 1  # last slot counts missing answers
+    codes = np.minimum(responses, width - 1).astype(np.int64)
+    offsets = np.arange(m, dtype=np.int64) * width
+
+    def distribution(rows):
+        counts = np.bincount((codes[rows] + offsets).ravel(), minlength=m * width)
+        return counts.reshape(m, width)
+
+    everyone = distribution(slice(None))
+    top = distribution(upper)
+    bottom = distribution(lower)
+
+    variance = scores.var()
+    pq = (difficulty * (1 - difficulty)).sum()
+    kr20 = float(m / (m - 1) * (1 - pq / variance)) if m > 1 and variance > 0 else None
+
+    items = []
+    for i in range(m):
+        labels = list(LETTERS[:key.n_options[i]])
+        options = {}
+        for j, label in enumerate(labels + ["missing"]):
+            col = j if label != "missing" else width - 1
+            options[label] = {"count": int(everyone[i, col]),
+                              "share": float(everyone[i, col] / n),
+                              "upper": float(top[i, col] / k), "lower": float(bottom[i, col] / k)}
+        items.append({"question": key.questions[i]["question"], "answer": LETTERS[key.codes[i]],
+                      "difficulty": float(difficulty[i]), "discrimination": float(discrimination[i]),
+                      "upper_lower": float(upper_lower[i]), "options": options})
+    return {
+        "sheets": int(n),
+        "items": items,
+        "score": {"mean": float(scores.mean()), "std": float(scores.std()),
+                  "min": int(scores.min()), "max": int(scores.max()),
+                  "histogram": np.bincount(scores, minlength=m + 1).tolist()},
+        "kr20": kr20,
+    }
+
+
+# Readers
+
+def _ids(data, starts, ends):
+    """Fixed-width byte-string array of data[starts:ends] (truncated to ID_WIDTH)."""
+    width = min(ID_WIDTH, int((ends - starts).max()) if len(starts) else 1) or 1
+    cols = np.arange(width)
+    index = np.minimum(starts[:, None] + cols, len(data) - 1)
+    chars = np.where(cols < (ends - starts)[:, None], data[index], 0).astype(np.uint8)
+    return chars.view("S%d" % width).ravel()
+
+
+def read_csv(path, key):
+    """(ids, responses) from a CSV answer file."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    header = raw[:3].lower() == b"id,"
+    if not raw.endswith(b"\n"):
+        raw += b"\n"
+    data = np.frombuffer(raw, dtype=np.uint8)
+    ends = np.flatnonzero(data == 10)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    keep = ends - starts > (data[np.maximum(ends - 1, 0)] == 13)
+    keep[0] &= not header
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return np.array([], dtype="S1"), np.empty((0, len(key)), dtype=np.uint8)
+    commas = np.flatnonzero(data == 44)
+    commas = commas[commas >= starts[0]]
+    m = len(key)
+    # Fast path: every remaining line has exactly id + m fields and no quoting.
+    per_line = np.diff(np.searchsorted(commas, np.concatenate((starts, [len(data)]))))
+    if (per_line == m).all() and not (data == 34).any():
+        cr = data[ends - 1] == 13
+        pos = commas.reshape(len(starts), m)
+        # Answers padded with whitespace need stripping: leave those to csv.
+        blanks = np.concatenate(([0], np.cumsum((data == 32) | (data == 9) | (data == 11) | (data == 12))))
+        if (blanks[ends] == blanks[pos[:, 0]]).all():
+            field_end = np.empty_like(pos)
+            field_end[:, :-1] = pos[:, 1:]
+            field_end[:, -1] = ends - cr
+            # A letter, optionally followed by ")" or "."; anything else is invalid.
+            width = field_end - pos - 1
+            after = data[np.minimum(pos + 2, len(data) - 1)]
+            single = (width == 1) | ((width == 2) & ((after == 41) | (after == 46)))
+            chars = data[np.minimum(pos + 1, len(data) - 1)]
+            responses = np.where(single, key.encode_bytes(chars), MISSING).astype(np.uint8)
+            return _ids(data, starts, pos[:, 0]), responses
+    return _read_rows(csv.reader(raw.decode().splitlines()), key, header=header)
+
+
+def _read_rows(rows, key, header=False):
+    ids, sheets = [], []
+    for k, row in enumerate(rows):
+        if not row or (header and k == 0):
+            continue
+        ids.append(row[0])
+        sheets.append(row[1:])
+    return np.array(ids, dtype="S%d" % ID_WIDTH), key.encode_sheets(sheets)
+
+
+def read_jsonl(path, key):
+    """(ids, responses) from a JSONL answer file."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    lines = [line for line in raw.splitlines() if line.strip()]
+    m = len(key)
+    # Fast path: {"id": "...", "answers": "ABCD..."} on every line, one letter
+    # per question; the regex scan runs in C instead of json.loads per line.
+    # The regex does not know escapes, so any backslash means json.loads.
+    matches = [] if b"\\" in raw else _JSONL_STRING.findall(raw)
+    if matches and len(matches) == len(lines) and all(len(a) == m for _, a in matches):
+        chars = np.frombuffer(b"".join(a for _, a in matches), dtype=np.uint8).reshape(-1, m)
+        ids = np.array([i for i, _ in matches], dtype="S%d" % ID_WIDTH)
+        return ids, key.encode_bytes(chars)
+    ids, sheets = [], []
+    for line in lines:
+        if line:
+            record = json.loads(line)
+            ids.append(str(record.get("id", len(ids))))
+            sheets.append(list(record["answers"]))
+    return np.array(ids, dtype="S%d" % ID_WIDTH), key.encode_sheets(sheets)
+
+
+def read_sheets(path, key):
+    return read_jsonl(path, key) if path.endswith((".jsonl", ".json")) else read_csv(path, key)
+
+
+# Report
+
+def format_report(stats):
+    kr20 = "n/a" if stats["kr20"] is None else "%.3f" % stats["kr20"]
+    lines = ["%d sheets, mean score %.2f (sd %.2f), KR-20 %s" % (
+        stats["sheets"], stats["score"]["mean"], stats["score"]["std"], kr20), ""]
+    lines.append("%-4s %-6s %10s %14s %11s  %s" % ("item", "answer", "difficulty", "discrimination",
+                                                   "upper-lower", "options (share)"))
+    for i, item in enumerate(stats["items"], 1):
+        options = " ".join("%s %.0f%%" % (label, 100 * o["share"]) for label, o in item["options"].items())
+        flag = ""
+        if item["discrimination"] < 0.2:
+            flag = "  <- low discrimination"
+        lines.append("%-4d %-6s %10.3f %14.3f %11.3f  %s%s" % (
+            i, item["answer"], item["difficulty"], item["discrimination"], item["upper_lower"],
+            options, flag))
+    return "\n".join(lines)
+
+
+def write_scores(path, ids, scores):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "score"])
+        writer.writerows(zip((i.decode() for i in ids), scores.tolist()))
+
+
+def main(argv=None):
+    import content
+    parser = argparse.ArgumentParser(description="Grade quiz answer sheets in batch.")
+    parser.add_argument("sheets", help="answer sheets (.csv or .jsonl)")
+    parser.add_argument("--quiz", default="mcu_quiz", choices=("mcu_quiz", "esp01_quiz"))
+    parser.add_argument("--report", help="write item statistics as JSON here")
+    parser.add_argument("--scores", help="write per-sheet scores as CSV here")
+    args = parser.parse_args(argv)
+
+    key = AnswerKey(content.load()[args.quiz])
+    ids, responses = read_sheets(args.sheets, key)
+    correct, scores = grade(key, responses)
+    stats = item_statistics(key, responses, correct)
+    print(format_report(stats))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(stats, f, indent=2)
+    if args.scores:
+        write_scores(args.scores, ids, scores)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""HTTP view of the guide, pre-rendered and served from memory.
+
+Every section the terminal flows show (overview steps, protocols,
+principles, each detailed step with its code examples, the ESP-01 guide and
+the quiz questions) is rendered once at startup into an HTML page and a
+plain-text page (same path + ".txt", /index.txt for the root).  Each page keeps its body, a
+precomputed gzip body and a strong ETag per representation, so a request
+is a dict lookup and a write:
+
+    Accept-Encoding: gzip      the gzip body (Vary: Accept-Encoding)
+    If-None-Match: <etag>      304 Not Modified, no body
+    Cache-Control: no-cache    browsers revalidate instead of re-downloading
+
+GuideSite(cache=False) renders and compresses on every request instead;
+benchmarks/bench_guide_http.py compares the two.
+
+    python guide_http.py --port 8080
+"""
+import argparse
+import gzip
+import hashlib
+import html
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import content
+
+GZIP_MIN_SIZE = 256
+STYLE = ("body{font-family:sans-serif;max-width:50em;margin:2em auto;padding:0 1em}"
+         "pre{background:#f4f4f4;padding:1em;overflow-x:auto}")
+GUIDES = (("guide", "mcu_guide"), ("esp01", "esp01_guide"))
+
+
+class Page:
+    __slots__ = ("body", "content_type", "etag", "gzip_body", "gzip_etag")
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.etag = '"%s"' % digest
+        self.gzip_body = None
+        self.gzip_etag = None
+        if len(body) >= GZIP_MIN_SIZE:
+            # mtime=0 keeps the gzip bytes, and so the ETag, stable across restarts.
+            compressed = gzip.compress(body, 9, mtime=0)
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+                self.gzip_etag = '"%s-gz"' % digest
+
+
+# Rendering: each page is a list of ("h2" | "p" | "ul" | "pre" | "links", value) parts.
+
+def _step_parts(guide, step):
+    parts = [("h2", step["title"])]
+    for block in step["blocks"]:
+        if block[0] == "text":
+            parts.append(("p", block[1]))
+        elif block[0] == "items":
+            parts.append(("ul", block[1]))
+        elif block[0] == "code":
+            if guide["code_label"]:
+                parts.append(("p", "Code Example:"))
+            parts.append(("pre", block[1]))
+    return parts
+
+
+def _pages(pack):
+    """{path: (title, parts)} for every page of the site."""
+    overview = pack["overview"]
+    pages = {
+        "/steps": ("Basic steps", [("ul", overview["steps"])]),
+        "/protocols": ("Protocols to follow", [("ul", overview["protocols"])]),
+        "/principles": ("Principles to keep in mind", [("ul", overview["principles"])]),
+    }
+    for prefix, name in GUIDES:
+        guide = pack[name]
+        parts = []
+        for n, step in enumerate(guide["steps"], 1):
+            pages["/%s/%d" % (prefix, n)] = (step["title"], _step_parts(guide, step))
+            parts.extend(_step_parts(guide, step))
+        pages["/" + prefix] = (guide["title"], parts)
+    for prefix, name in (("quiz", "mcu_quiz"), ("esp01/quiz", "esp01_quiz")):
+        parts = []
+        for question in pack[name]:
+            parts.append(("h2", question["question"]))
+            parts.append(("ul", question["options"]))
+        pages["/" + prefix] = ("Quiz", parts)
+    index = [("links", [(path, title) for path, (title, _) in pages.items()])]
+    pages["/"] = ("Temperature and Humidity Monitoring System Guide", index)
+    return pages
+
+
+def text_path(path):
+    """Where the plain-text page of `path` is served."""
+    return "/index.txt" if path == "/" else path + ".txt"
+
+
+def render_html(title, parts):
+    out = ['<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>%s</title>'
+           '<style>%s</style></head><body>\n<h1>%s</h1>\n' % (html.escape(title), STYLE, html.escape(title))]
+    for kind, value in parts:
+        if kind == "ul":
+            out.append("<ul>\n%s\n</ul>\n" % "\n".join("<li>%s</li>" % html.escape(item) for item in value))
+        elif kind == "links":
+            out.append("<ul>\n%s\n</ul>\n" % "\n".join(
+                '<li><a href="%s">%s</a> (<a href="%s">text</a>)</li>' % (path, html.escape(title), text_path(path))
+                for path, title in value))
+        elif kind == "pre":
+            out.append("<pre><code>%s</code></pre>\n" % html.escape(value))
+        else:
+            out.append("<%s>%s</%s>\n" % (kind, html.escape(value), kind))
+    out.append("</body></html>\n")
+    return "".join(out).encode()
+
+
+def render_text(title, parts):
+    out = [title, "=" * len(title), ""]
+    for kind, value in parts:
+        if kind == "ul":
+            out.extend(value)
+        elif kind == "links":
+            out.extend("%-14s %s" % link for link in value)
+        elif kind == "h2":
+            out.extend(["", value, "-" * len(value)])
+        else:
+            out.append(value)
+        out.append("")
+    return "\n".join(out).encode()
+
+
+class GuideSite:
+    def __init__(self, pack=None, cache=True):
+        self.pack = pack or content.load()
+        self.cache = cache
+        self.sources = _pages(self.pack)
+        self.pages = {}
+        if cache:
+            for path in self.sources:
+                self.pages[path] = self.render(path)
+                self.pages[text_path(path)] = self.render(text_path(path))
+
+    def render(self, path):
+        text = path.endswith(".txt")
+        source = path
+        if text:
+            source = "/" if path == "/index.txt" else path[:-4]
+            if text_path(source) != path:  # "/.txt"
+                return None
+        try:
+            title, parts = self.sources[source]
+        except KeyError:
+            return None
+        if text:
+            return Page(render_text(title, parts), "text/plain; charset=utf-8")
+        return Page(render_html(title, parts), "text/html; charset=utf-8")
+
+    def get(self, path):
+        if self.cache:
+            return self.pages.get(path)
+        return self.render(path)
+
+
+def accepts_gzip(header):
+    """Whether Accept-Encoding allows gzip: by its own q-value if listed, else by "*"'s."""
+    if not header:
+        return False
+    qs = {}
+    for coding in header.split(","):
+        name, _, params = coding.strip().partition(";")
+        name = name.strip().lower()
+        if name not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            param = param.strip()
+            if param[:2].lower() == "q=":
+                try:
+                    q = float(param[2:])
+                except ValueError:  # a malformed q-value counts as q=0
+                    q = 0.0
+        qs[name] = max(q, qs.get(name, q))
+    return qs.get("gzip", qs.get("*", 0.0)) > 0
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: W/"x" matches "x".
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag[2:] == etag if tag.startswith("W/") else tag == etag:
+            return True
+    return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._serve(True)
+
+    def do_HEAD(self):
+        self._serve(False)
+
+    def _serve(self, send_body):
+        path = self.path.partition("?")[0]
+        if len(path) > 1:
+            path = path.rstrip("/")
+        page = self.server.site.get(path)
+        if page is None:
+            body = b"Not found\n"
+            self.send_response(404)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+        if page.gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding")):
+            body, etag, encoding = page.gzip_body, page.gzip_etag, "gzip"
+        else:
+            body, etag, encoding = page.body, page.etag, None
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", page.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class GuideServer:
+    def __init__(self, host="127.0.0.1", port=8080, site=None):
+        self.site = site or GuideSite()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.site = self.site
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the guide as pre-rendered HTML and text pages.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--no-cache", action="store_true", help="render every request (for comparison)")
+    args = parser.parse_args(argv)
+    server = GuideServer(args.host, args.port, GuideSite(cache=not args.no_cache))
+    print("serving %d pages on %s" % (len(server.site.sources), server.url), flush=True)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""Full-text search over the guide, persisted as a memory-mapped index.
+
+Documents are the overview steps, protocols and principles (one per item),
+every detailed step of both guides (title, text and instruction lists), each
+code example, and the quiz questions of both scripts.  Each document keeps
+its location, e.g. ("mcu_guide", 3) for step 4, so a hit can open that step.
+
+The index is one file, search.index, written next to content.pack and
+rebuilt when the content is newer (like content.load()):
+
+    header, marshalled directory {section: (offset, length)}, then
+    terms         sorted UTF-8 terms, concatenated, with uint32 offsets
+    postings      per term: uint32 doc ids, term frequencies and float32
+                  BM25 impacts (the term's score in that document)
+    keys          per term: uint64 doc << 32 | position of every occurrence
+    docs          one marshalled (title, location, snippet) per document
+
+Opening it maps the file and wraps each array with numpy.frombuffer, so no
+posting is read until a query needs it.  Term lookup is a binary search over
+the sorted terms, which also gives every term with a prefix as one
+contiguous range.  Scores are precomputed, so a query only gathers them:
+each clause adds its impacts into a dense per-document array, clauses are
+ANDed by their match masks, and phrases binary-search the sorted occurrence
+keys of the rarest word in those of the others.  Queries:
+
+    baud rate          both words (AND), ranked with BM25; a word also
+                       matches longer terms it prefixes, at half weight
+    resist*            prefix only
+    "common ground"    phrase; hyphenated words (pull-up) are phrases too
+
+    python guide_search.py "pull-up resistor"
+"""
+import argparse
+import bisect
+import marshal
+import math
+import mmap
+import os
+import re
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+import content
+
+MAGIC = b"THMI"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+INDEX_PATH = os.path.join(content.HERE, "search.index")
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.5
+MAX_EXPANSIONS = 64
+SNIPPET = 120
+
+_TOKEN = re.compile(r"\w+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+Hit = namedtuple("Hit", "score doc title location snippet")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def documents(pack):
+    """(title, text, location) for every searchable piece of the content."""
+    overview = pack["overview"]
+    for section, label in (("steps", "Basic steps"), ("protocols", "Protocols to follow"),
+                           ("principles", "Principles to keep in mind")):
+        for i, item in enumerate(overview[section]):
+            yield label, item, (section, i)
+    for name in ("mcu_guide", "esp01_guide"):
+        guide = pack[name]
+        for i, step in enumerate(guide["steps"]):
+            lines = []
+            for block in step["blocks"]:
+                if block[0] == "text":
+                    lines.append(block[1])
+                elif block[0] == "items":
+                    lines.extend(block[1])
+                elif block[0] == "code":
+                    yield step["title"] + " (code example)", block[1], (name, i)
+            yield step["title"], "\n".join(lines), (name, i)
+    for name in ("mcu_quiz", "esp01_quiz"):
+        for i, question in enumerate(pack[name]):
+            yield "Quiz: " + question["question"], "\n".join(question["options"]), (name, i)
+
+
+def build_index(docs, path=INDEX_PATH):
+    """Write an index of (title, text, location) documents to path."""
+    postings = {}
+    doc_len = []
+    meta = []
+    for doc, (title, text, location) in enumerate(docs):
+        tokens = tokenize(title) + tokenize(text)
+        for position, token in enumerate(tokens):
+            entry = postings.get(token)
+            if entry is None:
+                entry = postings[token] = {}
+            entry.setdefault(doc, []).append(position)
+        doc_len.append(len(tokens))
+        snippet = " ".join(text.split())
+        meta.append(marshal.dumps((title, location, snippet[:SNIPPET])))
+
+    terms = sorted(postings, key=lambda term: term.encode())
+    term_blobs = [term.encode() for term in terms]
+    term_offsets = np.zeros(len(terms) + 1, dtype=np.uint32)
+    term_offsets[1:] = np.cumsum([len(blob) for blob in term_blobs])
+    post_offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+    key_offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+    post_docs, post_tf, keys = [], [], []
+    for t, term in enumerate(terms):
+        entry = postings[term]
+        for doc in sorted(entry):
+            post_docs.append(doc)
+            post_tf.append(len(entry[doc]))
+            keys.extend(doc << 32 | position for position in entry[doc])
+        post_offsets[t + 1] = len(post_docs)
+        key_offsets[t + 1] = len(keys)
+    post_docs = np.array(post_docs, dtype=np.uint32)
+    post_tf = np.array(post_tf, dtype=np.uint32)
+    doc_len = np.array(doc_len, dtype=np.float64)
+    avgdl = doc_len.mean() if len(doc_len) else 1.0
+    df = np.diff(post_offsets).astype(np.float64)
+    idf = np.log(1 + (len(meta) - df + 0.5) / (df + 0.5))
+    norm = K1 * (1 - B + B * doc_len / avgdl)
+    impact = (np.repeat(idf, df.astype(np.int64)) * bm25_tf(post_tf, norm[post_docs])).astype(np.float32)
+    doc_offsets = np.zeros(len(meta) + 1, dtype=np.uint32)
+    doc_offsets[1:] = np.cumsum([len(blob) for blob in meta])
+
+    sections = [
+        ("terms", b"".join(term_blobs)),
+        ("term_offsets", term_offsets.tobytes()),
+        ("post_offsets", post_offsets.tobytes()),
+        ("post_docs", post_docs.tobytes()),
+        ("post_tf", post_tf.tobytes()),
+        ("impact", impact.tobytes()),
+        ("key_offsets", key_offsets.tobytes()),
+        ("keys", np.array(keys, dtype=np.uint64).tobytes()),
+        ("doc_len", doc_len.astype(np.uint32).tobytes()),
+        ("doc_offsets", doc_offsets.tobytes()),
+        ("docs", b"".join(meta)),
+    ]
+    directory = {"n_docs": len(meta), "n_terms": len(terms), "avgdl": float(avgdl)}
+    offset = 0
+    for name, blob in sections:
+        directory[name] = (offset, len(blob))
+        offset += (len(blob) + 7) & ~7  # keep arrays 8-byte aligned
+    directory_blob = marshal.dumps(directory)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        head = HEADER.pack(MAGIC, VERSION, len(directory_blob)) + directory_blob
+        f.write(head + b"\0" * (-len(head) % 8))
+        for _, blob in sections:
+            f.write(blob + b"\0" * (-len(blob) % 8))
+    os.replace(tmp_path, path)
+    return path
+
+
+def bm25_tf(tf, norm):
+    """BM25 term-frequency factor; norm is K1 * (1 - B + B * doc_len / avgdl)."""
+    tf = np.asarray(tf, dtype=np.float64)
+    return tf * (K1 + 1) / (tf + norm)
+
+
+class _Terms:
+    """Sorted term list read straight from the map, for bisect."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        offsets = self.offsets
+        return bytes(self.blob[int(offsets[i]):int(offsets[i + 1])])
+
+
+class SearchIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, directory_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError("%s is not a version %d search index" % (path, VERSION))
+        start = HEADER.size
+        directory = marshal.loads(self._map[start:start + directory_len])
+        base = start + directory_len
+        base += -base % 8
+        self.n_docs = directory["n_docs"]
+        self.avgdl = directory["avgdl"] or 1.0
+        view = memoryview(self._map)
+
+        def section(name, dtype=None):
+            offset, length = directory[name]
+            data = view[base + offset:base + offset + length]
+            return data if dtype is None else np.frombuffer(data, dtype=dtype)
+
+        self.terms = _Terms(section("terms"), section("term_offsets", np.uint32))
+        self.post_offsets = section("post_offsets", np.uint64)
+        self.post_docs = section("post_docs", np.uint32)
+        self.post_tf = section("post_tf", np.uint32)
+        self.impact = section("impact", np.float32)
+        self.key_offsets = section("key_offsets", np.uint64)
+        self.keys = section("keys", np.uint64)
+        self.doc_len = section("doc_len", np.uint32)
+        self.doc_offsets = section("doc_offsets", np.uint32)
+        self.docs = section("docs")
+        self._norm = None
+
+    def close(self):
+        for name in ("terms", "post_offsets", "post_docs", "post_tf", "impact", "key_offsets", "keys",
+                     "doc_len", "doc_offsets", "docs"):
+            setattr(self, name, None)
+        self._map.close()
+
+    def __len__(self):
+        return self.n_docs
+
+    def document(self, doc):
+        """(title, location, snippet) of one document."""
+        offsets = self.doc_offsets
+        return marshal.loads(self.docs[int(offsets[doc]):int(offsets[doc + 1])])
+
+    # Term lookup
+
+    def term_id(self, term):
+        key = term.encode()
+        i = bisect.bisect_left(self.terms, key)
+        return i if i < len(self.terms) and self.terms[i] == key else None
+
+    def prefix_range(self, prefix):
+        key = prefix.encode()
+        return bisect.bisect_left(self.terms, key), bisect.bisect_left(self.terms, key + b"\xff")
+
+    def _postings(self, t):
+        lo, hi = int(self.post_offsets[t]), int(self.post_offsets[t + 1])
+        return self.post_docs[lo:hi], self.impact[lo:hi]
+
+    def _position_keys(self, t):
+        """doc << 32 | position for every occurrence of term t, ascending."""
+        return self.keys[int(self.key_offsets[t]):int(self.key_offsets[t + 1])]
+
+    def _word(self, word, prefix_only):
+        """Dense per-document scores for one query word, exact plus prefix expansions."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        exact = None if prefix_only else self.term_id(word)
+        if exact is not None:
+            docs, impact = self._postings(exact)
+            scores[docs] = impact
+        if prefix_only or len(word) >= 3:
+            lo, hi = self.prefix_range(word)
+            expansions = [t for t in range(lo, hi) if t != exact]
+            if len(expansions) > MAX_EXPANSIONS:
+                df = self.post_offsets[np.array(expansions) + 1] - self.post_offsets[expansions]
+                expansions = [expansions[i] for i in np.argsort(-df.astype(np.int64))[:MAX_EXPANSIONS]]
+            if expansions:
+                weight = 1.0 if prefix_only else PREFIX_WEIGHT
+                docs = np.concatenate([self._postings(t)[0] for t in expansions])
+                impact = np.concatenate([self._postings(t)[1] for t in expansions])
+                scores += weight * np.bincount(docs, impact, minlength=self.n_docs).astype(np.float32)
+        return scores
+
+    def _phrase(self, words):
+        """Dense per-document scores for a phrase, BM25 over phrase occurrences."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        ids = [self.term_id(word) for word in words]
+        if any(t is None for t in ids):
+            return scores
+        if len(ids) == 1:
+            docs, impact = self._postings(ids[0])
+            scores[docs] = impact
+            return scores
+        # Start from the rarest word; every other word must occur at the
+        # same key shifted by its offset in the phrase.
+        order = sorted(range(len(ids)), key=lambda i: self.key_offsets[ids[i] + 1] - self.key_offsets[ids[i]])
+        first = order[0]
+        keys = self._position_keys(ids[first])
+        for i in order[1:]:
+            shift = i - first
+            shifted = keys + np.uint64(shift) if shift >= 0 else keys - np.uint64(-shift)
+            keys = keys[_member(shifted, self._position_keys(ids[i]))]
+            if not len(keys):
+                return scores
+        docs, tf = np.unique((keys >> np.uint64(32)).astype(np.int64), return_counts=True)
+        if self._norm is None:
+            self._norm = K1 * (1 - B + B * self.doc_len / self.avgdl)
+        idf = math.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        scores[docs] = idf * bm25_tf(tf, self._norm[docs])
+        return scores
+
+    def search(self, query, limit=10):
+        """Ranked hits for a query; every word or phrase must match."""
+        total = None
+        for phrase, word in _QUERY.findall(query):
+            tokens = tokenize(phrase or word)
+            if not tokens:
+                continue
+            if phrase or len(tokens) > 1:
+                scores = self._phrase(tokens)
+            else:
+                scores = self._word(tokens[0], word.endswith("*"))
+            if total is None:
+                total, matched = scores, scores > 0
+            else:
+                total += scores
+                matched &= scores > 0
+        if total is None:
+            return []
+        docs = np.flatnonzero(matched)
+        if len(docs) > limit:
+            docs = docs[np.argpartition(-total[docs], limit - 1)[:limit]]
+        docs = docs[np.lexsort((docs, -total[docs]))]
+        hits = []
+        for doc in docs.tolist():
+            title, location, snippet = self.document(doc)
+            hits.append(Hit(float(total[doc]), doc, title, location, snippet))
+        return hits
+
+
+def _member(values, sorted_array):
+    """Mask of values found in sorted_array."""
+    if not len(sorted_array):
+        return np.zeros(len(values), dtype=bool)
+    i = np.searchsorted(sorted_array, values)
+    i[i == len(sorted_array)] = 0
+    return sorted_array[i] == values
+
+
+def is_stale(path=INDEX_PATH):
+    try:
+        index_mtime = os.stat(path).st_mtime
+    except OSError:
+        return True
+    return content.is_stale(content.PACK_PATH) or os.stat(content.PACK_PATH).st_mtime > index_mtime
+
+
+_index = None
+
+
+def load_index(path=INDEX_PATH):
+    """The guide's search index, built (or rebuilt) from the content pack when needed."""
+    global _index
+    default = path == INDEX_PATH
+    if _index is not None and default:
+        return _index
+    pack = content.load()
+    if is_stale(path):
+        try:
+            build_index(documents(pack), path)
+        except OSError:
+            # Read-only install: keep a private copy in the temp directory.
+            import getpass
+            import tempfile
+            path = os.path.join(tempfile.gettempdir(), "thm-search-%s.index" % getpass.getuser())
+            build_index(documents(pack), path)
+    index = SearchIndex(path)
+    if default:
+        _index = index
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the guide, quiz and code examples.")
+    parser.add_argument("query", nargs="+")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+    for hit in load_index().search(" ".join(args.query), args.limit):
+        print("%6.2f  %-50s %s" % (hit.score, hit.title[:50], hit.location))
+        print("        %s" % hit.snippet)
+
+
+if __name__ == "__main__":
+    main()
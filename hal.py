@@ -0,0 +1,349 @@
+"""Hardware abstraction layer for the ESP-01 sensor and upload code.
+
+Two backends expose the same small surface (sensor, wlan, post, deepsleep,
+sleep, ticks_ms):
+
+    MicroPythonBackend  wraps machine/network/dht/urequests on the board
+    SimulatedBackend    DHT11/DHT22 model, fake WLAN and an in-memory HTTP sink
+
+Nothing hardware specific is imported until a backend is built, so start2.py
+and the tools built on it start on plain CPython, and the module itself has
+no CPython-only defaults so it still imports on the board.  get_backend()
+picks MicroPython when `machine` can be imported and the simulator otherwise;
+the THM_BACKEND environment variable ("micropython" or "simulated") overrides
+it.
+"""
+import os
+import time
+
+
+class MicroPythonBackend:
+    name = "micropython"
+
+    def __init__(self, **options):
+        # get_backend()'s options configure the simulator; the board has none.
+        import machine
+        import network
+        import dht
+        self.machine = machine
+        self.network = network
+        self.dht = dht
+        self._urequests = None
+
+    def sensor(self, pin=2, model="DHT11"):
+        return getattr(self.dht, model)(self.machine.Pin(pin))
+
+    def wlan(self):
+        return self.network.WLAN(self.network.STA_IF)
+
+    def post(self, url, json=None, data=None, headers=None):
+        if self._urequests is None:
+            import urequests
+            self._urequests = urequests
+        # Only what is set: urequests iterates headers (default {}), so None would raise.
+        kwargs = {}
+        if json is not None:
+            kwargs["json"] = json
+        if data is not None:
+            kwargs["data"] = data
+        if headers is not None:
+            kwargs["headers"] = headers
+        return self._urequests.post(url, **kwargs)
+
+    def deepsleep(self, ms):
+        self.machine.deepsleep(ms)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def ticks_ms(self):
+        return time.ticks_ms()
+
+
+# DHT11 reports whole degrees/percent, DHT22 tenths; ranges from the datasheets.
+DHT_MODELS = {
+    "DHT11": {"resolution": 1.0, "t_range": (0.0, 50.0), "h_range": (20.0, 90.0), "min_interval": 1.0},
+    "DHT22": {"resolution": 0.1, "t_range": (-40.0, 80.0), "h_range": (0.0, 100.0), "min_interval": 2.0},
+}
+
+
+class SimulatedDHT:
+    """DHT11/DHT22 stand-in with the dht.DHT11 interface.
+
+    Readings are base value + linear drift (per hour) + gaussian noise,
+    quantized to the model's resolution and clipped to its range.  A failed
+    read raises OSError like the MicroPython driver, or returns NaN values like
+    the Arduino library when failure_mode="nan".  `buf` holds the last good
+    read as the sensor sent it, like the driver's.
+    """
+
+    def __init__(self, model="DHT11", temperature=23.0, humidity=45.0, noise=0.3,
+                 drift=0.0, latency=0.0, failure_rate=0.0, failure_mode="oserror",
+                 seed=None, clock=None, sleep=None):
+        import random
+        self.spec = DHT_MODELS[model]
+        self.model = model
+        self.base_temperature = temperature
+        self.base_humidity = humidity
+        self.noise = noise
+        self.drift = drift
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.random = random.Random(seed)
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.started = self.clock()
+        self.reads = 0
+        self.failures = 0
+        self._temperature = float("nan")
+        self._humidity = float("nan")
+        self.buf = bytearray(5)
+
+    def _quantize(self, value, bounds):
+        step = self.spec["resolution"]
+        value = round(value / step) * step
+        return min(max(value, bounds[0]), bounds[1])
+
+    def measure(self):
+        if self.latency:
+            self.sleep(self.latency)
+        self.reads += 1
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self.failures += 1
+            if self.failure_mode == "nan":
+                self._temperature = self._humidity = float("nan")
+                return
+            raise OSError(110, "ETIMEDOUT")
+        hours = (self.clock() - self.started) / 3600.0
+        gauss = self.random.gauss
+        temperature = self.base_temperature + self.drift * hours + gauss(0.0, self.noise)
+        humidity = self.base_humidity + gauss(0.0, self.noise * 3)
+        self._temperature = self._quantize(temperature, self.spec["t_range"])
+        self._humidity = self._quantize(humidity, self.spec["h_range"])
+        buf = self.buf
+        if self.model == "DHT11":
+            self._temperature = int(self._temperature)
+            self._humidity = int(self._humidity)
+            # Whole units, tenths bytes left at 0
+            buf[0], buf[1], buf[2], buf[3] = self._humidity, 0, self._temperature, 0
+        else:
+            # Tenths as 16-bit big-endian, the temperature's sign in bit 15
+            humidity = int(round(self._humidity * 10))
+            temperature = int(round(abs(self._temperature) * 10))
+            buf[0], buf[1] = humidity >> 8, humidity & 0xFF
+            buf[2] = temperature >> 8 | (0x80 if self._temperature < 0 else 0)
+            buf[3] = temperature & 0xFF
+        buf[4] = (buf[0] + buf[1] + buf[2] + buf[3]) & 0xFF
+
+    def temperature(self):
+        return self._temperature
+
+    def humidity(self):
+        return self._humidity
+
+
+class SimulatedWLAN:
+    """network.WLAN stand-in: association completes some time after connect().
+
+    connect() takes `latency` seconds to associate, plus `scan_latency` when
+    no bssid is given (the station scans all channels first) and
+    `dhcp_latency` unless ifconfig() set a static address.  `aps` lists
+    (ssid, bssid, channel, rssi) of visible access points; by default any
+    SSID is answered by one AP that scan() does not list.  A connect fails with STAT_CONNECT_FAIL with
+    probability `failure_rate`, and with STAT_NO_AP_FOUND after the scan time
+    when the SSID or requested bssid is not visible.
+    """
+
+    STAT_IDLE = 0
+    STAT_CONNECTING = 1
+    STAT_WRONG_PASSWORD = 2
+    STAT_NO_AP_FOUND = 3
+    STAT_CONNECT_FAIL = 4
+    STAT_GOT_IP = 5
+
+    DEFAULT_BSSID = b"\x02\x00\x5e\x10\x00\x01"
+
+    def __init__(self, latency=1.5, failure_rate=0.0, seed=None, clock=None,
+                 ip=("192.168.4.2", "255.255.255.0", "192.168.4.1", "8.8.8.8"),
+                 scan_latency=0.0, dhcp_latency=0.0, aps=None, sleep=None):
+        import random
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.scan_latency = scan_latency
+        self.dhcp_latency = dhcp_latency
+        self.aps = aps
+        self.random = random.Random(seed)
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.ip = ip
+        self.static = False
+        self.bssid = None
+        self.channel = None
+        self._active = False
+        self._status = self.STAT_IDLE
+        self._ready_at = None
+        self._final = None
+        self.connects = 0
+        self.scans = 0
+
+    def _visible(self, ssid):
+        if self.aps is None:
+            return [(ssid, self.DEFAULT_BSSID, 6, -60)]
+        return [ap for ap in self.aps if ap[0] == ssid]
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+        if not self._active:
+            self.disconnect()
+
+    def connect(self, ssid=None, password=None, bssid=None, **kwargs):
+        self.connects += 1
+        delay = self.latency
+        candidates = self._visible(ssid)
+        if bssid is None:
+            delay += self.scan_latency
+        else:
+            candidates = [ap for ap in candidates if ap[1] == bytes(bssid)]
+        self._status = self.STAT_CONNECTING
+        self._ready_at = self.clock() + delay
+        if not candidates:
+            self._ready_at = self.clock() + self.latency + self.scan_latency
+            self._final = self.STAT_NO_AP_FOUND
+        elif self.failure_rate and self.random.random() < self.failure_rate:
+            self._final = self.STAT_CONNECT_FAIL
+        else:
+            if not self.static:
+                self._ready_at += self.dhcp_latency
+            best = max(candidates, key=lambda ap: ap[3])
+            self.bssid, self.channel = best[1], best[2]
+            self._final = self.STAT_GOT_IP
+
+    def disconnect(self):
+        self._status = self.STAT_IDLE
+        self._ready_at = None
+        self._final = None
+
+    def status(self, param=None):
+        if self._status == self.STAT_CONNECTING and self.clock() >= self._ready_at:
+            self._status = self._final
+        return self._status
+
+    def isconnected(self):
+        return self._active and self.status() == self.STAT_GOT_IP
+
+    def ifconfig(self, config=None):
+        if config is not None:
+            self.ip = tuple(config)
+            self.static = True
+        return self.ip
+
+    def scan(self):
+        self.scans += 1
+        if self.scan_latency:
+            self.sleep(self.scan_latency)
+        aps = self.aps or []
+        # (ssid, bssid, channel, RSSI, authmode, hidden) like network.WLAN.scan()
+        return [(ssid.encode() if isinstance(ssid, str) else ssid, bssid, channel, rssi, 3, False)
+                for ssid, bssid, channel, rssi in aps]
+
+    def config(self, *args, **kwargs):
+        if args == ("channel",):
+            return self.channel
+        return None
+
+
+class SimulatedResponse:
+    def __init__(self, status_code=200, text="OK"):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+
+    def json(self):
+        import json
+        return json.loads(self.text)
+
+    def close(self):
+        pass
+
+
+class HTTPSink:
+    """In-memory endpoint for urequests.post; records every request it receives."""
+
+    def __init__(self, latency=0.0, keep=True, sleep=None):
+        self.latency = latency
+        self.keep = keep
+        self.sleep = sleep or time.sleep
+        self.down = False
+        self.requests = []
+        self.count = 0
+        self.bytes = 0
+
+    def post(self, url, json=None, data=None, headers=None):
+        if self.latency:
+            self.sleep(self.latency)
+        if self.down:
+            raise OSError(113, "EHOSTUNREACH")
+        if json is not None:
+            import json as _json
+            data = _json.dumps(json)
+        if isinstance(data, str):
+            data = data.encode()
+        body = data or b""
+        self.count += 1
+        self.bytes += len(body)
+        if self.keep:
+            self.requests.append((url, headers, body))
+        return SimulatedResponse()
+
+
+class SimulatedBackend:
+    name = "simulated"
+
+    def __init__(self, sensor_options=None, wlan_options=None, sink=None):
+        self.sensor_options = sensor_options or {}
+        self.wlan_options = wlan_options or {}
+        self.sink = sink or HTTPSink()
+        self.slept_ms = 0
+        self._wlan = None
+
+    def sensor(self, pin=2, model="DHT11"):
+        return SimulatedDHT(model, **self.sensor_options)
+
+    def wlan(self):
+        # network.WLAN(STA_IF) returns the same interface object every time.
+        if self._wlan is None:
+            self._wlan = SimulatedWLAN(**self.wlan_options)
+        return self._wlan
+
+    def post(self, url, json=None, data=None, headers=None):
+        return self.sink.post(url, json=json, data=data, headers=headers)
+
+    def deepsleep(self, ms):
+        self.slept_ms += ms
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def ticks_ms(self):
+        return int(time.monotonic() * 1000)
+
+
+BACKENDS = {
+    "micropython": MicroPythonBackend,
+    "simulated": SimulatedBackend,
+}
+
+
+def get_backend(name=None, **options):
+    # MicroPython's os has no environ.
+    name = name or getattr(os, "environ", {}).get("THM_BACKEND")
+    if name:
+        return BACKENDS[name](**options)
+    try:
+        import machine  # noqa: F401
+    except ImportError:
+        return SimulatedBackend(**options)
+    return MicroPythonBackend(**options)
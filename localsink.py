@@ -0,0 +1,107 @@
+"""Local HTTP stand-in for `api_endpoint`, used by the benchmarks.
+
+Runs a threaded HTTP/1.1 server on 127.0.0.1 that accepts any POST, counts
+connections, requests and bytes on the wire, and can be switched down (503)
+or slowed down to exercise retry and backpressure paths:
+
+    with LocalHTTPSink() as sink:
+        post(sink.url, ...)
+        print(sink.stats())
+"""
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without NODELAY a
+        # keep-alive client stalls ~40 ms per request on delayed ACKs.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.sink._count("connections", 0)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, body=b"OK"):
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        sink = self.server.sink
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        head = len(self.requestline) + 2 + len(self.headers.as_bytes())
+        if sink.latency:
+            time.sleep(sink.latency)
+        if sink.down:
+            sink._count("rejected", head + len(body))
+            self._reply(503, b"down")
+            return
+        sink._count("requests", head + len(body))
+        if sink.keep:
+            with sink.lock:
+                sink.bodies.append((self.path, self.headers.get("Content-Type"), body))
+        self._reply(200)
+
+    do_PUT = do_POST
+
+
+class LocalHTTPSink:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, keep=False):
+        self.latency = latency
+        self.keep = keep
+        self.down = False
+        self.lock = threading.Lock()
+        self.bodies = []
+        self.counts = {"connections": 0, "requests": 0, "rejected": 0, "bytes": 0}
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://%s:%d/readings" % (host, port)
+
+    def _count(self, key, nbytes):
+        with self.lock:
+            if key == "connections":
+                self.counts["connections"] += 1
+            else:
+                self.counts[key] += 1
+                self.counts["bytes"] += nbytes
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self.lock:
+            for key in self.counts:
+                self.counts[key] = 0
+            del self.bodies[:]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
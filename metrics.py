@@ -0,0 +1,191 @@
+"""Rolling statistics and derived climate metrics for sensor readings.
+
+Per node, MetricsEngine keeps a sliding window over temperature and humidity
+with O(1) amortized work per sample:
+
+    mean / variance   Welford's update, with the inverse update on eviction
+    min / max         monotonic deques
+
+The window holds the last `size` samples and, if `max_age` is set, only
+samples from the last `max_age` seconds.  Derived metrics (dew point,
+absolute humidity, heat index) are NumPy functions that accept scalars or
+whole history arrays, so the same code serves a snapshot of one node and a
+bulk recompute over stored readings.
+
+The engine's update() has the AcquisitionPipeline listener signature:
+
+    engine = MetricsEngine(size=60)
+    pipeline.add_listener(engine.update)
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+
+class RollingWindow:
+    __slots__ = ("size", "max_age", "values", "times", "mins", "maxs",
+                 "seq", "count", "mean", "m2")
+
+    def __init__(self, size=60, max_age=None):
+        self.size = size
+        self.max_age = max_age
+        self.values = deque()
+        self.times = deque()
+        self.mins = deque()  # (seq, value), values increasing
+        self.maxs = deque()  # (seq, value), values decreasing
+        self.seq = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, timestamp, value):
+        seq = self.seq
+        self.seq += 1
+        self.values.append(value)
+        self.times.append(timestamp)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        mins = self.mins
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append((seq, value))
+        maxs = self.maxs
+        while maxs and maxs[-1][1] <= value:
+            maxs.pop()
+        maxs.append((seq, value))
+
+        while self.count > self.size or (
+                self.max_age is not None and timestamp - self.times[0] > self.max_age):
+            self._evict()
+
+    def _evict(self):
+        value = self.values.popleft()
+        self.times.popleft()
+        oldest = self.seq - self.count
+        self.count -= 1
+        if self.count:
+            old_mean = self.mean
+            self.mean -= (value - self.mean) / self.count
+            self.m2 -= (value - old_mean) * (value - self.mean)
+            if self.m2 < 0.0:
+                self.m2 = 0.0
+        else:
+            self.mean = self.m2 = 0.0
+        if self.mins[0][0] == oldest:
+            self.mins.popleft()
+        if self.maxs[0][0] == oldest:
+            self.maxs.popleft()
+
+    @property
+    def min(self):
+        return self.mins[0][1] if self.mins else math.nan
+
+    @property
+    def max(self):
+        return self.maxs[0][1] if self.maxs else math.nan
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def as_dict(self):
+        return {"count": self.count, "mean": self.mean if self.count else math.nan,
+                "min": self.min, "max": self.max, "std": math.sqrt(self.variance)}
+
+
+class MetricsEngine:
+    def __init__(self, size=60, max_age=None):
+        self.size = size
+        self.max_age = max_age
+        self.nodes = {}
+        self.latest = {}
+
+    def update(self, node, timestamp, temperature, humidity):
+        windows = self.nodes.get(node)
+        if windows is None:
+            windows = self.nodes[node] = (RollingWindow(self.size, self.max_age),
+                                          RollingWindow(self.size, self.max_age))
+        windows[0].push(timestamp, temperature)
+        windows[1].push(timestamp, humidity)
+        self.latest[node] = (timestamp, temperature, humidity)
+
+    def snapshot(self, node):
+        temperature_window, humidity_window = self.nodes[node]
+        timestamp, temperature, humidity = self.latest[node]
+        return {
+            "timestamp": timestamp,
+            "temperature": temperature_window.as_dict(),
+            "humidity": humidity_window.as_dict(),
+            "dew_point": float(dew_point(temperature, humidity)),
+            "absolute_humidity": float(absolute_humidity(temperature, humidity)),
+            "heat_index": float(heat_index(temperature, humidity)),
+        }
+
+    def snapshots(self):
+        return {node: self.snapshot(node) for node in self.nodes}
+
+
+def dew_point(temperature, humidity):
+    """Dew point in °C (Magnus formula, Sonntag constants)."""
+    t = np.asarray(temperature, dtype=np.float64)
+    rh = np.clip(np.asarray(humidity, dtype=np.float64), 1e-3, 100.0)
+    gamma = np.log(rh / 100.0) + 17.62 * t / (243.12 + t)
+    return 243.12 * gamma / (17.62 - gamma)
+
+
+def absolute_humidity(temperature, humidity):
+    """Water vapour density in g/m³."""
+    t = np.asarray(temperature, dtype=np.float64)
+    rh = np.asarray(humidity, dtype=np.float64)
+    saturation = 6.112 * np.exp(17.67 * t / (t + 243.5))
+    return saturation * rh * 2.1674 / (273.15 + t)
+
+
+def heat_index(temperature, humidity):
+    """Heat index in °C using the NWS Rothfusz regression and its adjustments."""
+    t = np.asarray(temperature, dtype=np.float64) * 1.8 + 32.0
+    rh = np.asarray(humidity, dtype=np.float64)
+    simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+    full = (-42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh
+            - 6.83783e-3 * t * t - 5.481717e-2 * rh * rh + 1.22874e-3 * t * t * rh
+            + 8.5282e-4 * t * rh * rh - 1.99e-6 * t * t * rh * rh)
+    dry = (rh < 13.0) & (t >= 80.0) & (t <= 112.0)
+    full = np.where(dry, full - (13.0 - rh) / 4.0 * np.sqrt(np.abs(17.0 - np.abs(t - 95.0)) / 17.0), full)
+    humid = (rh > 85.0) & (t >= 80.0) & (t <= 87.0)
+    full = np.where(humid, full + (rh - 85.0) / 10.0 * (87.0 - t) / 5.0, full)
+    # NWS: use the simple formula when its average with T is below 80 °F
+    result = np.where((simple + t) / 2.0 < 80.0, simple, full)
+    return (result - 32.0) / 1.8
+
+
+def derive(temperature, humidity):
+    """Derived metrics for whole history arrays in one vectorized pass each."""
+    return {"dew_point": dew_point(temperature, humidity),
+            "absolute_humidity": absolute_humidity(temperature, humidity),
+            "heat_index": heat_index(temperature, humidity)}
+
+
+def rolling_mean(values, size):
+    """Trailing mean over `size` samples for a history array (cumulative-sum form)."""
+    values = np.asarray(values, dtype=np.float64)
+    csum = np.cumsum(values)
+    out = np.empty_like(values)
+    n = min(size, len(values))
+    out[:n] = csum[:n] / np.arange(1, n + 1)
+    out[n:] = (csum[n:] - csum[:-n]) / size
+    return out
+
+
+def metrics_sink(engine):
+    """Gateway sink feeding batches of gateway.Reading into a MetricsEngine."""
+
+    def write(batch):
+        update = engine.update
+        for reading in batch:
+            update(reading.node, reading.timestamp, reading.temperature, reading.humidity)
+
+    return write
@@ -0,0 +1,365 @@
+"""CPython stand-ins for the MicroPython modules used by firmware.py.
+
+Board.install() puts `machine`, `network`, `dht`, `esp`, `utime`, `usocket`,
+`urequests`, `ntptime` and `micropython` modules into sys.modules.  They
+share the board's virtual clock, so nothing really sleeps: DHT reads, Wi-Fi
+association, HTTP and NTP round trips and sleep_ms() advance the clock, and
+machine.deepsleep()/esp.deepsleep() end the wake by raising DeepSleep.
+utime.time() is the RTC: it counts from 2000-01-01 at power-up until
+ntptime.settime() sets it to the board's real time (`start`).
+
+Board.wake(entry) runs one boot (entry is usually firmware.main) and records:
+
+    duration_ms    virtual time from boot until deep sleep
+    radio_on_ms    time the Wi-Fi radio was powered during the wake
+    alloc_peak     peak bytes allocated during the wake (tracemalloc)
+    alloc_blocks   memory blocks still allocated when the wake ended
+    alloc_locked   bytes that firmware.py allocated between
+                   micropython.heap_lock() and heap_unlock() and still held
+                   (None if the wake never locked the heap)
+    sent           bytes received by the HTTP sink during the wake
+
+RTC memory and the next boot's RF mode persist across wakes like on the
+board.  Allocation numbers are CPython's, so they are only meaningful
+relative to each other (e.g. firmware.py vs the guide's Step 6 loop).
+
+With the heap locked, allocating raises MemoryError like on the board as
+far as CPython lets the stubs see it: DHT22 temperature()/humidity() (which
+return floats) raise right away, and heap_unlock() raises when firmware.py
+frames (LOCKED_FILES) hold new memory.  The stubs' own CPython allocations
+are not counted, and neither are objects firmware.py frees again before
+unlocking, since CPython boxes ints that MicroPython keeps small.
+
+    board = Board(sensor_options={"seed": 1})
+    with board:
+        import firmware
+        for _ in range(144):
+            board.wake(firmware.main)
+    print(board.summary())
+"""
+import sys
+import time
+import tracemalloc
+import types
+
+import hal
+
+DEEPSLEEP_RESET = 5
+PWRON_RESET = 0
+RTC_MEMORY = 492
+# Frames whose allocations count against micropython.heap_lock().
+LOCKED_FILES = ("*firmware.py",)
+# Seconds between the Unix epoch and MicroPython's 2000 epoch.
+EPOCH_2000 = 946684800
+
+
+class DeepSleep(BaseException):
+    """Raised by the deepsleep() stubs to end a wake."""
+
+    def __init__(self, ms, radio=True):
+        super().__init__(ms)
+        self.ms = ms
+        self.radio = radio
+
+
+class StubWLAN(hal.SimulatedWLAN):
+    """SimulatedWLAN that accounts the time the radio is powered."""
+
+    def __init__(self, board, **options):
+        super().__init__(clock=board.seconds, sleep=board.advance_s, **options)
+        self.board = board
+        self.on_since = None
+        self.on_ms = 0.0
+
+    def active(self, state=None):
+        if state is not None:
+            if state and self.on_since is None:
+                self.on_since = self.board.now_ms
+            elif not state and self.on_since is not None:
+                self.on_ms += self.board.now_ms - self.on_since
+                self.on_since = None
+        return super().active(state)
+
+    def power_off(self):
+        self.active(False)
+        on_ms, self.on_ms = self.on_ms, 0.0
+        return on_ms
+
+
+class StubDHT(hal.SimulatedDHT):
+    """SimulatedDHT whose DHT22 readings need the heap, like the driver's floats."""
+
+    def __init__(self, board, model, **options):
+        super().__init__(model, clock=board.seconds, sleep=board.advance_s, **options)
+        self.board = board
+
+    def temperature(self):
+        if self.model != "DHT11":
+            self.board.allocate()
+        return super().temperature()
+
+    def humidity(self):
+        if self.model != "DHT11":
+            self.board.allocate()
+        return super().humidity()
+
+
+class StubSocket:
+    """usocket.socket carrying one HTTP request to the board's HTTPSink."""
+
+    def __init__(self, board):
+        self.board = board
+        self.out = bytearray()
+        self.reply = b""
+
+    def connect(self, address):
+        if not self.board.wlan.isconnected():
+            raise OSError(113, "EHOSTUNREACH")
+        self.board.advance(self.board.rtt_ms)
+        self.address = address
+
+    def write(self, data):
+        self.out += data
+        return len(data)
+
+    def readinto(self, buf):
+        if not self.reply:
+            self.reply = self._exchange()
+        n = min(len(buf), len(self.reply))
+        buf[:n] = self.reply[:n]
+        self.reply = self.reply[n:]
+        return n
+
+    def _exchange(self):
+        head, _, body = bytes(self.out).partition(b"\r\n\r\n")
+        lines = head.decode().split("\r\n")
+        path = lines[0].split()[1]
+        headers = dict(line.split(":", 1) for line in lines[1:])
+        headers = {k.strip(): v.strip() for k, v in headers.items()}
+        host = headers.get("Host", "%s:%d" % self.address)
+        self.board.advance(self.board.rtt_ms)
+        try:
+            response = self.board.sink.post("http://%s%s" % (host, path), data=body, headers=headers)
+        except OSError:
+            return b"HTTP/1.0 503 Service Unavailable\r\n\r\n"
+        return b"HTTP/1.0 %d OK\r\n\r\n" % response.status_code
+
+    def close(self):
+        pass
+
+
+class Board:
+    def __init__(self, sensor_options=None, wlan_options=None, sink=None, model="DHT11",
+                 rtt_ms=30.0, boot_ms=60.0, unique_id=b"\x00\xc0\xff\xee", start=1_700_000_000):
+        self.now_ms = (start - EPOCH_2000) * 1000.0
+        self.rtc_offset_ms = self.now_ms  # RTC unset: 0 at power-up
+        self.sink = sink or hal.HTTPSink(sleep=self.advance_s)
+        self.rtt_ms = rtt_ms
+        self.boot_ms = boot_ms
+        self.unique_id = unique_id
+        self.rtc_memory = b""
+        self.reset_cause = PWRON_RESET
+        self.radio_at_boot = True
+        options = {"latency": 0.005}
+        options.update(sensor_options or {})
+        self.sensor = StubDHT(self, model, **options)
+        self.wlan = StubWLAN(self, **(wlan_options or {}))
+        self.wakes = []
+        self.heap_locked = False
+        self._saved = None
+
+    # Virtual clock
+
+    def seconds(self):
+        return self.now_ms / 1000.0
+
+    def advance(self, ms):
+        self.now_ms += ms
+
+    def advance_s(self, seconds):
+        self.now_ms += seconds * 1000.0
+
+    # Modules
+
+    def modules(self):
+        board = self
+
+        machine = types.ModuleType("machine")
+        machine.DEEPSLEEP_RESET = DEEPSLEEP_RESET
+        machine.PWRON_RESET = PWRON_RESET
+        machine.Pin = lambda pin, *args, **kwargs: pin
+        machine.reset_cause = lambda: board.reset_cause
+        machine.unique_id = lambda: board.unique_id
+        machine.deepsleep = lambda ms=0: board._sleep(ms, True)
+
+        class RTC:
+            def memory(self, data=None):
+                if data is None:
+                    return board.rtc_memory
+                if len(data) > RTC_MEMORY:
+                    raise ValueError("buffer too long")
+                board.rtc_memory = bytes(data)
+
+        machine.RTC = RTC
+
+        network = types.ModuleType("network")
+        network.STA_IF = 0
+        network.AP_IF = 1
+        for name in ("STAT_IDLE", "STAT_CONNECTING", "STAT_WRONG_PASSWORD", "STAT_NO_AP_FOUND",
+                     "STAT_CONNECT_FAIL", "STAT_GOT_IP"):
+            setattr(network, name, getattr(hal.SimulatedWLAN, name))
+        network.WLAN = lambda interface=0: board.wlan
+
+        dht = types.ModuleType("dht")
+        dht.DHT11 = dht.DHT22 = lambda pin: board.sensor
+
+        esp = types.ModuleType("esp")
+        esp.deepsleep = lambda us=0, option=0: board._sleep(us / 1000.0, option != 4)
+
+        utime = types.ModuleType("utime")
+        utime.ticks_ms = lambda: int(board.now_ms)
+        utime.ticks_add = lambda ticks, delta: ticks + delta
+        utime.ticks_diff = lambda a, b: a - b
+        utime.sleep_ms = board.advance
+        utime.sleep = board.advance_s
+        utime.time = lambda: int((board.now_ms - board.rtc_offset_ms) // 1000)
+        utime.gmtime = lambda secs=None: time.gmtime(
+            EPOCH_2000 + (utime.time() if secs is None else secs))[:8]
+
+        usocket = types.ModuleType("usocket")
+        usocket.socket = lambda *args: StubSocket(board)
+        usocket.getaddrinfo = lambda host, port, *args: [(2, 1, 0, "", (host, port))]
+
+        urequests = types.ModuleType("urequests")
+        urequests.post = self._urequests_post
+
+        ntptime = types.ModuleType("ntptime")
+        ntptime.host = "pool.ntp.org"
+        ntptime.settime = self._ntp_settime
+
+        micropython = types.ModuleType("micropython")
+        micropython.const = lambda value: value
+        micropython.heap_lock = self._heap_lock
+        micropython.heap_unlock = self._heap_unlock
+
+        return {"machine": machine, "network": network, "dht": dht, "esp": esp, "utime": utime,
+                "usocket": usocket, "urequests": urequests, "ntptime": ntptime, "micropython": micropython}
+
+    def _ntp_settime(self):
+        if not self.wlan.isconnected():
+            raise OSError(113, "EHOSTUNREACH")
+        self.advance(self.rtt_ms)
+        self.rtc_offset_ms = 0.0
+
+    def _urequests_post(self, url, json=None, data=None, headers=None):
+        if not self.wlan.isconnected():
+            raise OSError(113, "EHOSTUNREACH")
+        self.advance(2 * self.rtt_ms)
+        return self.sink.post(url, json=json, data=data, headers=headers)
+
+    def install(self):
+        modules = self.modules()
+        self._saved = {name: sys.modules.get(name) for name in modules}
+        sys.modules.update(modules)
+        # firmware.py binds the modules at import time.
+        sys.modules.pop("firmware", None)
+
+    def uninstall(self):
+        for name, module in (self._saved or {}).items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        sys.modules.pop("firmware", None)
+        self._saved = None
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    # Wakes
+
+    def allocate(self):
+        """Called by stubs whose board counterpart allocates."""
+        if self.heap_locked:
+            raise MemoryError("memory allocation failed, heap is locked")
+
+    def _held(self):
+        # Snapshots are traced too: keep them out of the wake's peak.
+        self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+        filters = [tracemalloc.Filter(True, pattern) for pattern in LOCKED_FILES]
+        held = sum(stat.size for stat in
+                   tracemalloc.take_snapshot().filter_traces(filters).statistics("filename"))
+        tracemalloc.reset_peak()
+        return held
+
+    def _heap_lock(self):
+        self._locked_at = self._held()
+        self.heap_locked = True
+
+    def _heap_unlock(self):
+        self.heap_locked = False
+        grown = max(0, self._held() - self._locked_at)
+        self._locked = (self._locked or 0) + grown
+        if grown:
+            raise MemoryError("memory allocation failed, heap is locked")
+
+    def _sleep(self, ms, radio):
+        raise DeepSleep(ms, radio)
+
+    def wake(self, entry):
+        """Run one boot of entry(); returns the wake's stats."""
+        started = self.now_ms
+        bytes_before = self.sink.bytes
+        self.advance(self.boot_ms)
+        if self.radio_at_boot:
+            # The ESP8266 powers and calibrates the radio at boot unless the
+            # previous deep sleep disabled RF.
+            self.wlan.active(True)
+        self._locked = None
+        self._peak = 0
+        self.heap_locked = False
+        tracemalloc.start()
+        blocks = sys.getallocatedblocks()
+        try:
+            entry()
+        except DeepSleep as sleep:
+            request = sleep
+        else:
+            request = None
+        blocks = sys.getallocatedblocks() - blocks
+        peak = max(tracemalloc.get_traced_memory()[1], self._peak)
+        tracemalloc.stop()
+        stats = {
+            "duration_ms": self.now_ms - started,
+            "radio_on_ms": self.wlan.power_off(),
+            "alloc_peak": peak,
+            "alloc_blocks": blocks,
+            "alloc_locked": self._locked,
+            "sent": self.sink.bytes - bytes_before,
+        }
+        self.wakes.append(stats)
+        if request is None:
+            raise RuntimeError("wake returned without entering deep sleep")
+        self.reset_cause = DEEPSLEEP_RESET
+        self.radio_at_boot = request.radio
+        self.advance(request.ms)
+        return stats
+
+    def summary(self):
+        wakes = self.wakes
+        n = len(wakes) or 1
+        return {
+            "wakes": len(wakes),
+            "mean_wake_ms": sum(w["duration_ms"] for w in wakes) / n,
+            "radio_on_s": sum(w["radio_on_ms"] for w in wakes) / 1000.0,
+            "mean_alloc_peak": sum(w["alloc_peak"] for w in wakes) / n,
+            "max_alloc_peak": max((w["alloc_peak"] for w in wakes), default=0),
+            "max_alloc_locked": max((w["alloc_locked"] for w in wakes
+                                     if w["alloc_locked"] is not None), default=None),
+            "posts": self.sink.count,
+            "bytes_sent": self.sink.bytes,
+        }
@@ -0,0 +1,366 @@
+"""Durable store-and-forward queue for uploads to `api_endpoint`.
+
+Outbox is an append-only log split into segment files named after the
+sequence number of their first record:
+
+    00000000000000000001.log    records: length uint32, crc32 uint32,
+    00000000000000004097.log             seq uint64, payload
+    acked                       highest acknowledged seq (replaced atomically)
+
+append() only writes to the open segment; fsync is batched, once every
+`fsync_every` records or `fsync_interval` seconds, whichever comes first, so
+a crash loses at most that window.  On open, a torn or corrupt tail of the
+last segment is truncated.  Segments whose records are all acknowledged are
+deleted.
+
+Forwarder drains the log in sequence order in bulk requests (one NDJSON line
+per record with its seq), limited to `rate` records per second.  A batch is
+acknowledged only after a 2xx response, so it may be delivered twice after a
+crash or timeout; receivers drop those with Deduplicator.  Failures back off
+exponentially with full jitter.
+
+    outbox = Outbox("outbox/")
+    forwarder = Forwarder(outbox, uploader.post, url).start()
+    outbox.append(json.dumps(reading).encode())
+"""
+import json
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+
+RECORD = struct.Struct("<IIQ")
+SEGMENT_BYTES = 8 << 20
+CONTENT_TYPE = "application/x-ndjson"
+
+
+def _segment_name(first_seq):
+    return "%020d.log" % first_seq
+
+
+class Outbox:
+    def __init__(self, root, segment_bytes=SEGMENT_BYTES, fsync_every=256, fsync_interval=0.05,
+                 clock=time.monotonic):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        self.lock = threading.Condition()
+        self.stats = {"appended": 0, "fsyncs": 0, "acked": 0, "truncated_bytes": 0}
+        os.makedirs(root, exist_ok=True)
+        self.acked_path = os.path.join(root, "acked")
+        self.acked = 0
+        if os.path.exists(self.acked_path):
+            with open(self.acked_path) as f:
+                self.acked = int(f.read() or 0)
+        self.segments = sorted(int(name[:-4]) for name in os.listdir(root) if name.endswith(".log"))
+        self.next_seq = self.acked + 1
+        self.size = 0
+        if self.segments:
+            self.next_seq, self.size = self._recover(self.segments[-1])
+        if self.next_seq <= self.acked or not self.segments:
+            # Fresh log, or acknowledged records were lost with an unsynced
+            # tail: start a new segment and never reuse their seqs.
+            self.next_seq = self.acked + 1
+            self.segments.append(self.next_seq)
+            self.size = 0
+        self.file = open(self._path(self.segments[-1]), "ab")
+        self.unsynced = 0
+        self.synced_at = clock()
+        self.dirty = False
+        # Reader position: the record after the last acknowledged one.
+        self.read_segment = 0
+        self.read_offset = 0
+        self.read_seq = self.segments[0]
+        self._peeked = []
+        self._skip_to(self.acked + 1)
+
+    def _path(self, first_seq):
+        return os.path.join(self.root, _segment_name(first_seq))
+
+    def _recover(self, first_seq):
+        """Scan the last segment; truncate after its last intact record."""
+        path = self._path(first_seq)
+        seq = first_seq
+        offset = 0
+        with open(path, "rb") as f:
+            data = f.read()
+        while offset + RECORD.size <= len(data):
+            length, crc, record_seq = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size + length
+            if end > len(data) or record_seq != seq or zlib.crc32(data[offset + RECORD.size:end]) != crc:
+                break
+            offset = end
+            seq += 1
+        if offset < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+            self.stats["truncated_bytes"] += len(data) - offset
+        return seq, offset
+
+    @property
+    def pending(self):
+        return self.next_seq - 1 - self.acked
+
+    def append(self, payload):
+        """Append one payload (bytes); returns its sequence number."""
+        return self.extend([payload])
+
+    def extend(self, payloads):
+        """Append several payloads with one write; returns the last sequence number."""
+        with self.lock:
+            parts = []
+            seq = self.next_seq
+            for payload in payloads:
+                if self.size >= self.segment_bytes and not parts:
+                    self._rotate(seq)
+                parts.append(RECORD.pack(len(payload), zlib.crc32(payload), seq))
+                parts.append(payload)
+                self.size += RECORD.size + len(payload)
+                seq += 1
+                if self.size >= self.segment_bytes:
+                    self._write(parts)
+                    parts = []
+            if parts:
+                self._write(parts)
+            count = seq - self.next_seq
+            self.next_seq = seq
+            self.unsynced += count
+            self.stats["appended"] += count
+            if self.unsynced >= self.fsync_every or self.clock() - self.synced_at >= self.fsync_interval:
+                self._sync()
+            self.lock.notify_all()
+            return seq - 1
+
+    def _write(self, parts):
+        self.file.write(b"".join(parts))
+        self.dirty = True
+
+    def _rotate(self, first_seq):
+        self._sync()
+        self.file.close()
+        self.segments.append(first_seq)
+        self.file = open(self._path(first_seq), "ab")
+        self.size = 0
+
+    def _sync(self):
+        if self.dirty:
+            self.file.flush()
+            self.dirty = False
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+            self.stats["fsyncs"] += 1
+        self.synced_at = self.clock()
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def wait(self, timeout=None):
+        """Block until there is something to send (or timeout); returns pending()."""
+        with self.lock:
+            if not self.pending:
+                self.lock.wait(timeout)
+            return self.pending
+
+    def _skip_to(self, seq):
+        while self.read_seq < seq:
+            batch = self._read(min(seq - self.read_seq, 4096), None)
+            if not batch:
+                break
+            self._advance(batch[-1][0])
+
+    def _read(self, max_records, max_bytes):
+        if self.dirty:
+            self.file.flush()
+            self.dirty = False
+        out = []
+        self._peeked = []
+        segment, offset, seq = self.read_segment, self.read_offset, self.read_seq
+        total = 0
+        while len(out) < max_records and seq < self.next_seq:
+            path = self._path(self.segments[segment])
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while len(out) < max_records and seq < self.next_seq:
+                    header = f.read(RECORD.size)
+                    if len(header) < RECORD.size:
+                        break
+                    length, crc, record_seq = RECORD.unpack(header)
+                    if max_bytes is not None and out and total + length > max_bytes:
+                        return out
+                    payload = f.read(length)
+                    offset += RECORD.size + length
+                    total += length
+                    out.append((record_seq, payload))
+                    seq = record_seq + 1
+                    self._peeked.append((record_seq, segment, offset))
+            if len(out) < max_records and seq < self.next_seq:
+                if segment + 1 == len(self.segments):
+                    break
+                segment += 1
+                offset = 0
+        return out
+
+    def peek(self, max_records=500, max_bytes=1 << 20):
+        """The oldest unacknowledged records as [(seq, payload), ...], in order."""
+        with self.lock:
+            return self._read(max_records, max_bytes)
+
+    def _advance(self, seq):
+        for record_seq, segment, offset in self._peeked:
+            if record_seq == seq:
+                self.read_segment, self.read_offset, self.read_seq = segment, offset, seq + 1
+                break
+        self._peeked = []
+
+    def ack(self, seq):
+        """Acknowledge every record up to seq (from the last peek())."""
+        with self.lock:
+            if seq <= self.acked:
+                return
+            self._advance(seq)
+            self.stats["acked"] += seq - self.acked
+            self.acked = seq
+            tmp = self.acked_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(str(seq))
+            os.replace(tmp, self.acked_path)
+            # Drop segments that are fully acknowledged (never the open one).
+            while len(self.segments) > 1 and self.segments[1] <= seq + 1 and self.read_segment > 0:
+                os.remove(self._path(self.segments.pop(0)))
+                self.read_segment -= 1
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            self.file.close()
+
+
+class Deduplicator:
+    """Receiver side: drops records already seen from each producer.
+
+    Forwarder sends in sequence order, so anything at or below the highest
+    seq accepted from a producer is a redelivery.
+    """
+
+    def __init__(self):
+        self.last = {}
+        self.duplicates = 0
+
+    def accept(self, producer, seq):
+        if seq <= self.last.get(producer, 0):
+            self.duplicates += 1
+            return False
+        self.last[producer] = seq
+        return True
+
+    def filter(self, producer, body):
+        """Parse an NDJSON bulk body; returns the (seq, data) pairs not seen before."""
+        out = []
+        for line in body.splitlines():
+            if line.strip():
+                record = json.loads(line)
+                if self.accept(producer, record["seq"]):
+                    out.append((record["seq"], record["data"]))
+        return out
+
+
+class Forwarder:
+    def __init__(self, outbox, post, url, producer="gateway", batch=500, max_bytes=1 << 20,
+                 rate=None, backoff=0.5, backoff_cap=30.0, seed=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.outbox = outbox
+        self.post = post
+        self.url = url
+        self.producer = producer
+        self.batch = batch
+        self.max_bytes = max_bytes
+        self.rate = rate
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.stopping = threading.Event()
+        self.thread = None
+        self.stats = {"sent": 0, "requests": 0, "failures": 0, "bytes": 0}
+
+    def encode(self, records):
+        # Payloads are JSON documents; embedded as they are.
+        return b"".join(b'{"seq":%d,"data":%s}\n' % (seq, payload) for seq, payload in records)
+
+    def delay(self):
+        """Seconds to wait after the current run of failures (full jitter)."""
+        return self.random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** (self.failures - 1)))
+
+    def step(self):
+        """Send one batch if one is pending and allowed; returns records sent."""
+        now = self.clock()
+        if now < self.next_attempt:
+            return 0
+        records = self.outbox.peek(self.batch, self.max_bytes)
+        if not records:
+            return 0
+        body = self.encode(records)
+        headers = {"Content-Type": CONTENT_TYPE, "X-Producer": self.producer,
+                   "X-First-Seq": str(records[0][0])}
+        try:
+            response = self.post(self.url, data=body, headers=headers)
+            status = response.status_code
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+        except OSError:
+            status = None
+        self.stats["requests"] += 1
+        if status is None or not 200 <= status < 300:
+            self.failures += 1
+            self.stats["failures"] += 1
+            self.next_attempt = self.clock() + self.delay()
+            return 0
+        self.failures = 0
+        self.outbox.ack(records[-1][0])
+        self.stats["sent"] += len(records)
+        self.stats["bytes"] += len(body)
+        if self.rate:
+            self.next_attempt = now + len(records) / self.rate
+        return len(records)
+
+    def run(self):
+        while not self.stopping.is_set():
+            if not self.outbox.wait(0.1):
+                continue
+            if not self.step():
+                wait = self.next_attempt - self.clock()
+                self.stopping.wait(min(max(wait, 0.001), 0.1))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="forwarder", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+def outbox_sink(outbox):
+    """Gateway sink appending batches of gateway.Reading to an Outbox.
+
+    A plain function, so the gateway runs it in an executor thread: extend()
+    may fsync, and that must not block the node readers.  Outbox's lock
+    makes it safe next to the Forwarder thread.
+    """
+
+    def write(batch):
+        outbox.extend([json.dumps(reading._asdict()).encode() for reading in batch])
+
+    return write
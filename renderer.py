@@ -0,0 +1,176 @@
+"""Frame-based typewriter renderer shared by start.py and start2.py.
+
+The old slow_print wrote the color code, one character and a flush for every
+glyph and slept once per character, so long code examples took minutes and
+sleep overshoot piled up.  Here the color is written once per run, characters
+are batched into frames (one write + flush each) and every frame is paced
+against an absolute deadline so late wake-ups are caught up, not accumulated.
+
+Fore and Style stand in for colorama's: colorama is only imported and init()
+run the first time a color is looked up, and only when stdout is a terminal.
+Otherwise init() would strip every code anyway, so all colors are "" and a
+scripted session never imports colorama at all.
+"""
+import os
+import sys
+import time
+
+RESET = "\033[0m"
+
+
+def isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class _Palette:
+    initialized = False
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, color):
+        if not color.isupper():
+            raise AttributeError(color)
+        if isatty(sys.stdout):
+            import colorama
+            if not _Palette.initialized:
+                colorama.init()
+                _Palette.initialized = True
+            value = getattr(getattr(colorama, self._name), color)
+        else:
+            value = ""
+        setattr(self, color, value)
+        return value
+
+
+Fore = _Palette("Fore")
+Style = _Palette("Style")
+
+
+class KeyWatcher:
+    """Reports whether a key was pressed while text is being rendered.
+
+    On POSIX terminals stdin is switched to cbreak mode for the duration of
+    the render so a single key press is seen without waiting for Enter.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.fd = None
+        self.saved = None
+
+    def __enter__(self):
+        stream = self.stream or sys.stdin
+        try:
+            if not stream.isatty():
+                return self
+            self.fd = stream.fileno()
+        except (AttributeError, ValueError, OSError):
+            return self
+        if os.name != "nt":
+            try:
+                import termios
+                import tty
+                self.saved = termios.tcgetattr(self.fd)
+                tty.setcbreak(self.fd)
+            except Exception:
+                self.saved = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved is not None:
+            import termios
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+            self.saved = None
+        return False
+
+    def pressed(self):
+        if self.fd is None:
+            return False
+        if os.name == "nt":
+            import msvcrt
+            if msvcrt.kbhit():
+                msvcrt.getwch()
+                return True
+            return False
+        import select
+        ready, _, _ = select.select([self.fd], [], [], 0)
+        if ready:
+            os.read(self.fd, 1024)
+            return True
+        return False
+
+
+class TypewriterRenderer:
+    def __init__(self, stream=None, frame_rate=60, instant=None, skip_on_key=True,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.stream = stream
+        self.frame_interval = 1.0 / frame_rate
+        self.instant = instant
+        self.skip_on_key = skip_on_key
+        self.clock = clock
+        self.sleep = sleep
+
+    def _out(self):
+        # Resolved per call so colorama's stdout wrapper (installed by init())
+        # and pytest/capture replacements are honoured.
+        return self.stream or sys.stdout
+
+    def is_instant(self, out):
+        if self.instant is not None:
+            return self.instant
+        return not isatty(out)
+
+    def render(self, text, color="", delay=0.05):
+        out = self._out()
+        if delay <= 0 or not text or self.is_instant(out):
+            out.write(color + text + (RESET if color else "") + "\n")
+            out.flush()
+            return
+        watcher = KeyWatcher() if self.skip_on_key else None
+        if watcher is not None:
+            watcher.__enter__()
+        try:
+            self._paced(out, text, color, delay, watcher)
+        finally:
+            if watcher is not None:
+                watcher.__exit__(None, None, None)
+
+    def _paced(self, out, text, color, delay, watcher):
+        n = len(text)
+        write = out.write
+        flush = out.flush
+        clock = self.clock
+        start = clock()
+        pos = 0
+        prefix = color
+        while pos < n:
+            if watcher is not None and watcher.pressed():
+                due = n
+            else:
+                due = min(n, int((clock() - start) / delay) + 1)
+            if due > pos:
+                write(prefix + text[pos:due])
+                flush()
+                prefix = ""
+                pos = due
+            if pos >= n:
+                break
+            # Sleep until the next character is due, but never wake more often
+            # than the frame rate; both targets are absolute so drift from a
+            # late wake-up is absorbed by writing a bigger next frame.
+            now = clock()
+            wake = max(start + pos * delay, now + self.frame_interval)
+            self.sleep(wake - now)
+        write(RESET + "\n")
+        flush()
+
+
+default_renderer = TypewriterRenderer()
+
+
+def slow_print(text, color="", delay=0.05):
+    default_renderer.render(text, color, delay)
@@ -0,0 +1,555 @@
+"""Daily and weekly reports and per-node exports from recorded readings.
+
+Inputs are gateway JSONL captures (gateway.JsonlSink, `fleet.py --file
+x.jsonl`, `faultfilter.py --output`) or binary captures of wire.py frames
+back to back (`fleet.py --file x.bin`); the format is detected from the
+first bytes.  Readings are kept in whole seconds and hundredths like wire
+records.  Failed reads and readings tagged by faultfilter are skipped.
+
+The work is done in two passes over a process pool of at most one worker
+per core.  Memory depends on the block size and on one (day, partition) of
+readings per worker, never on the length of the history:
+
+    map     every input is cut into byte ranges of about --chunk-mb at line
+            or frame boundaries.  A task parses its range block by block
+            and appends the readings to spill files by day and node
+            partition (crc32 of the node name modulo --partitions).
+    reduce  one task per (day, partition) sorts its readings by node and
+            time, keeps one reading per (node, timestamp), writes the
+            exports and returns a summary row per node.  Summaries are
+            taken in day order with a few tasks in flight per worker and
+            written out as soon as their day or week is complete.
+
+Output directory:
+
+    csv/<day>/<node>.csv      timestamp,temperature,humidity
+    delta/<day>/<node>.delta  deadband.py delta+varint batch in tenths, about
+                              3 bytes per reading (deadband.decode() reads it)
+    daily.csv, weekly.csv     per node and day / ISO week: readings, min, max
+                              and mean of both channels, seconds covered and
+                              seconds outside the ranges
+
+Days are UTC, shifted by --utc-offset hours.  Each reading stands for the
+time until the node's next one, at most --max-gap seconds, which is what
+"seconds covered" and "out of range" add up.
+
+    python report.py capture.jsonl capture.bin --output report/ --workers 8
+    python report.py capture.bin --temperature-range 18:24 --no-exports
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import wire
+from deadband import VERSION as DELTA_VERSION
+
+DAY = 86400
+# wire.RECORD field by field; its struct codes are numpy codes of the same size.
+RECORD_DTYPE = np.dtype([(name, wire.RECORD[0] + code)
+                         for name, code in zip(("node", "seq", "timestamp", "temperature", "humidity"), wire.RECORD[1:])])
+SPILL_DTYPE = np.dtype([("node", "<u4"), ("timestamp", "<u4"), ("temperature", "<i2"), ("humidity", "<i2")])
+EXPORTS = ("csv", "delta")
+SUMMARY_FIELDS = ("readings", "t_min", "t_max", "t_mean", "h_min", "h_max", "h_mean", "covered_s", "out_of_range_s")
+_POW10 = 10 ** np.arange(9, -1, -1, dtype=np.int64)
+
+
+def detect(path):
+    with open(path, "rb") as f:
+        return "frames" if f.read(len(wire.FRAME_MAGIC)) == wire.FRAME_MAGIC else "jsonl"
+
+
+def split(path, chunk_bytes):
+    """(path, format, start, end) byte ranges of about chunk_bytes; frame ranges start on a frame."""
+    size = os.path.getsize(path)
+    fmt = detect(path) if size else "jsonl"
+    if fmt == "jsonl":
+        # Ranges are aligned to lines by the reader.
+        bounds = list(range(0, size, chunk_bytes)) + [size]
+    else:
+        bounds = [0]
+        pos = 0
+        with open(path, "rb") as f:
+            while pos < size:
+                f.seek(pos)
+                header = f.read(wire.FRAME_HEADER_SIZE)
+                magic, version, count = struct.unpack(wire.FRAME_HEADER, header.ljust(wire.FRAME_HEADER_SIZE))
+                if magic != wire.FRAME_MAGIC or version != wire.VERSION:
+                    raise ValueError("%s: no reading frame at byte %d" % (path, pos))
+                pos += wire.FRAME_HEADER_SIZE + count * wire.RECORD_SIZE
+                if pos - bounds[-1] >= chunk_bytes:
+                    bounds.append(min(pos, size))
+        if bounds[-1] < size:
+            bounds.append(size)
+    return [(path, fmt, start, end) for start, end in zip(bounds, bounds[1:])]
+
+
+def _read_jsonl(path, start, end, block_bytes):
+    """Blocks of (node names, timestamps, temperatures, humidities) from the lines starting in [start, end)."""
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while pos < end:
+            lines = f.readlines(block_bytes)
+            if not lines:
+                break
+            keep = 0
+            for line in lines:
+                if pos >= end:
+                    break
+                pos += len(line)
+                keep += 1
+            rows = json.loads(b"[" + b",".join([line for line in lines[:keep] if line.strip()]) + b"]")
+            rows = [row for row in rows if not row.get("flags")]
+            yield ([row["node"] for row in rows],
+                   np.array([row["timestamp"] for row in rows], dtype=np.float64),
+                   np.array([row["temperature"] for row in rows], dtype=np.float64),
+                   np.array([row["humidity"] for row in rows], dtype=np.float64))
+
+
+def _read_frames(path, start, end, block_bytes):
+    """Blocks of wire records (RECORD_DTYPE) from the frames in [start, end)."""
+    header_size = wire.FRAME_HEADER_SIZE
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        pending = b""
+        while remaining > 0:
+            data = f.read(min(block_bytes, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            data = pending + data
+            spans = []
+            pos = 0
+            while pos + header_size <= len(data):
+                magic, version, count = struct.unpack_from(wire.FRAME_HEADER, data, pos)
+                if magic != wire.FRAME_MAGIC or version != wire.VERSION:
+                    raise ValueError("%s: no reading frame at byte %d" % (path, end - remaining - len(data) + pos))
+                stop = pos + header_size + count * wire.RECORD_SIZE
+                if stop > len(data):
+                    break
+                spans.append(data[pos + header_size:stop])
+                pos = stop
+            pending = data[pos:]
+            yield np.frombuffer(b"".join(spans), RECORD_DTYPE)
+
+
+def _map(task):
+    """Parse one byte range and append its readings to the spill files; returns counts and groups."""
+    index, path, fmt, start, end, spill, partitions, utc_offset, block_bytes = task
+    names = {}
+    parts = []  # partition of every local node code
+    groups = set()
+    readings = skipped = 0
+    if fmt == "frames":
+        blocks = ((block["node"], block["timestamp"], block["temperature"], block["humidity"])
+                  for block in _read_frames(path, start, end, block_bytes))
+    else:
+        blocks = _read_jsonl(path, start, end, block_bytes)
+    for nodes, timestamps, temperatures, humidities in blocks:
+        if fmt == "frames":
+            keys, codes = np.unique(nodes, return_inverse=True)
+            keys = ["%08x" % node for node in keys.tolist()]
+        else:
+            keys = nodes
+            temperatures = np.rint(temperatures * 100)
+            humidities = np.rint(humidities * 100)
+            ok = (np.isfinite(timestamps) & (timestamps >= 0) & (timestamps < 2 ** 32)
+                  & (np.abs(temperatures) < 32768) & (np.abs(humidities) < 32768))
+            skipped += len(ok) - int(np.count_nonzero(ok))
+            keys = [key for key, good in zip(keys, ok.tolist()) if good]
+            codes = np.arange(len(keys))
+            timestamps, temperatures, humidities = timestamps[ok], temperatures[ok], humidities[ok]
+        lut = np.empty(len(keys), dtype=np.uint32)
+        for i, key in enumerate(keys):
+            code = names.get(key)
+            if code is None:
+                code = names[key] = len(names)
+                parts.append(zlib.crc32(key.encode()) % partitions)
+            lut[i] = code
+        out = np.empty(len(codes), SPILL_DTYPE)
+        out["node"] = lut[codes]
+        out["timestamp"] = timestamps
+        out["temperature"] = temperatures
+        out["humidity"] = humidities
+        readings += len(out)
+
+        day = (out["timestamp"].astype(np.int64) + utc_offset) // DAY
+        group = day * partitions + np.asarray(parts, dtype=np.int64)[out["node"]]
+        order = np.argsort(group, kind="stable")
+        group = group[order]
+        out = out[order]
+        edges = np.flatnonzero(np.diff(group)) + 1
+        for lo, hi in zip(np.concatenate(([0], edges)).tolist(), np.concatenate((edges, [len(out)])).tolist()):
+            if lo == hi:
+                continue
+            key = divmod(int(group[lo]), partitions)
+            directory = os.path.join(spill, "%d-%d" % key)
+            if key not in groups:
+                os.makedirs(directory, exist_ok=True)
+                groups.add(key)
+            with open(os.path.join(directory, "%d.spill" % index), "ab") as f:
+                f.write(out[lo:hi].tobytes())
+    with open(os.path.join(spill, "names-%d.json" % index), "w") as f:
+        json.dump(list(names), f)
+    return {"index": index, "readings": readings, "skipped": skipped, "groups": sorted(groups)}
+
+
+def _decimal(values):
+    """Hundredths as right-aligned "-ddd.dd" columns (space padded) of a (n, 7) uint8 matrix."""
+    a = np.abs(values.astype(np.int64))
+    whole = a // 100
+    out = np.full((len(a), 7), ord(" "), np.uint8)
+    out[:, 4] = ord(".")
+    out[:, 5] = a // 10 % 10 + 48
+    out[:, 6] = a % 10 + 48
+    out[:, 3] = whole % 10 + 48
+    out[:, 2] = np.where(whole >= 10, whole // 10 % 10 + 48, ord(" "))
+    out[:, 1] = np.where(whole >= 100, whole // 100 % 10 + 48, ord(" "))
+    negative = np.flatnonzero(values < 0)
+    whole = whole[negative]
+    out[negative, np.where(whole >= 100, 0, np.where(whole >= 10, 1, 2))] = ord("-")
+    return out
+
+
+def csv_rows(timestamps, temperatures, humidities):
+    """"timestamp,temperature,humidity" lines (hundredths in) as a (n, 27) matrix; strip the spaces."""
+    n = len(timestamps)
+    rows = np.empty((n, 27), np.uint8)
+    digits = timestamps.astype(np.int64)[:, None] // _POW10 % 10
+    leading = np.maximum.accumulate(digits != 0, axis=1)
+    leading[:, -1] = True
+    rows[:, :10] = np.where(leading, digits + 48, ord(" "))
+    rows[:, 10] = rows[:, 18] = ord(",")
+    rows[:, 11:18] = _decimal(temperatures)
+    rows[:, 19:26] = _decimal(humidities)
+    rows[:, 26] = ord("\n")
+    return rows
+
+
+def _varints(values):
+    """LEB128 varints of non-negative integers: (bytes as uint8, length of each)."""
+    values = values.astype(np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        more = values >= np.uint64(1 << (7 * k))
+        if not more.any():
+            break
+        lengths += more
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    out = np.empty(int(ends[-1]) if len(ends) else 0, np.uint8)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        has = np.flatnonzero(lengths > k)
+        byte = ((values[has] >> np.uint64(7 * k)) & np.uint64(0x7F)).astype(np.uint8)
+        out[starts[has] + k] = byte | ((lengths[has] > k + 1).astype(np.uint8) << 7)
+    return out, lengths
+
+
+def _zigzag(values):
+    values = values.astype(np.int64)
+    return (values << 1) ^ (values >> 63)
+
+
+def delta_batches(timestamps, temperatures, humidities, starts):
+    """deadband.encode() bodies of consecutive runs (one per node) as (bytes, offset of each row)."""
+    ts = timestamps.astype(np.int64)
+    t = np.rint(temperatures / 10.0).astype(np.int64)
+    h = np.rint(humidities / 10.0).astype(np.int64)
+    dts = _zigzag(np.diff(ts, prepend=0))
+    dt, dh = np.diff(t, prepend=0), np.diff(h, prepend=0)
+    dts[starts], dt[starts], dh[starts] = ts[starts], t[starts], h[starts]
+    data, lengths = _varints(np.stack([dts, _zigzag(dt), _zigzag(dh)], axis=1).reshape(-1))
+    offsets = np.concatenate(([0], np.cumsum(lengths.reshape(-1, 3).sum(axis=1))))
+    return data, offsets
+
+
+def _delta_header(node, count):
+    name = node.encode()
+    out = bytearray([DELTA_VERSION])
+    for value in (len(name), name, 0, count):
+        if isinstance(value, bytes):
+            out += value
+            continue
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _safe(name):
+    return re.sub(r"[^\w.-]", "_", name) or "_"
+
+
+def _reduce(task):
+    """Sort, export and summarize the readings of one (day, partition)."""
+    day, part, chunks, spill, output, exports, t_range, h_range, max_gap = task
+    node_index = {}
+    parts = []
+    directory = os.path.join(spill, "%d-%d" % (day, part))
+    for index in chunks:
+        records = np.fromfile(os.path.join(directory, "%d.spill" % index), SPILL_DTYPE)
+        with open(os.path.join(spill, "names-%d.json" % index)) as f:
+            names = json.load(f)
+        used = np.unique(records["node"])
+        lut = np.zeros(int(used[-1]) + 1, dtype=np.uint32)
+        for code in used.tolist():
+            lut[code] = node_index.setdefault(names[code], len(node_index))
+        records["node"] = lut[records["node"]]
+        parts.append(records)
+    data = np.concatenate(parts)
+    names = list(node_index)
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names))
+    node = rank[data["node"]]
+    order = np.lexsort((data["timestamp"], node))
+    data, node = data[order], node[order]
+    keep = np.ones(len(data), dtype=bool)
+    keep[1:] = (node[1:] != node[:-1]) | (data["timestamp"][1:] != data["timestamp"][:-1])
+    data, node = data[keep], node[keep]
+    names = sorted(names)
+
+    n = len(data)
+    starts = np.flatnonzero(np.diff(node, prepend=-1))
+    ends = np.append(starts[1:], n)
+    ts = data["timestamp"].astype(np.int64)
+    t = data["temperature"]
+    h = data["humidity"]
+    gap = np.empty(n, dtype=np.int64)
+    gap[:-1] = np.diff(ts)
+    last = ends - 1
+    gap[last] = np.where(ends - starts > 1, gap[np.maximum(last - 1, 0)], 0)
+    np.minimum(gap, max_gap, out=gap)
+    outside = (t < t_range[0]) | (t > t_range[1]) | (h < h_range[0]) | (h > h_range[1])
+    counts = ends - starts
+    summary = {
+        "day": day,
+        "node": [names[i] for i in node[starts].tolist()],
+        "readings": counts.tolist(),
+        "t_min": (np.minimum.reduceat(t, starts) / 100.0).tolist(),
+        "t_max": (np.maximum.reduceat(t, starts) / 100.0).tolist(),
+        "t_sum": (np.add.reduceat(t.astype(np.int64), starts) / 100.0).tolist(),
+        "h_min": (np.minimum.reduceat(h, starts) / 100.0).tolist(),
+        "h_max": (np.maximum.reduceat(h, starts) / 100.0).tolist(),
+        "h_sum": (np.add.reduceat(h.astype(np.int64), starts) / 100.0).tolist(),
+        "covered_s": np.add.reduceat(gap, starts).tolist(),
+        "out_of_range_s": np.add.reduceat(gap * outside, starts).tolist(),
+    }
+
+    label = _day_label(day)
+    if "csv" in exports:
+        target = os.path.join(output, "csv", label)
+        os.makedirs(target, exist_ok=True)
+        rows = csv_rows(ts, t, h)
+        for name, lo, hi in zip(summary["node"], starts.tolist(), ends.tolist()):
+            with open(os.path.join(target, _safe(name) + ".csv"), "wb") as f:
+                f.write(rows[lo:hi].tobytes().replace(b" ", b""))
+    if "delta" in exports:
+        target = os.path.join(output, "delta", label)
+        os.makedirs(target, exist_ok=True)
+        body, offsets = delta_batches(ts, t, h, starts)
+        for name, lo, hi in zip(summary["node"], starts.tolist(), ends.tolist()):
+            with open(os.path.join(target, _safe(name) + ".delta"), "wb") as f:
+                f.write(_delta_header(name, hi - lo) + body[offsets[lo]:offsets[hi]].tobytes())
+    return summary
+
+
+def _day_label(day):
+    return time.strftime("%Y-%m-%d", time.gmtime(day * DAY))
+
+
+def _week_label(day):
+    year, week, _ = (datetime.date(1970, 1, 1) + datetime.timedelta(days=day)).isocalendar()
+    return "%d-W%02d" % (year, week)
+
+
+def _ordered(pool, fn, jobs, window):
+    """fn(job) of every job in order, with at most `window` jobs submitted and not yet taken."""
+    if pool is None:
+        for job in jobs:
+            yield fn(job)
+        return
+    pending = collections.deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def generate(inputs, output, workers=None, partitions=None, chunk_bytes=64 << 20, block_bytes=1 << 20,
+             utc_offset=0.0, temperature_range=(18.0, 27.0), humidity_range=(30.0, 60.0), max_gap=900,
+             exports=EXPORTS):
+    """Run both passes and write daily.csv and weekly.csv; returns (totals per day, stats)."""
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, cores)
+    partitions = partitions or max(16, 2 * workers)
+    spill = os.path.join(output, ".spill")
+    shutil.rmtree(spill, ignore_errors=True)
+    os.makedirs(spill)
+    started = time.perf_counter()
+    chunks = [chunk for path in inputs for chunk in split(path, chunk_bytes)]
+    offset = int(round(utc_offset * 3600))
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        mapped = list(_ordered(pool, _map, [(i, path, fmt, start, end, spill, partitions, offset, block_bytes)
+                                            for i, (path, fmt, start, end) in enumerate(chunks)], 2 * workers))
+        map_seconds = time.perf_counter() - started
+        groups = {}
+        for result in mapped:
+            for key in result["groups"]:
+                groups.setdefault(tuple(key), []).append(result["index"])
+        t_range = tuple(int(round(v * 100)) for v in temperature_range)
+        h_range = tuple(int(round(v * 100)) for v in humidity_range)
+        summaries = _ordered(pool, _reduce, [(day, part, indices, spill, output, exports, t_range, h_range,
+                                              max_gap) for (day, part), indices in sorted(groups.items())],
+                             2 * workers)
+        days, node_days = write_summaries(output, summaries)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        shutil.rmtree(spill, ignore_errors=True)
+    elapsed = time.perf_counter() - started
+    stats = {
+        "inputs": len(inputs), "chunks": len(chunks), "workers": workers, "partitions": partitions,
+        "readings": sum(result["readings"] for result in mapped),
+        "skipped": sum(result["skipped"] for result in mapped),
+        "node_days": node_days,
+        "map_s": round(map_seconds, 3), "reduce_s": round(elapsed - map_seconds, 3),
+        "elapsed_s": round(elapsed, 3),
+    }
+    return days, stats
+
+
+def _merge(merged, summary):
+    """Add the rows of one summary to {node: row}."""
+    for i, node in enumerate(summary["node"]):
+        row = merged.get(node)
+        values = {field: summary[field][i] for field in summary if field not in ("day", "node")}
+        if row is None:
+            merged[node] = values
+            continue
+        for field in ("readings", "t_sum", "h_sum", "covered_s", "out_of_range_s"):
+            row[field] += values[field]
+        for field in ("t_min", "h_min"):
+            row[field] = min(row[field], values[field])
+        for field in ("t_max", "h_max"):
+            row[field] = max(row[field], values[field])
+
+
+def _write_rows(f, label, merged):
+    for node, row in sorted(merged.items()):
+        f.write("%s,%s,%d,%.2f,%.2f,%.2f,%.2f,%.2f,%.2f,%d,%d\n" % (
+            label, node, row["readings"], row["t_min"], row["t_max"], row["t_sum"] / row["readings"],
+            row["h_min"], row["h_max"], row["h_sum"] / row["readings"], row["covered_s"], row["out_of_range_s"]))
+
+
+def _total(label, merged):
+    rows = merged.values()
+    total = {"day": label, "nodes": len(merged)}
+    for field in ("readings", "t_sum", "h_sum", "covered_s", "out_of_range_s"):
+        total[field] = sum(row[field] for row in rows)
+    for field in ("t_min", "h_min"):
+        total[field] = min(row[field] for row in rows)
+    for field in ("t_max", "h_max"):
+        total[field] = max(row[field] for row in rows)
+    return total
+
+
+def write_summaries(output, summaries):
+    """Write daily.csv and weekly.csv from summaries in day order; returns (totals per day, node days).
+
+    A day or week is written and dropped as soon as a summary of a later one
+    arrives, so only the rows of the current week are held.
+    """
+    periods = [("day", _day_label, "daily.csv"), ("week", _week_label, "weekly.csv")]
+    files = [open(os.path.join(output, name), "w") for _, _, name in periods]
+    labels = [None] * len(periods)
+    merged = [{} for _ in periods]
+    days = []
+
+    def flush(i):
+        if merged[i]:
+            _write_rows(files[i], labels[i], merged[i])
+            if i == 0:
+                days.append(_total(labels[i], merged[i]))
+            merged[i] = {}
+
+    try:
+        for f, (period, _, _) in zip(files, periods):
+            f.write(",".join((period, "node") + SUMMARY_FIELDS) + "\n")
+        for summary in summaries:
+            for i, (_, key, _) in enumerate(periods):
+                label = key(summary["day"])
+                if label != labels[i]:
+                    flush(i)
+                    labels[i] = label
+                _merge(merged[i], summary)
+        for i in range(len(periods)):
+            flush(i)
+    finally:
+        for f in files:
+            f.close()
+    return days, sum(day["nodes"] for day in days)
+
+
+def format_table(days):
+    """One line per day over all nodes."""
+    lines = ["%-10s %6s %10s %7s %7s %7s %7s %7s %7s %8s" % (
+        "day", "nodes", "readings", "t min", "t mean", "t max", "h min", "h mean", "h max", "out %")]
+    for day in days:
+        readings = day["readings"]
+        covered = day["covered_s"]
+        lines.append("%-10s %6d %10d %7.2f %7.2f %7.2f %7.2f %7.2f %7.2f %8.1f" % (
+            day["day"], day["nodes"], readings, day["t_min"], day["t_sum"] / readings, day["t_max"],
+            day["h_min"], day["h_sum"] / readings, day["h_max"],
+            100.0 * day["out_of_range_s"] / covered if covered else 0.0))
+    return "\n".join(lines)
+
+
+def _range(text):
+    low, _, high = text.partition(":")
+    return float(low), float(high)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-node daily exports and summaries from recorded readings.")
+    parser.add_argument("inputs", nargs="+", help="gateway JSONL or wire frame captures")
+    parser.add_argument("--output", default="report")
+    parser.add_argument("--workers", type=int, help="processes, at most one per core (default: one per core)")
+    parser.add_argument("--partitions", type=int, help="node partitions per day (default: 16, or 2 per worker)")
+    parser.add_argument("--chunk-mb", type=float, default=64.0, help="input bytes per map task")
+    parser.add_argument("--utc-offset", type=float, default=0.0, help="hours added before cutting days")
+    parser.add_argument("--temperature-range", type=_range, default=(18.0, 27.0), metavar="LOW:HIGH")
+    parser.add_argument("--humidity-range", type=_range, default=(30.0, 60.0), metavar="LOW:HIGH")
+    parser.add_argument("--max-gap", type=int, default=900, help="seconds one reading can stand for")
+    parser.add_argument("--no-exports", action="store_true", help="summaries only")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    days, stats = generate(
+        args.inputs, args.output, args.workers, args.partitions, int(args.chunk_mb * (1 << 20)),
+        utc_offset=args.utc_offset, temperature_range=args.temperature_range,
+        humidity_range=args.humidity_range, max_gap=args.max_gap, exports=() if args.no_exports else EXPORTS)
+    print(format_table(days))
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
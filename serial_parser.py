@@ -0,0 +1,338 @@
+"""Streaming parser for the MCU serial output format.
+
+The MCU sketches print one of
+
+    Humidity: 45.00 %\tTemperature: 23.10 *C      (Step 5 sketch)
+    Humidity: 45.00%  Temperature: 23.10°C        (README sketch)
+    Failed to read from DHT sensor!
+
+StreamParser.feed() takes raw chunks as read from a serial port (bytes,
+bytearray or memoryview) and appends the values straight into float32
+columns.  Large chunks are parsed with NumPy directly on the buffer: newline
+and number positions are found with vectorized scans and the numbers are
+decoded column-wise, so no per-line objects are created.  Small chunks (the
+usual case for a single port at 9600 baud) are scanned in place instead:
+bytes.find()/startswith() locate lines and prefixes, and the same chunk
+translated to a byte-class map locates the numeric runs, which are decoded
+digit by digit; no per-line strings or tuples are built.  The NumPy path's
+fixed cost of some forty array operations per call (about 100 us) is more
+than a few lines take to scan, which is why small chunks do not share it.
+Only the unfinished last line of a chunk is copied, to be completed by the
+next one, and a memoryview chunk small enough to be scanned is copied once.
+A line longer than MAX_LINE bytes is malformed; the carry never holds more,
+so a port spewing noise without newlines cannot grow it.
+
+A line is a reading when it starts with "Humidity:" and contains exactly two
+numbers (runs of digits, "." and a leading "-"); humidity comes first.  A
+number longer than ten characters is garbage from a noisy line, and the line
+is counted as malformed by both paths.
+"""
+from array import array
+
+import numpy as np
+
+_PREFIX = np.frombuffer(b"Humidity:", dtype=np.uint8)
+_FAILED = np.frombuffer(b"Failed to", dtype=np.uint8)
+_WIDTH = 10
+_POW = 10.0 ** np.arange(-_WIDTH, _WIDTH)
+_COLS = np.arange(_WIDTH)
+
+# bytes.translate() table: numeric bytes ("-", ".", "/", digits) become "n",
+# everything else " ".
+_CLASSES = bytes(110 if 45 <= i <= 57 else 32 for i in range(256))
+
+# Below this size scanning is cheaper than setting up the NumPy scans.
+VECTOR_THRESHOLD = 4096
+MAX_LINE = 256
+
+
+def parse_line(line):
+    """Parse a single line: (temperature, humidity), "failed", or None."""
+    temperatures, humidities = array("f"), array("f")
+    parser = StreamParser(temperatures=temperatures, humidities=humidities)
+    parser.feed(bytes(line).rstrip(b"\n") + b"\n")
+    if parser.readings:
+        return temperatures[0], humidities[0]
+    if parser.failures:
+        return "failed"
+    return None
+
+
+class StreamParser:
+    def __init__(self, temperatures=None, humidities=None):
+        self.temperatures = array("f") if temperatures is None else temperatures
+        self.humidities = array("f") if humidities is None else humidities
+        self.carry = b""
+        self.skipping = False
+        self.bytes = 0
+        self.lines = 0
+        self.readings = 0
+        self.failures = 0
+        self.malformed = 0
+
+    def stats(self):
+        return {"bytes": self.bytes, "lines": self.lines, "readings": self.readings,
+                "failures": self.failures, "malformed": self.malformed}
+
+    def take(self):
+        """Return and reset the parsed (temperatures, humidities) columns."""
+        columns = self.temperatures, self.humidities
+        self.temperatures = array("f")
+        self.humidities = array("f")
+        return columns
+
+    def feed(self, chunk):
+        """Parse every complete line in chunk; returns the number of new readings."""
+        view = memoryview(chunk).cast("B")
+        data = chunk if isinstance(chunk, (bytes, bytearray)) else view
+        n = len(view)
+        self.bytes += n
+        before = self.readings
+        start = 0
+        if self.carry or self.skipping:
+            nl = _find(view, 0, n)
+            if nl < 0:
+                self._hold(view)
+                return 0
+            if self.skipping:
+                self.skipping = False
+            else:
+                line = self.carry + bytes(view[:nl + 1])
+                self._parse(line, 0, len(line))
+            self.carry = b""
+            start = nl + 1
+        end = _rfind(view, start, n)
+        if end < start:
+            self._hold(view[start:])
+            return self.readings - before
+        if end + 1 < n:
+            self._hold(view[end + 1:])
+        self._parse(data, start, end + 1)
+        return self.readings - before
+
+    def flush(self):
+        """Treat a pending partial line as complete (end of stream)."""
+        self.skipping = False
+        if self.carry:
+            carry, self.carry = self.carry, b""
+            self._parse(carry + b"\n", 0, len(carry) + 1)
+
+    def _hold(self, tail):
+        # Keep the unfinished line for the next chunk; once it is longer than
+        # MAX_LINE it is counted as malformed and dropped up to its newline.
+        if self.skipping:
+            return
+        if len(self.carry) + len(tail) > MAX_LINE:
+            self.carry = b""
+            self.skipping = True
+            self.lines += 1
+            self.malformed += 1
+        else:
+            self.carry += bytes(tail)
+
+    def _parse(self, buf, start, end):
+        # buf[start:end] is a run of complete lines.
+        if end - start >= VECTOR_THRESHOLD:
+            self._parse_vector(memoryview(buf)[start:end])
+        elif isinstance(buf, (bytes, bytearray)):
+            self._parse_scan(buf, start, end)
+        else:
+            self._parse_scan(bytes(buf[start:end]), 0, end - start)
+
+    def _parse_scan(self, buf, start, end):
+        # Offsets into classes are offsets into buf less start.
+        classes = buf.translate(_CLASSES) if start == 0 and end == len(buf) else buf[start:end].translate(_CLASSES)
+        runs = classes.count
+        find = classes.find
+        newline = buf.find
+        prefix = buf.startswith
+        add_humidity = self.humidities.append
+        add_temperature = self.temperatures.append
+        lines = readings = failures = 0
+        s = start
+        while s < end:
+            nl = newline(b"\n", s, end)
+            length = nl - s
+            if length > 1 or (length == 1 and buf[s] != 13):
+                lines += 1
+                if length > MAX_LINE:
+                    pass
+                elif prefix(b"Humidity:", s, nl):
+                    # Exactly two numeric runs, a:b and c:d.
+                    stop = nl - start
+                    if runs(b" n", s - start, stop) == 2:
+                        a = find(b"n", s - start, stop)
+                        b = find(b" ", a, stop + 1)
+                        c = find(b"n", b, stop)
+                        d = find(b" ", c, stop + 1)
+                        hum = _number(buf, a + start, b + start)
+                        temp = _number(buf, c + start, d + start)
+                        if hum is not None and temp is not None:
+                            add_humidity(hum)
+                            add_temperature(temp)
+                            readings += 1
+                elif prefix(b"Failed to", s, nl):
+                    failures += 1
+            s = nl + 1
+        self.lines += lines
+        self.readings += readings
+        self.failures += failures
+        self.malformed += lines - readings - failures
+
+    def _parse_vector(self, buf):
+        data = np.frombuffer(buf, dtype=np.uint8)
+        last = len(data) - 1
+        ends = np.flatnonzero(data == 10)
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        length = ends - starts
+        # "\r\n" and "\n" on their own are not counted as lines
+        blank = (length == 0) | ((length == 1) & (data[ends - 1] == 13))
+
+        long_enough = (length >= len(_PREFIX)) & (length <= MAX_LINE)
+        is_reading = long_enough.copy()
+        is_failed = long_enough.copy()
+        for k in range(len(_PREFIX)):
+            column = data[np.minimum(starts + k, last)]
+            is_reading &= column == _PREFIX[k]
+            is_failed &= column == _FAILED[k]
+
+        # "-", ".", "/" and digits are the bytes 45..57; "/" never appears in
+        # a reading line and a run containing one fails to decode.
+        numeric = (data - np.uint8(45)) <= 12
+        run_starts = np.flatnonzero(numeric[1:] & ~numeric[:-1]) + 1
+        run_ends = np.flatnonzero(numeric[:-1] & ~numeric[1:]) + 1
+        if numeric[0]:
+            run_starts = np.concatenate(([0], run_starts))
+        runs = np.bincount(np.searchsorted(ends, run_starts), minlength=len(ends))
+        first_run = np.cumsum(runs) - runs
+        is_reading &= runs == 2
+
+        first = first_run[is_reading]
+        hum, hum_ok = _decode(data, run_starts[first], run_ends[first])
+        temp, temp_ok = _decode(data, run_starts[first + 1], run_ends[first + 1])
+        ok = hum_ok & temp_ok
+
+        nonblank = int(len(ends) - blank.sum())
+        readings = int(ok.sum())
+        failures = int(is_failed.sum())
+        self.lines += nonblank
+        self.readings += readings
+        self.failures += failures
+        self.malformed += nonblank - readings - failures
+        self.humidities.frombytes(hum[ok].astype(np.float32).tobytes())
+        self.temperatures.frombytes(temp[ok].astype(np.float32).tobytes())
+
+
+def _number(buf, start, end):
+    """Value of the numeric run buf[start:end], or None if it is not a number."""
+    if end - start > _WIDTH:
+        return None
+    negative = buf[start] == 45
+    i = start + negative
+    point = end - 3
+    if buf[point] == 46 and i < point:
+        # [-]d+.dd, the shape Serial.print(float) prints
+        value = 0
+        while i < point:
+            c = buf[i] - 48
+            if c < 0 or c > 9:
+                return None
+            value = value * 10 + c
+            i += 1
+        d1 = buf[point + 1] - 48
+        d2 = buf[point + 2] - 48
+        if d1 < 0 or d1 > 9 or d2 < 0 or d2 > 9:
+            return None
+        value = (value * 100 + d1 * 10 + d2) / 100
+        return -value if negative else value
+    value = 0
+    digits = 0
+    point = -1
+    while i < end:
+        c = buf[i]
+        if 48 <= c <= 57:
+            value = value * 10 + c - 48
+            digits += 1
+        elif c == 46 and point < 0:
+            point = i
+        else:
+            return None
+        i += 1
+    if not digits:
+        return None
+    if point >= 0:
+        value /= 10 ** (end - point - 1)
+    return -value if negative else value
+
+
+def _decode(data, starts, ends):
+    """Decode numeric runs data[starts:ends]; returns (values, valid).
+
+    Arduino's Serial.print(float) always prints two decimals, so runs shaped
+    like [-]d{1,3}.dd are decoded from fixed offsets before the end of the
+    run.  Anything else goes through the general column-wise decoder.
+    """
+    length = ends - starts
+    fixed = ((length >= 4) & (length <= 7) & (data[ends - 3] == 46)
+             & (data[ends - 4] - np.uint8(48) <= 9))
+    values = np.zeros(len(starts))
+    valid = np.zeros(len(starts), dtype=bool)
+    if fixed.any():
+        s, e = starts[fixed], ends[fixed]
+        d1 = data[e - 1] - np.uint8(48)
+        d2 = data[e - 2] - np.uint8(48)
+        d4 = data[e - 4] - np.uint8(48)
+        ok = (d1 <= 9) & (d2 <= 9)
+        value = d1 * 0.01 + d2 * 0.1 + d4
+        negative = np.zeros(len(s), dtype=bool)
+        for k, scale in ((5, 10.0), (6, 100.0), (7, 1000.0)):
+            pos = e - k
+            inside = pos >= s
+            ch = data[np.maximum(pos, 0)]
+            digit = ch - np.uint8(48)
+            is_digit = inside & (digit <= 9)
+            is_minus = inside & (ch == 45) & (pos == s)
+            ok &= ~inside | is_digit | is_minus
+            negative |= is_minus
+            value += np.where(is_digit, digit * scale, 0.0)
+        values[fixed] = np.where(negative, -value, value)
+        valid[fixed] = ok
+    other = ~fixed
+    if other.any():
+        values[other], valid[other] = _decode_general(data, starts[other], ends[other])
+    return values, valid
+
+
+def _decode_general(data, starts, ends):
+    length = ends - starts
+    index = np.minimum(starts[:, None] + _COLS, len(data) - 1)
+    chars = np.where(_COLS < length[:, None], data[index], 0).astype(np.int16)
+    digits = (chars >= 48) & (chars <= 57)
+    dots = chars == 46
+    minus = chars == 45
+    ndots = dots.sum(axis=1)
+    valid = ((length <= _WIDTH) & (digits.sum(axis=1) + ndots + minus.sum(axis=1) == length)
+             & (digits.sum(axis=1) > 0) & (ndots <= 1) & ~minus[:, 1:].any(axis=1))
+    # Runs longer than _WIDTH are invalid; clipping keeps _POW's index in range.
+    dot = np.where(ndots == 1, dots.argmax(axis=1), np.minimum(length, _WIDTH))[:, None]
+    exponent = np.where(_COLS < dot, dot - _COLS - 1, dot - _COLS)
+    values = np.where(digits, (chars - 48) * _POW[exponent + _WIDTH], 0.0).sum(axis=1)
+    values = np.where(minus[:, 0], -values, values)
+    return values, valid
+
+
+def _find(view, start, end):
+    for i in range(start, end):
+        if view[i] == 10:
+            return i
+    return -1
+
+
+def _rfind(view, start, end):
+    # Walks back over the unfinished last line only, usually a few bytes.
+    for i in range(end - 1, start - 1, -1):
+        if view[i] == 10:
+            return i
+    return -1
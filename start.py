@@ -1,379 +1,288 @@
-import time
-from colorama import Fore, Style, init
+import sys
+from time import perf_counter_ns
 
-# Initialize colorama
-init()
+from renderer import Fore, Style, slow_print
+import content
+import telemetry
+
+BANNER = r"""
+____               __  __               __
+   / __ \___ _   __   / / / /__  ____ _____/ /
+  / / / / _ \ | / /  / /_/ / _ \/ __ `/ __  / 
+ / /_/ /  __/ |/ /  / __  /  __/ /_/ / /_/ /  
+/_____/\___/|___/  /_/ /_/\___/\__,_/\__,_/   
+                                              
+"""
+
+_frames = None
+INPUT_SPAN = telemetry.Span("input")
+RENDER_SPAN = telemetry.Span("render")
+
+def menu_frames(fore, style):
+    """Banner, menu and prompt in one palette (renderer's or colorama's)."""
+    reset = style.RESET_ALL
+    banner = fore.BLUE + BANNER + reset + "\n" + fore.RED + "Enthernetcode\n"
+    menu = (fore.CYAN + "\nMain Menu:" + reset + "\n"
+            + fore.GREEN + "1. Guide" + reset + "\n"
+            + fore.GREEN + "2. Quiz" + reset + "\n"
+            + fore.GREEN + "3. Interactive Practice" + reset + "\n"
+            + fore.RED + "4. Exit" + reset + "\n"
+            + fore.GREEN + "5. Search" + reset + "\n")
+    prompt = fore.CYAN + "Please select an option (1-5): " + reset
+    return banner, menu, prompt
+
+def frames():
+    """The banner, menu and prompt, colored the first time they are shown."""
+    global _frames
+    if _frames is None:
+        _frames = menu_frames(Fore, Style)
+    return _frames
+
+# Main menu choices other than "4" (Exit), by the name of their flow.
+CHOICES = {"1": "guide_user", "2": "take_quiz", "3": "interactive_practice", "5": "search"}
+
+def write_frame(frame):
+    sys.stdout.write(frame)
+    sys.stdout.flush()
+
+def ask(prompt=""):
+    return input(prompt)
+
+def say(text, color="WHITE", delay=None):
+    """A flow request: show text in a Fore color name ("" for none)."""
+    return ("say", text, color, delay)
+
+def prompt_for(prompt):
+    """A flow request: ask, the reply is sent back into the flow."""
+    return ("ask", prompt)
 
 class TemperatureHumidityMonitoringSystem:
-    def __init__(self):
-        self.steps = [
-            "Step 1: Gather Components",
-            "Step 2: Set Up ESP-01 Module",
-            "Step 3: Interface with 8-bit MCU",
-            "Step 4: Connect Temperature and Humidity Sensor",
-            "Step 5: Program the MCU",
-            "Step 6: Establish Communication Between ESP-01 and MCU",
-            "Step 7: Test the System"
-        ]
-        self.protocols = [
-            "Protocol 1: Ensure proper power supply connections.",
-            "Protocol 2: Use appropriate pull-up resistors where necessary.",
-            "Protocol 3: Avoid electrostatic discharge when handling components.",
-            "Protocol 4: Follow the pin configurations and datasheets strictly."
-        ]
-        self.principles = [
-            "Principle 1: Understand the functionality of each component.",
-            "Principle 2: Maintain a clean and organized workspace.",
-            "Principle 3: Double-check connections before powering the circuit.",
-            "Principle 4: Test individual components before integrating them."
-        ]
-        self.quiz_questions = [
-            {
-                "question": "What is the purpose of the pull-up resistors in the circuit?",
-                "options": ["A) To reduce noise", "B) To prevent floating pins", "C) To save power", "D) To increase signal strength"],
-                "answer": "B"
-            },
-            {
-                "question": "Which protocol should be followed to prevent damage from electrostatic discharge?",
-                "options": ["A) Use gloves", "B) Work on a metal surface", "C) Avoid touching components directly", "D) Work in a humid environment"],
-                "answer": "C"
-            },
-            {
-                "question": "What should you double-check before powering the circuit?",
-                "options": ["A) Connections", "B) Code", "C) Power supply", "D) All of the above"],
-                "answer": "D"
-            },
-            {
-                "question": "How can you verify communication between ESP-01 and MCU?",
-                "options": ["A) By checking the voltage", "B) By using a serial monitor", "C) By using a multimeter", "D) By observing LED indicators"],
-                "answer": "B"
-            },
-            {
-                "question": "What is the voltage required for the ESP-01 module?",
-                "options": ["A) 5V", "B) 3.3V", "C) 1.8V", "D) 12V"],
-                "answer": "B"
-            },
-            {
-                "question": "What should you do if the ESP-01 module is not responding?",
-                "options": ["A) Check the power connections", "B) Verify the baud rate", "C) Check the TX/RX connections", "D) All of the above"],
-                "answer": "D"
-            },
-            {
-                "question": "Which sensor is commonly used for temperature and humidity measurements?",
-                "options": ["A) BMP180", "B) DHT11", "C) MPU6050", "D) MQ-135"],
-                "answer": "B"
-            },
-            {
-                "question": "Why is it important to use a common ground between ESP-01 and MCU?",
-                "options": ["A) For consistent voltage levels", "B) For reliable communication", "C) To prevent noise", "D) All of the above"],
-                "answer": "D"
-            }
-        ]
-
-    def slow_print(self, text, color=Fore.WHITE, delay=0.05):
-        for char in text:
-            print(color + char, end='', flush=True)
-            time.sleep(delay)
-        print(Style.RESET_ALL)
+    """The guide, quiz, practice and search flows.
+
+    Each *_flow() is a generator yielding say() and prompt_for() requests, so
+    the same flows run here on one terminal (drive(): the typewriter renderer
+    and input()) and in tutor_server.py for many async TCP sessions.
+    """
+
+    def __init__(self, guide="mcu_guide", quiz="mcu_quiz", overview=True):
+        self.guide_section = guide
+        self.quiz_section = quiz
+        self.overview = overview
+        self._content = None
+        self._key = None
+
+    @property
+    def content(self):
+        # Opened on first use, so the menu is up before the pack is mapped.
+        if self._content is None:
+            self._content = content.load()
+        return self._content
+
+    @property
+    def steps(self):
+        return self.content["overview"]["steps"]
+
+    @property
+    def protocols(self):
+        return self.content["overview"]["protocols"]
+
+    @property
+    def principles(self):
+        return self.content["overview"]["principles"]
+
+    @property
+    def quiz_questions(self):
+        return self.content[self.quiz_section]
+
+    def answer_key(self):
+        if self._key is None:
+            import grader  # NumPy is only needed once a quiz starts
+            self._key = grader.AnswerKey(self.quiz_questions)
+        return self._key
+
+    def slow_print(self, text, color=None, delay=0.05):
+        slow_print(text, Fore.WHITE if color is None else color, delay)
+
+    def drive(self, flow):
+        """Run a flow on this terminal.
+
+        With telemetry on, each prompt is recorded as an "input" span and the
+        flow's lines together as one "render" span (a span per line would
+        cost as much as drawing it).  Whether it is on is read once per flow,
+        so with it off nothing is timed.
+        """
+        timing = telemetry.enabled()
+        rendered = 0
+        reply = None
+        try:
+            while True:
+                try:
+                    request = flow.send(reply)
+                except StopIteration:
+                    return
+                reply = None
+                started = perf_counter_ns() if timing else 0
+                if request[0] == "say":
+                    _, text, color, delay = request
+                    self.slow_print(text, getattr(Fore, color) if color else "", 0.05 if delay is None else delay)
+                    if timing:
+                        rendered += perf_counter_ns() - started
+                else:
+                    reply = ask(request[1])
+                    if timing:
+                        INPUT_SPAN.record(perf_counter_ns() - started)
+        finally:
+            if rendered:
+                RENDER_SPAN.record(rendered)
 
     def pause(self):
-        input("\nPress Enter to continue...")
+        ask("\nPress Enter to continue...")
 
+    @telemetry.timed("guide.guide_user")
     def guide_user(self):
-        self.slow_print("Welcome to the Temperature and Humidity Monitoring System Guide!", Fore.CYAN)
-        self.slow_print("Here are the basic steps to set up your system:\n", Fore.CYAN)
+        self.drive(self.guide_user_flow())
+
+    @telemetry.timed("guide.detailed_steps")
+    def detailed_steps(self):
+        self.drive(self.detailed_steps_flow())
+
+    @telemetry.timed("guide.take_quiz")
+    def take_quiz(self):
+        self.drive(self.take_quiz_flow())
+
+    @telemetry.timed("guide.interactive_practice")
+    def interactive_practice(self):
+        self.drive(self.interactive_practice_flow())
+
+    @telemetry.timed("guide.search")
+    def search(self):
+        self.drive(self.search_flow())
+
+    def pause_flow(self):
+        yield prompt_for("\nPress Enter to continue...")
+
+    def guide_user_flow(self):
+        if not self.overview:
+            yield say(self.content[self.guide_section]["title"], "CYAN")
+            yield from self.detailed_steps_flow()
+            return
+        yield say("Welcome to the Temperature and Humidity Monitoring System Guide!", "CYAN")
+        yield say("Here are the basic steps to set up your system:\n", "CYAN")
         for step in self.steps:
-            self.slow_print(step, Fore.GREEN)
-        self.pause()
-        self.slow_print("\nDetailed Instructions:\n", Fore.CYAN)
-        self.detailed_steps()
+            yield say(step, "GREEN")
+        yield from self.pause_flow()
+        yield say("\nDetailed Instructions:\n", "CYAN")
+        yield from self.detailed_steps_flow()
 
-        self.slow_print("\nProtocols to follow:\n", Fore.YELLOW)
+        yield say("\nProtocols to follow:\n", "YELLOW")
         for protocol in self.protocols:
-            self.slow_print(protocol, Fore.YELLOW)
-        self.pause()
+            yield say(protocol, "YELLOW")
+        yield from self.pause_flow()
 
-        self.slow_print("\nPrinciples to keep in mind:\n", Fore.MAGENTA)
+        yield say("\nPrinciples to keep in mind:\n", "MAGENTA")
         for principle in self.principles:
-            self.slow_print(principle, Fore.MAGENTA)
-        self.pause()
+            yield say(principle, "MAGENTA")
+        yield from self.pause_flow()
 
-    def detailed_steps(self):
-        self.slow_print("\nStep 1: Gather Components", Fore.GREEN)
-        self.slow_print("You will need the following components:")
-        components = [
-            "- ESP-01 module (ESP8266)",
-            "- 8-bit MCU (e.g., AVR like ATmega328P, PIC like PIC16F877A, ARM like STM32F103, RISC-V like GD32VF103)",
-            "- Temperature and Humidity Sensor (e.g., DHT11, DHT22)",
-            "- Breadboard and Jumper wires",
-            "- Power supply (3.3V for ESP-01 and appropriate supply for MCU)",
-            "- USB-to-Serial adapter for programming ESP-01",
-            "- Resistors (10kΩ for pull-up, others as needed)",
-            "- Capacitors (decoupling capacitors, if necessary)"
-        ]
-        for component in components:
-            self.slow_print(component)
-        self.pause()
-
-        self.slow_print("\nStep 2: Set Up ESP-01 Module", Fore.GREEN)
-        instructions = [
-            "1. Connect the ESP-01 module to the USB-to-Serial adapter.",
-            "   - GPIO0 to GND (for programming mode)",
-            "   - TX of ESP-01 to RX of adapter",
-            "   - RX of ESP-01 to TX of adapter",
-            "   - VCC to 3.3V",
-            "   - GND to GND",
-            "2. Open your Arduino IDE or any other suitable software for programming.",
-            "3. Load the appropriate firmware or program for your ESP-01 module.",
-            "   - Example: ESP8266 basic example sketches for testing connectivity",
-            "4. Verify and upload the code to the ESP-01 module.",
-            "5. Disconnect GPIO0 from GND after programming to run the code."
-        ]
-        for instruction in instructions:
-            self.slow_print(instruction)
-        self.pause()
-
-        self.slow_print("\nStep 3: Interface with 8-bit MCU", Fore.GREEN)
-        instructions = [
-            "1. Connect the TX pin of the ESP-01 to the RX pin of the MCU.",
-            "2. Connect the RX pin of the ESP-01 to the TX pin of the MCU.",
-            "3. Ensure common ground between ESP-01 and MCU.",
-            "4. Connect VCC and GND of ESP-01 to 3.3V and GND of power supply.",
-            "5. Add level shifters if your MCU operates at 5V logic."
-        ]
-        for instruction in instructions:
-            self.slow_print(instruction)
-        self.pause()
-
-        self.slow_print("\nStep 4: Connect Temperature and Humidity Sensor", Fore.GREEN)
-        instructions = [
-            "1. Connect the VCC and GND of the sensor to the power supply.",
-            "2. Connect the data pin of the sensor to one of the MCU's GPIO pins.",
-            "3. Add a pull-up resistor (10kΩ) between the data pin and VCC if required by the sensor.",
-            "4. Verify the sensor's datasheet for proper connections and requirements."
-        ]
-        for instruction in instructions:
-            self.slow_print(instruction)
-        self.pause()
-
-        self.slow_print("\nStep 5: Program the MCU", Fore.GREEN)
-        instructions = [
-            "1. Open your preferred IDE for the MCU (e.g., MPLAB for PIC, Atmel Studio for AVR).",
-            "2. Write or load a program to read data from the sensor and send it to the ESP-01 module.",
-            "   - Example: Read temperature and humidity, send via UART to ESP-01",
-            "3. Compile and upload the program to the MCU.",
-            "4. Debug and test the program with a serial monitor to ensure proper data acquisition."
-        ]
-        code_example = """
-        // Example code for AVR (ATmega328P) using Arduino IDE
-        #include <DHT.h>
-        #define DHTPIN 2
-        #define DHTTYPE DHT11
-        DHT dht(DHTPIN, DHTTYPE);
-
-        void setup() {
-            Serial.begin(9600);
-            dht.begin();
-        }
-
-        void loop() {
-            float h = dht.readHumidity();
-            float t = dht.readTemperature();
-            if (isnan(h) || isnan(t)) {
-                Serial.println("Failed to read from DHT sensor!");
-                return;
-            }
-            Serial.print("Humidity: ");
-            Serial.print(h);
-            Serial.print(" %\t");
-            Serial.print("Temperature: ");
-            Serial.print(t);
-            Serial.println(" *C ");
-            delay(2000);
-        }
-        """
-        self.slow_print(code_example, Fore.CYAN)
-        self.pause()
-
-        self.slow_print("\nStep 6: Establish Communication Between ESP-01 and MCU", Fore.GREEN)
-        instructions = [
-            "1. Ensure that both the ESP-01 and MCU are correctly programmed.",
-            "2. Verify the baud rate settings for serial communication.",
-            "3. Test sending data from MCU to ESP-01 and vice versa.",
-            "   - Example: Use AT commands to test ESP-01 responses",
-            "4. Implement error-checking mechanisms to ensure reliable data transmission."
-        ]
-        code_example = """
-        // Example code for ESP-01 (ESP8266) using Arduino IDE
-        void setup() {
-            Serial.begin(9600);
-        }
-
-        void loop() {
-            if (Serial.available()) {
-                String data = Serial.readString();
-                Serial.print("Received: ");
-                Serial.println(data);
-            }
-        }
-        """
-        self.slow_print(code_example, Fore.CYAN)
-        for instruction in instructions:
-            self.slow_print(instruction)
-        self.pause()
-
-        self.slow_print("\nStep 7: Test the System", Fore.GREEN)
-        instructions = [
-            "1. Power up the entire system and monitor the initial responses.",
-            "2. Use a serial monitor to observe the data sent by the MCU and received by the ESP-01.",
-            "3. Check the readings from the temperature and humidity sensor for accuracy.",
-            "4. Verify that the data is correctly being transmitted to your desired endpoint (e.g., cloud service, local server).",
-            "5. Troubleshoot any issues by checking connections, code, and configurations."
-        ]
-        for instruction in instructions:
-            self.slow_print(instruction)
-        self.pause()
+    def detailed_steps_flow(self):
+        guide = self.content[self.guide_section]
+        for step in guide["steps"]:
+            yield from self.show_step(guide, step)
+            yield from self.pause_flow()
 
-    def take_quiz(self):
-        self.slow_print("Temperature and Humidity Monitoring System Quiz", Fore.CYAN)
-        correct_answers = 0
-        for question in self.quiz_questions:
-            self.slow_print("\n" + question["question"], Fore.BLUE)
+    def show_step(self, guide, step):
+        yield say("\n" + step["title"], "GREEN")
+        for block in step["blocks"]:
+            if block[0] == "text":
+                yield say(block[1], block[2])
+            elif block[0] == "items":
+                for instruction in block[1]:
+                    yield say(instruction)
+            elif block[0] == "code":
+                if guide["code_label"]:
+                    yield say("Code Example:", "GREEN")
+                yield say(block[1], guide["code_color"])
+
+    def take_quiz_flow(self):
+        yield say("Temperature and Humidity Monitoring System Quiz", "CYAN")
+        import grader
+        key = self.answer_key()
+        answers = []
+        for item, question in enumerate(self.quiz_questions):
+            yield say("\n" + question["question"], "BLUE")
             for option in question["options"]:
-                self.slow_print(option, Fore.BLUE)
-            answer = input("Your answer: ").strip().upper()
-            if answer == question["answer"]:
-                self.slow_print("Correct!", Fore.GREEN)
-                correct_answers += 1
+                yield say(option, "BLUE")
+            answers.append((yield prompt_for("Your answer: ")))
+            if key.is_correct(item, answers[-1]):
+                yield say("Correct!", "GREEN")
             else:
-                self.slow_print(f"Incorrect! The correct answer was {question['answer']}.", Fore.RED)
-        self.slow_print(f"\nYou got {correct_answers} out of {len(self.quiz_questions)} correct!", Fore.CYAN)
+                yield say(f"Incorrect! The correct answer was {question['answer']}.", "RED")
+        _, scores = grader.grade(key, key.encode_sheets([answers]))
+        yield say(f"\nYou got {scores[0]} out of {len(self.quiz_questions)} correct!", "CYAN")
 
-    def interactive_practice(self):
-        self.slow_print("Interactive Practice Section", Fore.CYAN)
-        self.slow_print("Follow the steps and confirm each step before proceeding.\n", Fore.CYAN)
+    def interactive_practice_flow(self):
+        yield say("Interactive Practice Section", "CYAN")
+        yield say("Follow the steps and confirm each step before proceeding.\n", "CYAN")
         
-        practice_steps = [
-            ("Step 1: Gather Components", "You will need the following components:\n"
-                                         "- ESP-01 module (ESP8266)\n"
-                                         "- 8-bit MCU (e.g., AVR like ATmega328P, PIC like PIC16F877A, ARM like STM32F103, RISC-V like GD32VF103)\n"
-                                         "- Temperature and Humidity Sensor (e.g., DHT11, DHT22)\n"
-                                         "- Breadboard and Jumper wires\n"
-                                         "- Power supply (3.3V for ESP-01 and appropriate supply for MCU)\n"
-                                         "- USB-to-Serial adapter for programming ESP-01\n"
-                                         "- Resistors (10kΩ for pull-up, others as needed)\n"
-                                         "- Capacitors (decoupling capacitors, if necessary)"),
-            ("Step 2: Set Up ESP-01 Module", "1. Connect the ESP-01 module to the USB-to-Serial adapter.\n"
-                                            "   - GPIO0 to GND (for programming mode)\n"
-                                            "   - TX of ESP-01 to RX of adapter\n"
-                                            "   - RX of ESP-01 to TX of adapter\n"
-                                            "   - VCC to 3.3V\n"
-                                            "   - GND to GND\n"
-                                            "2. Open your Arduino IDE or any other suitable software for programming.\n"
-                                            "3. Load the appropriate firmware or program for your ESP-01 module.\n"
-                                            "   - Example: ESP8266 basic example sketches for testing connectivity\n"
-                                            "4. Verify and upload the code to the ESP-01 module.\n"
-                                            "5. Disconnect GPIO0 from GND after programming to run the code."),
-            ("Step 3: Interface with 8-bit MCU", "1. Connect the TX pin of the ESP-01 to the RX pin of the MCU.\n"
-                                                "2. Connect the RX pin of the ESP-01 to the TX pin of the MCU.\n"
-                                                "3. Ensure common ground between ESP-01 and MCU.\n"
-                                                "4. Connect VCC and GND of ESP-01 to 3.3V and GND of power supply.\n"
-                                                "5. Add level shifters if your MCU operates at 5V logic."),
-            ("Step 4: Connect Temperature and Humidity Sensor", "1. Connect the VCC and GND of the sensor to the power supply.\n"
-                                                                "2. Connect the data pin of the sensor to one of the MCU's GPIO pins.\n"
-                                                                "3. Add a pull-up resistor (10kΩ) between the data pin and VCC if required by the sensor.\n"
-                                                                "4. Verify the sensor's datasheet for proper connections and requirements."),
-            ("Step 5: Program the MCU", "1. Open your preferred IDE for the MCU (e.g., MPLAB for PIC, Atmel Studio for AVR).\n"
-                                        "2. Write or load a program to read data from the sensor and send it to the ESP-01 module.\n"
-                                        "   - Example: Read temperature and humidity, send via UART to ESP-01\n"
-                                        "3. Compile and upload the program to the MCU.\n"
-                                        "4. Debug and test the program with a serial monitor to ensure proper data acquisition.\n"
-                                        "Code Example:\n"
-                                        "// Example code for AVR (ATmega328P) using Arduino IDE\n"
-                                        "#include <DHT.h>\n"
-                                        "#define DHTPIN 2\n"
-                                        "#define DHTTYPE DHT11\n"
-                                        "DHT dht(DHTPIN, DHTTYPE);\n\n"
-                                        "void setup() {\n"
-                                        "    Serial.begin(9600);\n"
-                                        "    dht.begin();\n"
-                                        "}\n\n"
-                                        "void loop() {\n"
-                                        "    float h = dht.readHumidity();\n"
-                                        "    float t = dht.readTemperature();\n"
-                                        "    if (isnan(h) || isnan(t)) {\n"
-                                        "        Serial.println(\"Failed to read from DHT sensor!\");\n"
-                                        "        return;\n"
-                                        "    }\n"
-                                        "    Serial.print(\"Humidity: \");\n"
-                                        "    Serial.print(h);\n"
-                                        "    Serial.print(\" %\t\");\n"
-                                        "    Serial.print(\"Temperature: \");\n"
-                                        "    Serial.print(t);\n"
-                                        "    Serial.println(\" *C \");\n"
-                                        "    delay(2000);\n"
-                                        "}"),
-            ("Step 6: Establish Communication Between ESP-01 and MCU", "1. Ensure that both the ESP-01 and MCU are correctly programmed.\n"
-                                                                    "2. Verify the baud rate settings for serial communication.\n"
-                                                                    "3. Test sending data from MCU to ESP-01 and vice versa.\n"
-                                                                    "   - Example: Use AT commands to test ESP-01 responses\n"
-                                                                    "4. Implement error-checking mechanisms to ensure reliable data transmission.\n"
-                                                                    "Code Example:\n"
-                                                                    "// Example code for ESP-01 (ESP8266) using Arduino IDE\n"
-                                                                    "void setup() {\n"
-                                                                    "    Serial.begin(9600);\n"
-                                                                    "}\n\n"
-                                                                    "void loop() {\n"
-                                                                    "    if (Serial.available()) {\n"
-                                                                    "        String data = Serial.readString();\n"
-                                                                    "        Serial.print(\"Received: \");\n"
-                                                                    "        Serial.println(data);\n"
-                                                                    "    }\n"
-                                                                    "}"),
-            ("Step 7: Test the System", "1. Power up the entire system and monitor the initial responses.\n"
-                                        "2. Use a serial monitor to observe the data sent by the MCU and received by the ESP-01.\n"
-                                        "3. Check the readings from the temperature and humidity sensor for accuracy.\n"
-                                        "4. Verify that the data is correctly being transmitted to your desired endpoint (e.g., cloud service, local server).\n"
-                                        "5. Troubleshoot any issues by checking connections, code, and configurations.")
-        ]
+        guide = self.content[self.guide_section]
+        practice_steps = [(step["title"], content.practice_text(step, guide["fence"]))
+                          for step in guide["steps"]]
 
         for title, detail in practice_steps:
-            self.slow_print(title, Fore.GREEN)
-            self.slow_print(detail, Fore.WHITE)
-            completed = input("Have you completed this step? (yes/no): ").strip().lower()
+            yield say(title, "GREEN")
+            yield say(detail, "WHITE")
+            completed = (yield prompt_for("Have you completed this step? (yes/no): ")).strip().lower()
             if completed == 'yes':
-                self.slow_print("Great! Moving to the next step.", Fore.GREEN)
+                yield say("Great! Moving to the next step.", "GREEN")
             else:
-                self.slow_print("Please complete the step before proceeding.", Fore.RED)
-                self.pause()
-            self.pause()
+                yield say("Please complete the step before proceeding.", "RED")
+                yield from self.pause_flow()
+            yield from self.pause_flow()
+
+        yield say("Practice section completed. Good job!", "CYAN")
 
-        self.slow_print("Practice section completed. Good job!", Fore.CYAN)
+    def search_flow(self):
+        import guide_search
+        query = (yield prompt_for("Search for: ")).strip()
+        if not query:
+            return
+        with telemetry.span("search.query"):
+            hits = guide_search.load_index().search(query)
+        if not hits:
+            yield say("No matches.", "RED")
+            return
+        for number, hit in enumerate(hits, 1):
+            yield say("%d. %s" % (number, hit.title), "GREEN", 0)
+            yield say("   " + hit.snippet, "", 0)
+        choice = (yield prompt_for("Open result (number, Enter to go back): ")).strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(hits):
+            yield from self.show_location(hits[int(choice) - 1].location)
+            yield from self.pause_flow()
+
+    def show_location(self, location):
+        section, index = location
+        if section in ("steps", "protocols", "principles"):
+            for number, item in enumerate(self.content["overview"][section]):
+                yield say(item, "YELLOW" if number == index else "WHITE")
+        elif section.endswith("_guide"):
+            guide = self.content[section]
+            yield from self.show_step(guide, guide["steps"][index])
+        else:
+            question = self.content[section][index]
+            yield say(question["question"], "BLUE")
+            for option in question["options"]:
+                yield say(option, "BLUE")
 
 def main():
-    print (Fore.BLUE + """
-____               __  __               __
-   / __ \___ _   __   / / / /__  ____ _____/ /
-  / / / / _ \ | / /  / /_/ / _ \/ __ `/ __  / 
- / /_/ /  __/ |/ /  / __  /  __/ /_/ / /_/ /  
-/_____/\___/|___/  /_/ /_/\___/\__,_/\__,_/   
-                                              
-""" + Style.RESET_ALL +"\n"   +                  Fore.RED + "Enthernetcode")
+    banner, menu, prompt = frames()
+    write_frame(banner)
     system = TemperatureHumidityMonitoringSystem()
     while True:
-        print(Fore.CYAN + "\nMain Menu:" + Style.RESET_ALL)
-        print(Fore.GREEN + "1. Guide" + Style.RESET_ALL)
-        print(Fore.GREEN + "2. Quiz" + Style.RESET_ALL)
-        print(Fore.GREEN + "3. Interactive Practice" + Style.RESET_ALL)
-        print(Fore.RED + "4. Exit" + Style.RESET_ALL)
-        choice = input(Fore.CYAN + "Please select an option (1-4): " + Style.RESET_ALL).strip()
+        write_frame(menu)
+        choice = ask(prompt).strip()
         
-        if choice == '1':
-            system.guide_user()
-        elif choice == '2':
-            system.take_quiz()
-        elif choice == '3':
-            system.interactive_practice()
+        if choice in CHOICES:
+            getattr(system, CHOICES[choice])()
         elif choice == '4':
             system.slow_print("Exiting the program. Goodbye!", Fore.CYAN)
             break
@@ -0,0 +1,505 @@
+"""Span timers, counters and latency histograms for the guide and data paths.
+
+    import telemetry
+
+    @telemetry.timed("guide.take_quiz")
+    def take_quiz(self): ...
+
+    MEASURE = telemetry.Span("sensor.measure")
+    with MEASURE:
+        sensor.measure()
+    telemetry.count("upload.retries")
+
+Everything is off until enabled, with THM_TELEMETRY=1 in the environment or
+telemetry.enable().  While off, a timed() wrapper costs one global check per
+call (plus the wrapper's own call, ~150 ns on CPython) and span() hands out a
+shared no-op context manager, so neither belongs on a per-line or per-key
+path.  Loops like that read enabled() once and, when it is on, time their
+steps themselves and hand the durations to Span.record().
+
+A Span is reusable and re-entrant, so a path that runs often keeps one
+(timed() makes its own when it decorates); span(name) and record(name, ns)
+look the name up first.  A span binds its histogram on first use and the
+total it charges its parent whenever the parent changes, and the spans that
+are open sit on three module-level lists, so entering and finishing one
+allocates nothing and looks nothing up.  While on:
+
+  - each span's duration (perf_counter_ns) goes into a Histogram: HDR-style
+    log-linear buckets in one preallocated array, 64 sub-buckets per power
+    of two, so every percentile is within 1.6% from 1 ns to ~2.4 hours;
+  - a span that ends inside another is charged to its parent by name, and
+    the rest of the parent's time as "self".  That splits guide_user into
+    render, input and the rest;
+  - a span that raises also counts "<name>.errors";
+  - with THM_TRACE=path every finished span is appended to a JSONL trace
+    (buffered, flushed every TRACE_BUFFER spans and at exit).
+
+export() renders the Prometheus text format, and serve() (or
+THM_METRICS_PORT) exposes it at /metrics.  `python telemetry.py trace.jsonl`
+summarizes a recorded trace.
+
+Only the standard library is used, and json, http.server and argparse are
+only imported once a trace, a metrics server or the CLI needs them, so
+importing this costs nothing at startup.  Nothing is locked or kept per
+thread: the instrumented paths all run on the main thread, and the metrics
+server only reads.
+"""
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from array import array
+
+PRECISION = 6
+SUB = 1 << PRECISION
+MAX_EXPONENT = 36  # values from 2**43 ns (~2.4 h) up share the last bucket
+BUCKETS = (MAX_EXPONENT + 2) * SUB
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+TRACE_BUFFER = 256
+
+_perf_ns = time.perf_counter_ns
+
+
+def bucket_index(ns):
+    e = ns.bit_length() - PRECISION - 1
+    if e <= 0:
+        return ns if ns > 0 else 0
+    if e > MAX_EXPONENT:
+        return BUCKETS - 1
+    return e * SUB + (ns >> e)
+
+
+def bucket_bounds(index):
+    """Lowest and highest value recorded into bucket `index`."""
+    if index < 2 * SUB:
+        return index, index
+    e = index // SUB - 1
+    low = (index - e * SUB) << e
+    return low, low + (1 << e) - 1
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """Exact percentiles of a list of samples (for the benchmarks and session stats)."""
+    values = sorted(samples)
+    if not values:
+        return {}
+    out = {"count": len(values), "max": values[-1]}
+    for p in points:
+        k = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+        out["p%d" % p] = values[k]
+    return out
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, ns):
+        e = ns.bit_length() - PRECISION - 1
+        if e <= 0:
+            self.counts[ns if ns > 0 else 0] += 1
+        else:
+            self.counts[e * SUB + (ns >> e) if e <= MAX_EXPONENT else BUCKETS - 1] += 1
+        if ns > self.max:
+            self.max = ns
+        if ns < self.min or not self.count:
+            self.min = ns
+        self.count += 1
+        self.total += ns
+
+    def merge(self, other):
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        if other.count:
+            self.min = min(self.min, other.min) if self.count else other.min
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def quantiles(self, points=QUANTILES):
+        """Value at each quantile (ns), the bucket's highest value capped at the maximum."""
+        if not self.count:
+            return [0] * len(points)
+        targets = sorted((max(1, -(-q * self.count // 1)), k) for k, q in enumerate(points))
+        out = [0] * len(points)
+        seen = 0
+        t = 0
+        for i, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while t < len(targets) and seen >= targets[t][0]:
+                out[targets[t][1]] = min(bucket_bounds(i)[1], self.max)
+                t += 1
+            if t == len(targets):
+                break
+        return out
+
+    def as_dict(self):
+        q = self.quantiles()
+        out = {"count": self.count, "total_s": self.total / 1e9,
+               "min_s": self.min / 1e9, "max_s": self.max / 1e9}
+        for point, value in zip(QUANTILES, q):
+            out["p%g" % (point * 100)] = value / 1e9
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.children = {}  # (parent, child) -> [ns]
+        self.spans = []  # Spans bound to this registry
+        self.trace = None
+        self.dumps = None
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def cell(self, parent, child):
+        """The one-item list holding the ns `child` took inside `parent`."""
+        key = (parent, child)
+        cell = self.children.get(key)
+        if cell is None:
+            cell = self.children[key] = [0]
+        return cell
+
+    def charge(self, parent, child, ns):
+        self.cell(parent, child)[0] += ns
+
+    def open_trace(self, path):
+        import json
+        self.close_trace()
+        self.dumps = json.dumps
+        self.trace = open(path, "a")
+
+    def flush_trace(self):
+        with self.lock:
+            if self.trace is not None and self.pending:
+                self.trace.write("".join(self.pending))
+                self.trace.flush()
+            del self.pending[:]
+
+    def close_trace(self):
+        self.flush_trace()
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def reset(self):
+        for span in self.spans:
+            span.unbind()
+        del self.spans[:]
+        self.histograms.clear()
+        self.counters.clear()
+        self.children.clear()
+
+
+REGISTRY = Registry()
+_enabled = False
+# The open spans, innermost last, with their start times and the time their
+# finished children took.
+_stack = []
+_starts = []
+_nested = []
+_named = {}
+# perf_counter_ns() -> Unix time, for trace timestamps.
+_epoch_ns = time.time_ns() - _perf_ns()
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ("name", "errors", "histogram", "parent", "cell", "own")
+
+    def __init__(self, name):
+        self.name = name
+        self.errors = name + ".errors"
+        self.unbind()
+
+    def unbind(self):
+        self.histogram = self.parent = self.cell = self.own = None
+
+    def __enter__(self):
+        if _enabled:
+            _stack.append(self)
+            _nested.append(0)
+            _starts.append(_perf_ns())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Entered while off (or already closed): nothing to finish.
+        if not _stack or _stack[-1] is not self:
+            return False
+        end = _perf_ns()
+        _stack.pop()
+        start = _starts.pop()
+        nested = _nested.pop()
+        ns = end - start
+        if nested:
+            own = self.own
+            if own is None:
+                own = self.own = REGISTRY.cell(self.name, "self")
+            own[0] += ns - nested
+        self._finish(start, ns)
+        if exc_type is not None:
+            count(self.errors)
+        return False
+
+    def record(self, ns):
+        """Record a run of this span that just ended after `ns`, timed by the caller."""
+        if _enabled:
+            self._finish(_perf_ns() - ns, ns)
+
+    def _finish(self, start, ns):
+        registry = REGISTRY
+        histogram = self.histogram
+        if histogram is None:
+            histogram = self.histogram = registry.histogram(self.name)
+            registry.spans.append(self)
+        histogram.record(ns)
+        parent = _stack[-1] if _stack else None
+        if parent is not None:
+            _nested[-1] += ns
+            if parent is not self.parent:
+                self.parent = parent
+                self.cell = registry.cell(parent.name, self.name)
+            self.cell[0] += ns
+        if registry.trace is not None:
+            registry.pending.append(registry.dumps({
+                "name": self.name, "start": (_epoch_ns + start) / 1e9, "duration_us": ns / 1e3,
+                "parent": parent.name if parent is not None else None}) + "\n")
+            if len(registry.pending) >= TRACE_BUFFER:
+                registry.flush_trace()
+
+
+def span(name):
+    """Span `name` while telemetry is on, else a shared no-op."""
+    if not _enabled:
+        return _NO_SPAN
+    found = _named.get(name)
+    if found is None:
+        found = _named[name] = Span(name)
+    return found
+
+
+def record(name, ns):
+    """Record a span `name` that just ended after `ns`, timed by the caller, inside the current span."""
+    if _enabled:
+        span(name).record(ns)
+
+
+def timed(name):
+    """Decorator recording each call of the function as span `name`."""
+    def decorate(fn):
+        timer = Span(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with timer:
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    if _enabled:
+        counters = REGISTRY.counters
+        counters[name] = counters.get(name, 0) + n
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace=None):
+    global _enabled
+    _enabled = True
+    if trace:
+        REGISTRY.open_trace(trace)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    REGISTRY.flush_trace()
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def export(registry=None):
+    """Prometheus text exposition of every span and counter."""
+    registry = registry or REGISTRY
+    lines = ["# HELP thm_span_seconds Time spent in instrumented spans.",
+             "# TYPE thm_span_seconds summary"]
+    for name, histogram in sorted(registry.histograms.items()):
+        label = _label(name)
+        for point, value in zip(QUANTILES, histogram.quantiles()):
+            lines.append('thm_span_seconds{span="%s",quantile="%g"} %.9g' % (label, point, value / 1e9))
+        lines.append('thm_span_seconds_sum{span="%s"} %.9g' % (label, histogram.total / 1e9))
+        lines.append('thm_span_seconds_count{span="%s"} %d' % (label, histogram.count))
+    lines += ["# HELP thm_span_child_seconds_total Time of a span spent in each nested span, and in itself.",
+              "# TYPE thm_span_child_seconds_total counter"]
+    for (parent, child), cell in sorted(registry.children.items()):
+        lines.append('thm_span_child_seconds_total{span="%s",child="%s"} %.9g'
+                     % (_label(parent), _label(child), cell[0] / 1e9))
+    lines += ["# HELP thm_events_total Instrumentation counters.", "# TYPE thm_events_total counter"]
+    for name, value in sorted(registry.counters.items()):
+        lines.append('thm_events_total{event="%s"} %d' % (_label(name), value))
+    return "\n".join(lines) + "\n"
+
+
+def format_report(registry=None):
+    registry = registry or REGISTRY
+    lines = ["%-28s %8s %10s %10s %10s %10s" % ("span", "count", "total s", "p50 ms", "p99 ms", "max ms")]
+    for name, histogram in sorted(registry.histograms.items(), key=lambda item: -item[1].total):
+        q = histogram.quantiles((0.5, 0.99))
+        lines.append("%-28s %8d %10.3f %10.3f %10.3f %10.3f" % (
+            name, histogram.count, histogram.total / 1e9, q[0] / 1e6, q[1] / 1e6, histogram.max / 1e6))
+    parents = sorted({parent for parent, _ in registry.children})
+    for parent in parents:
+        total = registry.histograms[parent].total if parent in registry.histograms else 0
+        shares = sorted(((cell[0], child) for (p, child), cell in registry.children.items() if p == parent),
+                        reverse=True)
+        lines.append("%s: %s" % (parent, ", ".join(
+            "%s %.1f%%" % (child, 100.0 * ns / total if total else 0.0) for ns, child in shares)))
+    if registry.counters:
+        lines.append("counters: " + ", ".join("%s=%d" % item for item in sorted(registry.counters.items())))
+    return "\n".join(lines)
+
+
+def load_trace(path):
+    """Registry rebuilt from a JSONL trace."""
+    import json
+    registry = Registry()
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            ns = int(round(record["duration_us"] * 1e3))
+            registry.histogram(record["name"]).record(ns)
+            if record.get("parent"):
+                registry.charge(record["parent"], record["name"], ns)
+    for parent in {parent for parent, _ in list(registry.children)}:
+        nested = sum(cell[0] for (p, _), cell in registry.children.items() if p == parent)
+        if parent in registry.histograms:
+            registry.charge(parent, "self", registry.histograms[parent].total - nested)
+    return registry
+
+
+def _handler_class():
+    import socket
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                body, code = b"not found\n", 404
+            else:
+                body, code = export(self.server.registry).encode(), 200
+            self.send_response(code)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+class MetricsServer:
+    def __init__(self, host="127.0.0.1", port=9464, registry=None):
+        from http.server import ThreadingHTTPServer
+        self.server = ThreadingHTTPServer((host, port), _handler_class())
+        self.server.daemon_threads = True
+        self.server.registry = registry or REGISTRY
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://%s:%d/metrics" % (host, port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def serve(port=9464, host="127.0.0.1"):
+    return MetricsServer(host, port).start()
+
+
+def _configure(environ):
+    trace = environ.get("THM_TRACE")
+    port = environ.get("THM_METRICS_PORT")
+    if environ.get("THM_TELEMETRY", "").lower() in ("1", "true", "yes", "on") or trace or port:
+        enable(trace)
+    if port:
+        serve(int(port), environ.get("THM_METRICS_HOST", "127.0.0.1"))
+
+
+_configure(os.environ)
+atexit.register(REGISTRY.close_trace)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize a telemetry trace (THM_TRACE output).")
+    parser.add_argument("trace")
+    parser.add_argument("--prometheus", action="store_true", help="print the Prometheus exposition instead")
+    args = parser.parse_args(argv)
+    registry = load_trace(args.trace)
+    print(export(registry) if args.prometheus else format_report(registry))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
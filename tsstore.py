@@ -0,0 +1,316 @@
+"""Append-only columnar time-series store for sensor readings.
+
+Layout of a store directory:
+
+    manifest.json            segments with row counts and time bounds, node names
+    000001.ts                int64 timestamps in milliseconds
+    000001.node              uint16 node codes (see manifest "nodes"), so at
+                             most MAX_NODES names per store
+    000001.temp / .hum       float32 temperature / humidity
+    000001.idx               sparse index: timestamp of every INDEX_STRIDE-th row
+
+Rows are appended in batches with plain file writes, so a segment is always a
+set of equally long fixed-width column files.  Timestamps never decrease
+within a segment, which lets range queries binary-search the sparse index and
+then one block of the timestamp column.  Gateway batches interleave nodes
+with skewed clocks, so each batch is sorted first, and rows older than the
+end of the open segment are merged into its tail (rewritten in place) as long
+as that tail is at most MERGE_ROWS; only older backfills start a new segment.
+
+The manifest is rewritten when a segment is started or filled and when new
+node names appear, not on every append.  The open (last) segment's row count
+and time bounds are recovered from its column files when a store is opened.
+Queries and downsampling work on `numpy.memmap` views of the columns, so
+only the pages inside the requested range are read.
+
+    store = TimeSeriesStore("readings")
+    store.append_many(timestamps, nodes, temperatures, humidities)
+    rows = store.query(t0, t1, node="esp01")
+    buckets = store.downsample(t0, t1, bucket=300, column="temperature")
+"""
+import json
+import os
+
+import numpy as np
+
+COLUMNS = (("ts", np.int64), ("node", np.uint16), ("temp", np.float32), ("hum", np.float32))
+VALUE_COLUMNS = {"temperature": "temp", "humidity": "hum"}
+INDEX_STRIDE = 4096
+SEGMENT_ROWS = 1 << 24
+MERGE_ROWS = 1 << 16
+MAX_NODES = 1 << 16  # node codes are uint16
+
+
+class Segment:
+    def __init__(self, root, name, rows=0, t_min=None, t_max=None):
+        self.root = root
+        self.name = name
+        self.rows = rows
+        self.t_min = t_min
+        self.t_max = t_max
+        self._maps = {}
+        self._mapped_rows = 0
+        self._index = None
+
+    def path(self, column):
+        return os.path.join(self.root, "%s.%s" % (self.name, column))
+
+    def as_dict(self):
+        return {"name": self.name, "rows": self.rows, "t_min": self.t_min, "t_max": self.t_max}
+
+    def column(self, column):
+        """memmap of one column, re-opened when rows were appended since the last call."""
+        if self._mapped_rows != self.rows:
+            self._maps = {}
+            self._index = None
+            self._mapped_rows = self.rows
+        array = self._maps.get(column)
+        if array is None:
+            dtype = dict(COLUMNS)[column]
+            if self.rows == 0:
+                array = np.empty(0, dtype=dtype)
+            else:
+                array = np.memmap(self.path(column), dtype=dtype, mode="r", shape=(self.rows,))
+            self._maps[column] = array
+        return array
+
+    def index(self):
+        self.column("ts")
+        if self._index is None:
+            count = (self.rows + INDEX_STRIDE - 1) // INDEX_STRIDE
+            self._index = np.fromfile(self.path("idx"), dtype=np.int64, count=count)
+        return self._index
+
+    def bounds(self, t0, t1):
+        """Row range [lo, hi) with t0 <= ts < t1 (milliseconds)."""
+        if self.rows == 0 or t1 <= self.t_min or t0 > self.t_max:
+            return 0, 0
+        index = self.index()
+        ts = self.column("ts")
+        return self._locate(index, ts, t0), self._locate(index, ts, t1)
+
+    def after(self, t):
+        """First row with ts > t (milliseconds)."""
+        return int(np.searchsorted(self.column("ts"), t, side="right"))
+
+    def recover(self):
+        """Row count and time bounds of an open segment from its column files."""
+        self.rows = min(os.path.getsize(self.path(column)) // np.dtype(dtype).itemsize
+                        for column, dtype in COLUMNS)
+        self._mapped_rows = -1
+        if self.rows:
+            ts = self.column("ts")
+            self.t_min, self.t_max = int(ts[0]), int(ts[-1])
+        else:
+            self.t_min = self.t_max = None
+
+    def _locate(self, index, ts, t):
+        # First row with ts >= t: narrow to one stride with the sparse index,
+        # then binary-search inside that block only.
+        block = int(np.searchsorted(index, t, side="left"))
+        lo = max(0, (block - 1) * INDEX_STRIDE)
+        hi = min(self.rows, block * INDEX_STRIDE + 1) if block < len(index) else self.rows
+        return lo + int(np.searchsorted(ts[lo:hi], t, side="left"))
+
+
+class TimeSeriesStore:
+    def __init__(self, root, segment_rows=SEGMENT_ROWS, fsync=False):
+        self.root = root
+        self.segment_rows = segment_rows
+        self.fsync = fsync
+        os.makedirs(root, exist_ok=True)
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.segments = []
+        self.nodes = []
+        self.node_codes = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            self.segments = [Segment(root, **s) for s in manifest["segments"]]
+            self.nodes = manifest["nodes"]
+            self.node_codes = {name: code for code, name in enumerate(self.nodes)}
+            if self.segments:
+                self.segments[-1].recover()
+        self._saved_nodes = len(self.nodes)
+
+    @property
+    def rows(self):
+        return sum(segment.rows for segment in self.segments)
+
+    def node_code(self, node):
+        code = self.node_codes.get(node)
+        if code is None:
+            if len(self.nodes) >= MAX_NODES:
+                raise ValueError("store %s is full: %d node names, no code for %r" % (self.root, MAX_NODES, node))
+            code = self.node_codes[node] = len(self.nodes)
+            self.nodes.append(node)
+        return code
+
+    def append(self, timestamp, node, temperature, humidity):
+        self.append_many([timestamp], [node], [temperature], [humidity])
+
+    def append_many(self, timestamps, nodes, temperatures, humidities):
+        """Append a batch; timestamps are seconds, nodes are names or a uint16 code array."""
+        ts = np.round(np.asarray(timestamps, dtype=np.float64) * 1000).astype(np.int64)
+        if isinstance(nodes, np.ndarray) and nodes.dtype.kind in "ui":
+            if len(nodes) and (nodes.min() < 0 or nodes.max() >= MAX_NODES):
+                raise ValueError("node codes must be below %d" % MAX_NODES)
+            codes = nodes.astype(np.uint16)
+        else:
+            codes = np.fromiter((self.node_code(n) for n in nodes), dtype=np.uint16, count=len(ts))
+        columns = {"ts": ts, "node": codes,
+                   "temp": np.asarray(temperatures, dtype=np.float32),
+                   "hum": np.asarray(humidities, dtype=np.float32)}
+        if len(ts) > 1 and (np.diff(ts) < 0).any():
+            order = np.argsort(ts, kind="stable")
+            columns = {k: v[order] for k, v in columns.items()}
+        segments = len(self.segments)
+        sealed = False
+        while len(columns["ts"]):
+            segment, at = self._writable_segment(int(columns["ts"][0]))
+            if at < segment.rows:
+                # Merge with the tail this batch reaches back into; equal
+                # timestamps keep the stored rows first.
+                columns = {k: np.concatenate((segment.column(k)[at:], v)) for k, v in columns.items()}
+                order = np.argsort(columns["ts"], kind="stable")
+                columns = {k: v[order] for k, v in columns.items()}
+            n = min(len(columns["ts"]), self.segment_rows - at)
+            self._write(segment, {k: v[:n] for k, v in columns.items()}, at)
+            sealed |= segment.rows >= self.segment_rows
+            columns = {k: v[n:] for k, v in columns.items()}
+        if sealed or len(self.segments) != segments or len(self.nodes) != self._saved_nodes:
+            self._save_manifest()
+
+    def _writable_segment(self, first_ts):
+        """(segment, row) to write from: the open segment's end, a row inside its tail, or a new segment."""
+        if self.segments:
+            segment = self.segments[-1]
+            if segment.rows < self.segment_rows:
+                if segment.t_max is None or first_ts >= segment.t_max:
+                    return segment, segment.rows
+                at = segment.after(first_ts)
+                if segment.rows - at <= MERGE_ROWS:
+                    return segment, at
+        segment = Segment(self.root, "%06d" % (len(self.segments) + 1))
+        for column, _ in COLUMNS:
+            open(segment.path(column), "wb").close()
+        open(segment.path("idx"), "wb").close()
+        self.segments.append(segment)
+        return segment, 0
+
+    def _write(self, segment, columns, at):
+        """Write rows from row `at` on, replacing the rows there (never fewer than before)."""
+        n = len(columns["ts"])
+        for column, dtype in COLUMNS:
+            self._write_file(segment.path(column), at * np.dtype(dtype).itemsize,
+                             columns[column].astype(dtype, copy=False))
+        # Sparse index entries for every stride boundary inside the new rows.
+        first = -(-at // INDEX_STRIDE) * INDEX_STRIDE
+        marks = np.arange(first, at + n, INDEX_STRIDE) - at
+        if len(marks):
+            self._write_file(segment.path("idx"), first // INDEX_STRIDE * 8, columns["ts"][marks])
+        if at == 0:
+            segment.t_min = int(columns["ts"][0])
+        segment.t_max = int(columns["ts"][-1])
+        segment.rows = at + n
+
+    def _write_file(self, path, offset, array):
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            f.write(array.tobytes())
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segments": [s.as_dict() for s in self.segments], "nodes": self.nodes}, f)
+        os.replace(tmp, self.manifest_path)
+        self._saved_nodes = len(self.nodes)
+
+    def _ranges(self, t0, t1):
+        t0 = int(round(t0 * 1000))
+        t1 = int(round(t1 * 1000))
+        for segment in self.segments:
+            lo, hi = segment.bounds(t0, t1)
+            if hi > lo:
+                yield segment, lo, hi
+
+    def query(self, t0, t1, node=None, columns=("ts", "node", "temp", "hum")):
+        """Rows with t0 <= timestamp < t1 (seconds) as a dict of arrays.
+
+        Without a node filter and within one segment the arrays are memmap
+        views; otherwise the selected rows are copied.
+        """
+        code = None if node is None else self.node_codes.get(node, -1)
+        parts = {column: [] for column in columns}
+        for segment, lo, hi in self._ranges(t0, t1):
+            mask = None
+            if code is not None:
+                mask = segment.column("node")[lo:hi] == code
+            for column in columns:
+                values = segment.column(column)[lo:hi]
+                parts[column].append(values if mask is None else values[mask])
+        out = {}
+        for column, chunks in parts.items():
+            if len(chunks) == 1:
+                out[column] = chunks[0]
+            elif chunks:
+                out[column] = np.concatenate(chunks)
+            else:
+                out[column] = np.empty(0, dtype=dict(COLUMNS)[column])
+        return out
+
+    def downsample(self, t0, t1, bucket, node=None, column="temperature", chunk_rows=1 << 22):
+        """min/max/mean/count per `bucket` seconds over [t0, t1).
+
+        Works through the range in chunks of memmapped rows, so memory use
+        does not depend on the length of the range.
+        """
+        name = VALUE_COLUMNS.get(column, column)
+        code = None if node is None else self.node_codes.get(node, -1)
+        bucket_ms = int(round(bucket * 1000))
+        start_ms = int(round(t0 * 1000))
+        n = max(0, -(-(int(round(t1 * 1000)) - start_ms) // bucket_ms))
+        count = np.zeros(n, dtype=np.int64)
+        total = np.zeros(n)
+        low = np.full(n, np.inf)
+        high = np.full(n, -np.inf)
+        for segment, lo, hi in self._ranges(t0, t1):
+            for a in range(lo, hi, chunk_rows):
+                b = min(hi, a + chunk_rows)
+                ts = segment.column("ts")[a:b]
+                values = segment.column(name)[a:b]
+                if code is not None:
+                    mask = segment.column("node")[a:b] == code
+                    ts, values = ts[mask], values[mask]
+                if not len(ts):
+                    continue
+                keys = (ts - start_ms) // bucket_ms
+                # ts is sorted, so every bucket is one contiguous run
+                edges = np.flatnonzero(np.diff(keys)) + 1
+                starts = np.concatenate(([0], edges))
+                ids = keys[starts]
+                values = values.astype(np.float64)
+                count[ids] += np.diff(np.concatenate((starts, [len(keys)])))
+                total[ids] += np.add.reduceat(values, starts)
+                np.minimum.at(low, ids, np.minimum.reduceat(values, starts))
+                np.maximum.at(high, ids, np.maximum.reduceat(values, starts))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        empty = count == 0
+        low[empty] = np.nan
+        high[empty] = np.nan
+        return {"start": (start_ms + np.arange(n) * bucket_ms) / 1000.0,
+                "count": count, "min": low, "max": high, "mean": mean}
+
+
+def store_sink(store):
+    """Gateway sink writing batches of gateway.Reading into a TimeSeriesStore."""
+
+    def write(batch):
+        store.append_many([r.timestamp for r in batch], [r.node for r in batch],
+                          [r.temperature for r in batch], [r.humidity for r in batch])
+
+    return write
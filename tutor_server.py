@@ -0,0 +1,291 @@
+"""Multi-session tutoring server: the guide, quiz and practice over TCP.
+
+start.py runs one menu loop on one terminal; its slow_print sleeps and its
+input() blocks the whole process.  Here every connection gets a Session
+coroutine running the same menu and the same flows on one asyncio loop: the
+guide, quiz, practice and search are start.py's *_flow() generators, which
+yield what to show and what to ask, and Session.drive() does both over TCP:
+
+    slow_print   paced by frames against an absolute deadline (like
+                 renderer.TypewriterRenderer) with asyncio.sleep, so a session
+                 waiting for its next frame costs nothing; writer.drain()
+                 after each frame keeps a slow client from buffering output
+    input        lines come from a per-session reader task; pressing Enter
+                 while text is being paced shows the rest of it at once
+
+The protocol is plain lines (telnet or nc work; telnet option negotiation
+is ignored).  Each session records how long it took to answer an input and
+how late its paced frames were written; metrics() aggregates them across
+sessions.
+
+    python tutor_server.py --port 2323 --track mcu
+    telnet localhost 2323
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from collections import deque
+
+from colorama import Fore, Style
+
+import content
+import start
+from telemetry import percentiles
+
+RESET = Style.RESET_ALL
+_TELNET = re.compile(rb"\xff\xfa.*?\xff\xf0|\xff[\xfb-\xfe].|\xff[\xf0-\xfa\xff]", re.S)
+
+# Per track: the content sections and slow_print delay of start.py / start2.py
+# (the ESP-01 guide has no overview, like start2.py's).
+TRACKS = {
+    "mcu": {"guide": "mcu_guide", "quiz": "mcu_quiz", "overview": True, "delay": 0.05},
+    "esp01": {"guide": "esp01_guide", "quiz": "esp01_quiz", "overview": False, "delay": 0.1},
+}
+
+
+class SessionClosed(Exception):
+    pass
+
+
+class Session:
+    def __init__(self, server, reader, writer, track):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.track = track
+        self.options = TRACKS[track]
+        self.system = server.systems[track]
+        self.lines = deque()
+        self.line_ready = asyncio.Event()
+        self.started = server.clock()
+        self.input_at = None
+        self.input_latency = []
+        self.max_frame_lag = 0.0
+        self.stats = {"inputs": 0, "frames": 0, "bytes": 0}
+
+    async def _read_lines(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                line = _TELNET.sub(b"", line)
+                self.lines.append(line.decode("utf-8", "replace").rstrip("\r\n"))
+                self.line_ready.set()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        self.lines.append(None)
+        self.line_ready.set()
+
+    def _write(self, text):
+        data = text.encode()
+        self.writer.write(data)
+        self.stats["bytes"] += len(data)
+        if self.input_at is not None:
+            self.input_latency.append(self.server.clock() - self.input_at)
+            self.input_at = None
+
+    async def _drain(self):
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            raise SessionClosed()
+
+    def _skip_requested(self):
+        # An empty line typed while text is paced skips the rest of it;
+        # anything else is kept as the answer to the next prompt.
+        lines = self.lines
+        if lines and lines[0] == "":
+            lines.popleft()
+            return True
+        return False
+
+    async def slow_print(self, text, color=Fore.WHITE, delay=None):
+        text = text.replace("\n", "\r\n")
+        delay = (self.options["delay"] if delay is None else delay) * self.server.delay_scale
+        if delay <= 0 or not text:
+            self._write(color + text + RESET + "\r\n")
+            await self._drain()
+            return
+        clock = self.server.clock
+        frame_interval = self.server.frame_interval
+        n = len(text)
+        start = clock()
+        pos = 0
+        prefix = color
+        while pos < n:
+            due = n if self._skip_requested() else min(n, int((clock() - start) / delay) + 1)
+            if due > pos:
+                self._write(prefix + text[pos:due])
+                self.stats["frames"] += 1
+                prefix = ""
+                pos = due
+                await self._drain()
+            if pos >= n:
+                break
+            now = clock()
+            wake = max(start + pos * delay, now + frame_interval)
+            await asyncio.sleep(wake - now)
+            lag = clock() - wake
+            if lag > self.max_frame_lag:
+                self.max_frame_lag = lag
+            self.server.frame_lag.append(lag)
+        self._write(RESET + "\r\n")
+        await self._drain()
+
+    async def input(self, prompt):
+        self._write(prompt)
+        await self._drain()
+        while not self.lines:
+            self.line_ready.clear()
+            try:
+                await asyncio.wait_for(self.line_ready.wait(), self.server.idle_timeout)
+            except asyncio.TimeoutError:
+                raise SessionClosed()
+        line = self.lines.popleft()
+        if line is None:
+            raise SessionClosed()
+        self.stats["inputs"] += 1
+        self.input_at = self.server.clock()
+        return line
+
+    async def drive(self, flow):
+        """Run one of start.py's flows in this session."""
+        reply = None
+        while True:
+            try:
+                request = flow.send(reply)
+            except StopIteration:
+                return
+            reply = None
+            if request[0] == "say":
+                _, text, color, delay = request
+                await self.slow_print(text, getattr(Fore, color) if color else "", delay)
+            else:
+                reply = await self.input(request[1].replace("\n", "\r\n"))
+
+    async def run(self):
+        banner, menu, prompt = self.server.frames
+        self._write(banner)
+        while True:
+            self._write(menu)
+            choice = (await self.input(prompt)).strip()
+            if choice in start.CHOICES:
+                await self.drive(getattr(self.system, start.CHOICES[choice] + "_flow")())
+            elif choice == "4":
+                await self.slow_print("Exiting the program. Goodbye!", Fore.CYAN)
+                break
+            else:
+                await self.slow_print("Invalid choice. Please try again.", Fore.RED)
+
+    def summary(self):
+        latency = percentiles(self.input_latency)
+        return {"track": self.track, "duration_s": self.server.clock() - self.started,
+                "input_p50_ms": latency.get("p50", 0) * 1000, "input_max_ms": latency.get("max", 0) * 1000,
+                "max_frame_lag_ms": self.max_frame_lag * 1000, **self.stats}
+
+
+class TutorServer:
+    def __init__(self, track="mcu", delay_scale=1.0, frame_rate=30, max_sessions=500,
+                 idle_timeout=900.0, clock=time.monotonic):
+        self.content = content.load()
+        self.track = track
+        self.delay_scale = delay_scale
+        self.frame_interval = 1.0 / frame_rate
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.systems = {}
+        for name, options in TRACKS.items():
+            system = self.systems[name] = start.TemperatureHumidityMonitoringSystem(
+                options["guide"], options["quiz"], options["overview"])
+            system.answer_key()  # NumPy and the key are ready before the first quiz
+        self.frames = [frame.replace("\n", "\r\n") for frame in start.menu_frames(Fore, Style)]
+        self.sessions = set()
+        self.server = None
+        self.peak = 0
+        self.total = 0
+        self.rejected = 0
+        # Recent samples only; enough for percentiles of a long-running server.
+        self.frame_lag = deque(maxlen=100_000)
+        self.input_latency = deque(maxlen=100_000)
+        self.finished = deque(maxlen=1000)
+
+    async def start(self, host="0.0.0.0", port=2323):
+        self.server = await asyncio.start_server(self._handle, host, port, backlog=1024)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            writer.write(b"Server full, please try again later.\r\n")
+            writer.close()
+            return
+        session = Session(self, reader, writer, self.track)
+        self.sessions.add(session)
+        self.total += 1
+        self.peak = max(self.peak, len(self.sessions))
+        reading = asyncio.get_running_loop().create_task(session._read_lines())
+        try:
+            await session.run()
+        except SessionClosed:
+            pass
+        finally:
+            reading.cancel()
+            self.sessions.discard(session)
+            self.input_latency.extend(session.input_latency)
+            self.finished.append(session.summary())
+            writer.close()
+
+    def metrics(self):
+        lag = percentiles(self.frame_lag)
+        latency = percentiles(self.input_latency)
+        return {
+            "active": len(self.sessions), "peak": self.peak, "total": self.total,
+            "rejected": self.rejected,
+            "input_latency_ms": {k: v * 1000 if k != "count" else v for k, v in latency.items()},
+            "frame_lag_ms": {k: v * 1000 if k != "count" else v for k, v in lag.items()},
+        }
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for session in list(self.sessions):
+            session.writer.close()
+
+
+async def _serve(args):
+    server = TutorServer(args.track, args.delay_scale, args.frame_rate, args.max_sessions,
+                         args.idle_timeout)
+    port = await server.start(args.host, args.port)
+    print("listening on %s:%d" % (args.host, port), flush=True)
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            print(json.dumps(server.metrics()), flush=True)
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the guide, quiz and practice to many terminals.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--track", default="mcu", choices=sorted(TRACKS))
+    parser.add_argument("--delay-scale", type=float, default=1.0, help="0 prints text at once")
+    parser.add_argument("--frame-rate", type=float, default=30.0)
+    parser.add_argument("--max-sessions", type=int, default=500)
+    parser.add_argument("--idle-timeout", type=float, default=900.0)
+    parser.add_argument("--report", type=float, default=60.0, help="seconds between metric dumps")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Gateway uploader: pooled keep-alive HTTP sessions for forwarding readings.
+
+A desktop or Raspberry Pi gateway forwards readings from many nodes to
+`api_endpoint`.  Opening a connection per upload (what `urequests.post` +
+`response.close()` does on the node) costs a TCP handshake each time, so the
+gateway keeps one `requests.Session` with a bounded connection pool and posts
+from a small worker pool.  Latency is recorded per endpoint and reported as
+percentiles.
+
+    with GatewayUploader(pool_size=8, workers=8) as uploader:
+        futures = [uploader.submit(url, json=reading) for reading in readings]
+        print(uploader.latency(url))
+
+`post()` has the same signature as `hal` backends' post, so an uploader can
+be handed to AcquisitionPipeline directly.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetry import percentiles
+
+
+class GatewayUploader:
+    def __init__(self, pool_size=8, workers=8, timeout=5.0, keep_alive=True,
+                 max_samples=10000, session=None):
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="uploader")
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.counts = {"requests": 0, "errors": 0}
+
+    def _record(self, url, seconds, ok):
+        with self.lock:
+            samples = self.latencies.get(url)
+            if samples is None:
+                samples = self.latencies[url] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+            self.counts["requests"] += 1
+            if not ok:
+                self.counts["errors"] += 1
+
+    def post(self, url, data=None, json=None, headers=None):
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.post(url, data=data, json=json, headers=headers,
+                                         timeout=self.timeout)
+            # Read the body so the connection goes back to the pool.
+            response.content
+            ok = response.status_code < 400
+            return response
+        except requests.RequestException as exc:
+            # Callers written for urequests expect OSError on network failures.
+            raise OSError(str(exc)) from exc
+        finally:
+            self._record(url, time.perf_counter() - started, ok)
+
+    def submit(self, url, data=None, json=None, headers=None):
+        return self.executor.submit(self.post, url, data, json, headers)
+
+    def post_many(self, url, payloads, content_type="application/json"):
+        """Post every payload concurrently; returns the list of status codes (None on error)."""
+        headers = {"Content-Type": content_type}
+        futures = [self.submit(url, data=payload, headers=headers) for payload in payloads]
+        statuses = []
+        for future in futures:
+            try:
+                statuses.append(future.result().status_code)
+            except OSError:
+                statuses.append(None)
+        return statuses
+
+    def latency(self, url=None):
+        with self.lock:
+            if url is not None:
+                return percentiles(self.latencies.get(url, ()))
+            return {key: percentiles(samples) for key, samples in self.latencies.items()}
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,180 @@
+"""Wi-Fi connection manager for the ESP-01 node code.
+
+The guide connects with
+
+    wlan.connect(ssid, password)
+    while not wlan.isconnected():
+        pass
+
+which keeps the CPU busy, never gives up when the access point is gone and,
+after every deep-sleep wake, makes the station scan all channels again.
+WifiManager.connect() instead tries, each step bounded by a deadline and
+polled with short sleeps:
+
+    1. nothing, if the station is still associated
+    2. the cached BSSID (and a static IP, if configured, skipping DHCP)
+    3. a full scan, picking the strongest AP with our SSID, which refreshes
+       the cache
+    4. giving up: the radio is switched off and the caller keeps buffering
+
+The cache is a small bytearray region (see WifiCache) so the node can keep
+it in RTC memory across deep sleep.  Each connect() leaves its outcome in
+`stats` and in the cache, so the next wake can report it.  Runs on
+MicroPython and, with hal.SimulatedWLAN, on CPython.
+"""
+
+# WifiCache layout
+CACHE_SIZE = 16
+_VALID = 0
+_CHANNEL = 1
+_BSSID = 2  # 6 bytes
+_LAST_MS = 8  # uint16, duration of the last connect()
+_LAST_RESULT = 10
+_FAILURES = 11  # consecutive failed connects
+
+RESULTS = ("none", "already", "cached", "scan", "offline")
+
+
+class WifiCache:
+    """BSSID/channel and last-connect stats in `buf[offset:offset + CACHE_SIZE]`."""
+
+    def __init__(self, buf=None, offset=0):
+        self.buf = bytearray(CACHE_SIZE) if buf is None else buf
+        self.offset = offset
+
+    @property
+    def bssid(self):
+        o = self.offset
+        return bytes(self.buf[o + _BSSID:o + _BSSID + 6]) if self.buf[o + _VALID] else None
+
+    @property
+    def channel(self):
+        return self.buf[self.offset + _CHANNEL] if self.buf[self.offset + _VALID] else None
+
+    def store(self, bssid, channel):
+        o = self.offset
+        self.buf[o + _VALID] = 1
+        self.buf[o + _CHANNEL] = channel or 0
+        self.buf[o + _BSSID:o + _BSSID + 6] = bssid
+
+    def invalidate(self):
+        self.buf[self.offset + _VALID] = 0
+
+    def record(self, result, ms):
+        o = self.offset
+        ms = min(ms, 0xFFFF)
+        self.buf[o + _LAST_MS] = ms & 0xFF
+        self.buf[o + _LAST_MS + 1] = ms >> 8
+        self.buf[o + _LAST_RESULT] = RESULTS.index(result)
+        failures = self.buf[o + _FAILURES]
+        self.buf[o + _FAILURES] = min(failures + 1, 255) if result == "offline" else 0
+
+    def last(self):
+        """(result, milliseconds, consecutive failures) of the previous connect()."""
+        o = self.offset
+        return (RESULTS[self.buf[o + _LAST_RESULT]],
+                self.buf[o + _LAST_MS] | self.buf[o + _LAST_MS + 1] << 8, self.buf[o + _FAILURES])
+
+
+def _time_functions():
+    try:
+        import utime as time
+    except ImportError:
+        import time
+    if hasattr(time, "ticks_ms"):
+        return time.ticks_ms, time.ticks_diff, time.sleep_ms
+    return (lambda: int(time.monotonic() * 1000), lambda a, b: a - b,
+            lambda ms: time.sleep(ms / 1000.0))
+
+
+class WifiManager:
+    def __init__(self, wlan, ssid, password, static_ip=None, cache=None,
+                 cached_timeout_ms=4000, scan_timeout_ms=10000, poll_ms=50,
+                 ticks_ms=None, ticks_diff=None, sleep_ms=None):
+        self.wlan = wlan
+        self.ssid = ssid
+        self.password = password
+        self.static_ip = static_ip
+        self.cache = cache or WifiCache()
+        self.cached_timeout_ms = cached_timeout_ms
+        self.scan_timeout_ms = scan_timeout_ms
+        self.poll_ms = poll_ms
+        default_ticks, default_diff, default_sleep = _time_functions()
+        self.ticks_ms = ticks_ms or default_ticks
+        self.ticks_diff = ticks_diff or default_diff
+        self.sleep_ms = sleep_ms or default_sleep
+        self.stats = {"result": "none", "ms": 0, "attempts": 0, "scanned": False, "status": None}
+
+    def _wait(self, timeout_ms):
+        wlan = self.wlan
+        started = self.ticks_ms()
+        while not wlan.isconnected():
+            status = wlan.status()
+            # On the ESP8266, 2..4 are STAT_WRONG_PASSWORD, STAT_NO_AP_FOUND and
+            # STAT_CONNECT_FAIL; no point waiting for the deadline.  Other ports
+            # number them differently (the ESP32 uses 200 and up), so there only
+            # the deadline ends a failed attempt.
+            if 2 <= status <= 4 or self.ticks_diff(self.ticks_ms(), started) >= timeout_ms:
+                self.stats["status"] = status
+                return False
+            self.sleep_ms(self.poll_ms)
+        self.stats["status"] = wlan.status()
+        return True
+
+    def _attempt(self, bssid, timeout_ms):
+        self.stats["attempts"] += 1
+        wlan = self.wlan
+        wlan.disconnect()
+        if bssid is None:
+            wlan.connect(self.ssid, self.password)
+        else:
+            wlan.connect(self.ssid, self.password, bssid=bssid)
+        return self._wait(timeout_ms)
+
+    def scan(self):
+        """Strongest visible AP with our SSID as (bssid, channel), or None."""
+        self.stats["scanned"] = True
+        ssid = self.ssid.encode()
+        best = None
+        for entry in self.wlan.scan():
+            if entry[0] == ssid and (best is None or entry[3] > best[3]):
+                best = entry
+        return None if best is None else (bytes(best[1]), best[2])
+
+    def connect(self):
+        """Bring the station up; returns True when it has an IP."""
+        started = self.ticks_ms()
+        stats = self.stats
+        stats["attempts"] = 0
+        stats["scanned"] = False
+        stats["status"] = None
+        wlan = self.wlan
+        result = "offline"
+        if wlan.active() and wlan.isconnected():
+            result = "already"
+        else:
+            wlan.active(True)
+            if self.static_ip:
+                wlan.ifconfig(self.static_ip)
+            cache = self.cache
+            if cache.bssid is not None and self._attempt(cache.bssid, self.cached_timeout_ms):
+                result = "cached"
+            else:
+                ap = self.scan()
+                if ap is None:
+                    # Hidden SSID or AP not found by the scan: let the driver try.
+                    ok = self._attempt(None, self.scan_timeout_ms)
+                else:
+                    ok = self._attempt(ap[0], self.scan_timeout_ms)
+                if ok:
+                    result = "scan"
+                    if ap is not None:
+                        cache.store(ap[0], ap[1])
+                else:
+                    cache.invalidate()
+        if result == "offline":
+            wlan.active(False)
+        stats["result"] = result
+        stats["ms"] = self.ticks_diff(self.ticks_ms(), started)
+        self.cache.record(result, stats["ms"])
+        return result != "offline"
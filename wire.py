@@ -0,0 +1,139 @@
+"""Compact binary wire format for readings, with JSON kept as a fallback.
+
+A record is 16 bytes, little-endian:
+
+    node         uint32   e.g. the low 32 bits of machine.unique_id()
+    seq          uint32   per-node sequence number
+    timestamp    uint32   seconds since the Unix epoch
+    temperature  int16    hundredths of a degree C
+    humidity     uint16   hundredths of a percent RH
+
+Content types:
+
+    application/x-thm-record   version byte + one record (17 bytes)
+    application/x-thm-frame    b"TF" + version + uint16 count, then records
+    application/json           the guide's {'temperature', 'humidity'} dict,
+                               a list of record dicts, or an acquisition batch
+
+encode_payload()/decode_payload() dispatch on the content type, so JSON
+clients keep working next to binary ones; a receiver that only takes JSON
+answers 415 and AcquisitionPipeline falls back to JSON.  Values outside a
+record's range (humidity below 0, temperature beyond +-327.67) raise
+ValueError.  Only `struct` and `json` are used, so the encoder runs
+unchanged on MicroPython.
+"""
+import json
+import struct
+
+VERSION = 1
+# MicroPython's struct has no Struct class, so formats are plain strings.
+RECORD = "<IIIhH"
+RECORD_SIZE = struct.calcsize(RECORD)
+FRAME_MAGIC = b"TF"
+FRAME_HEADER = "<2sBH"
+FRAME_HEADER_SIZE = struct.calcsize(FRAME_HEADER)
+
+RECORD_TYPE = "application/x-thm-record"
+FRAME_TYPE = "application/x-thm-frame"
+JSON_TYPE = "application/json"
+
+
+def _fixed(value):
+    return int(round(value * 100))
+
+
+def _out_of_range(temperature, humidity):
+    return ValueError("reading out of range for a wire record: temperature %r, humidity %r"
+                      % (temperature, humidity))
+
+
+def encode_record(node, seq, timestamp, temperature, humidity):
+    t, h = _fixed(temperature), _fixed(humidity)
+    if not (-32768 <= t <= 32767 and 0 <= h <= 65535):
+        raise _out_of_range(temperature, humidity)
+    out = bytearray(1 + RECORD_SIZE)
+    out[0] = VERSION
+    struct.pack_into(RECORD, out, 1, node, seq, int(timestamp), t, h)
+    return bytes(out)
+
+
+def encode_frame(records, out=None):
+    """Pack (node, seq, timestamp, temperature, humidity) tuples into one frame.
+
+    `out` may be a preallocated bytearray to avoid allocating on the node;
+    the frame is written at its start and a memoryview of it is returned.
+    """
+    size = FRAME_HEADER_SIZE + RECORD_SIZE * len(records)
+    if out is None:
+        out = bytearray(size)
+    pack_into = struct.pack_into
+    pack_into(FRAME_HEADER, out, 0, FRAME_MAGIC, VERSION, len(records))
+    pos = FRAME_HEADER_SIZE
+    for node, seq, timestamp, temperature, humidity in records:
+        t, h = _fixed(temperature), _fixed(humidity)
+        if not (-32768 <= t <= 32767 and 0 <= h <= 65535):
+            raise _out_of_range(temperature, humidity)
+        pack_into(RECORD, out, pos, node, seq, int(timestamp), t, h)
+        pos += RECORD_SIZE
+    return memoryview(out)[:size]
+
+
+def decode_record(data):
+    if data[0] != VERSION:
+        raise ValueError("unsupported record version %d" % data[0])
+    node, seq, timestamp, t, h = struct.unpack_from(RECORD, data, 1)
+    return [(node, seq, timestamp, t / 100.0, h / 100.0)]
+
+
+def decode_frame(data):
+    magic, version, count = struct.unpack_from(FRAME_HEADER, data, 0)
+    if magic != FRAME_MAGIC or version != VERSION:
+        raise ValueError("not a version %d reading frame" % VERSION)
+    if len(data) < FRAME_HEADER_SIZE + count * RECORD_SIZE:
+        raise ValueError("truncated frame: %d records announced" % count)
+    unpack_from = struct.unpack_from
+    out = []
+    pos = FRAME_HEADER_SIZE
+    for _ in range(count):
+        node, seq, timestamp, t, h = unpack_from(RECORD, data, pos)
+        out.append((node, seq, timestamp, t / 100.0, h / 100.0))
+        pos += RECORD_SIZE
+    return out
+
+
+def _decode_json(body):
+    data = json.loads(body)
+    if isinstance(data, dict) and "samples" in data:
+        # acquisition.encode_batch
+        t0 = data["t0"]
+        return [(data["node"], None, t0 + dt, t, h) for dt, t, h in data["samples"]]
+    if isinstance(data, dict):
+        data = [data]
+    return [(r.get("node"), r.get("seq"), r.get("timestamp"), r["temperature"], r["humidity"])
+            for r in data]
+
+
+def encode_payload(records, content_type=FRAME_TYPE):
+    if content_type == FRAME_TYPE:
+        return bytes(encode_frame(records))
+    if content_type == RECORD_TYPE:
+        if len(records) != 1:
+            raise ValueError("%s carries exactly one record" % RECORD_TYPE)
+        return encode_record(*records[0])
+    if content_type == JSON_TYPE:
+        keys = ("node", "seq", "timestamp", "temperature", "humidity")
+        return json.dumps([dict(zip(keys, r)) for r in records]).encode()
+    raise ValueError("unsupported content type %r" % content_type)
+
+
+def decode_payload(body, content_type):
+    """Decode any supported payload to (node, seq, timestamp, temperature, humidity) tuples."""
+    content_type = (content_type or JSON_TYPE).split(";")[0].strip().lower()
+    if content_type == FRAME_TYPE:
+        return decode_frame(body)
+    if content_type == RECORD_TYPE:
+        return decode_record(body)
+    if content_type == JSON_TYPE:
+        return _decode_json(body)
+    raise ValueError("unsupported content type %r" % content_type)
+